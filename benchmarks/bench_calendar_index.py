@@ -0,0 +1,80 @@
+"""Benchmark the vectorized CalendarIndex against a Python loop over TradingDays.
+
+A synthetic calendar of weekdays (09:30 - 16:00) is queried with random minute
+timestamps. The Python loop is timed on a sample and extrapolated.
+
+Usage (from the repository root):
+    python benchmarks/bench_calendar_index.py --timestamps 10000000
+"""
+import argparse
+import os
+import sys
+import time
+from bisect import bisect_right
+from datetime import datetime, timedelta
+from typing import List
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+from analytics.calendar_index import CalendarIndex  # noqa: E402
+from domainmodels.trading_day import TradingDay  # noqa: E402
+
+
+def make_calendar(start: datetime, years: int) -> List[TradingDay]:
+    """Create trading days for every weekday of the given years."""
+    trading_days = []
+    for i in range(years * 365):
+        day = start + timedelta(days=i)
+        if day.weekday() < 5:
+            trading_day = TradingDay()
+            trading_day.open = day.replace(hour=9, minute=30)
+            trading_day.close = day.replace(hour=16)
+            trading_days.append(trading_day)
+    return trading_days
+
+
+def loop_is_open(trading_days: List[TradingDay], timestamps: List[datetime]) -> list:
+    """Classify timestamps with a Python loop and a bisect per timestamp."""
+    opens = [day.open for day in trading_days]
+    result = []
+    for ts in timestamps:
+        i = bisect_right(opens, ts) - 1
+        result.append(i >= 0 and ts < trading_days[i].close)
+    return result
+
+
+def main(n: int, years: int, sample: int) -> None:
+    """Run the benchmark."""
+    start = datetime(2010, 1, 1)
+    trading_days = make_calendar(start, years)
+    index = CalendarIndex(trading_days)
+
+    rng = np.random.default_rng(0)
+    minutes = rng.integers(0, years * 365 * 24 * 60, n)
+    timestamps = np.datetime64(start, "ns") + minutes.astype("timedelta64[m]")
+    print(f"{n:,} timestamps over {len(trading_days):,} trading days")
+
+    for name in ["is_open", "session_of", "next_open", "day_index"]:
+        query = getattr(index, name)
+        t0 = time.perf_counter()
+        query(timestamps)
+        elapsed = time.perf_counter() - t0
+        print(f"{name:>12}: {elapsed:.3f}s ({elapsed / n * 1e9:.1f} ns/timestamp)")
+
+    sample_ts = timestamps[:sample].astype("datetime64[us]").tolist()
+    t0 = time.perf_counter()
+    looped = loop_is_open(trading_days, sample_ts)
+    elapsed = (time.perf_counter() - t0) / sample * n
+    assert looped == index.is_open(timestamps[:sample]).tolist()
+    print(f"{'python loop':>12}: {elapsed:.3f}s extrapolated from {sample:,}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--timestamps", type=int, default=10_000_000)
+    parser.add_argument("--years", type=int, default=10)
+    parser.add_argument("--sample", type=int, default=200_000)
+    args = parser.parse_args()
+    main(args.timestamps, args.years, args.sample)
@@ -0,0 +1,81 @@
+"""Compare eager and lazy mapping of list_orders(limit=500).
+
+AlpacaApi is run against a stub REST client returning 500 orders scaled from
+tests/data. Each call reads a few fields of every order, like most callers do,
+or all fields via __dict__.
+
+Usage (from the repository root):
+    python benchmarks/bench_lazy.py --calls 200
+"""
+import argparse
+import asyncio
+import os
+import sys
+import time
+from typing import Any, List
+
+sys.path.insert(0, os.path.dirname(__file__))
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+from fixtures import scaled  # noqa: E402
+from tradingapi.alpaca.alpaca_api import AlpacaApi  # noqa: E402
+
+LIMIT = 500
+ENV = {"APCA_API_KEY_ID": "bench", "APCA_API_SECRET_KEY": "bench"}
+
+
+class StubRest:
+    """Answers list_orders with the same scaled fixture orders."""
+
+    def __init__(self) -> None:
+        """Class initialization function."""
+        self.orders = scaled("list_orders", LIMIT)
+
+    def list_orders(self, **kwargs: Any) -> List[Any]:
+        """Get the orders."""
+        return self.orders
+
+
+def read_few(orders: List[Any]) -> None:
+    """Read the fields most callers use."""
+    for order in orders:
+        order.id, order.qty, order.side
+
+
+def read_all(orders: List[Any]) -> None:
+    """Read all fields."""
+    for order in orders:
+        order.__dict__
+
+
+async def run(lazy: bool, calls: int, read: Any) -> float:
+    """Get the seconds per list_orders call including the reads."""
+    api = AlpacaApi(ENV, lazy=lazy)
+    api.api = StubRest()
+    await api.list_orders(limit=LIMIT)
+
+    t0 = time.perf_counter()
+    for _ in range(calls):
+        read(await api.list_orders(limit=LIMIT))
+    elapsed = (time.perf_counter() - t0) / calls
+    await api.close()
+    return elapsed
+
+
+async def main(calls: int) -> None:
+    """Run the benchmark."""
+    print(f"list_orders(limit={LIMIT}), {calls} calls")
+    for read in [read_few, read_all]:
+        eager = await run(False, calls, read)
+        lazy = await run(True, calls, read)
+        print(
+            f"{read.__name__:>9}: eager {eager * 1e3:.2f} ms, lazy {lazy * 1e3:.2f} ms "
+            f"({1 - lazy / eager:+.0%} saved)"
+        )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--calls", type=int, default=200)
+    args = parser.parse_args()
+    asyncio.run(main(args.calls))
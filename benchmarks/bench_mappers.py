@@ -0,0 +1,54 @@
+"""Measure the per-record cost of the mappers on scaled tests/data fixtures.
+
+Usage (from the repository root):
+    python benchmarks/bench_mappers.py --records 100000
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(__file__))
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+from fixtures import scaled  # noqa: E402
+from mappers.account_mapper import AccountMapper  # noqa: E402
+from mappers.order_mapper import OrderMapper  # noqa: E402
+from mappers.position_mapper import PositionMapper  # noqa: E402
+from mappers.tradingday_mapper import TradingDayMapper  # noqa: E402
+
+# Fixture -> mapper
+MAPPERS = {
+    "list_orders": OrderMapper,
+    "list_positions": PositionMapper,
+    "get_account": AccountMapper,
+    "get_trading_days": TradingDayMapper,
+}
+
+
+def main(records: int, repeat: int) -> None:
+    """Run the benchmark."""
+    print(f"{records:,} records, best of {repeat}")
+    for fixture, mapper_class in MAPPERS.items():
+        entities = scaled(fixture, records)
+        mapper = mapper_class.instance()
+        best = min(_timed(lambda: mapper.map_list(entities)) for _ in range(repeat))
+        print(
+            f"{mapper_class.__name__:>17}: {best:.3f}s "
+            f"({best / records * 1e6:.2f} us/record)"
+        )
+
+
+def _timed(func: object) -> float:
+    """Time a call of func in seconds."""
+    start = time.perf_counter()
+    func()  # type: ignore
+    return time.perf_counter() - start
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--records", type=int, default=100_000)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+    main(args.records, args.repeat)
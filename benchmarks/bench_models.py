@@ -0,0 +1,82 @@
+"""Compare the memory of the slotted domain models with dict based instances.
+
+Every model is mapped from its tests/data fixture once and then copied into
+slotted instances and into instances of an equivalent plain class with a
+__dict__. The field values are shared, so the difference is the per-object
+overhead, measured with tracemalloc.
+
+Usage (from the repository root):
+    python benchmarks/bench_models.py --instances 1000000
+"""
+import argparse
+import gc
+import os
+import sys
+import tracemalloc
+from typing import Any, Callable, Dict, List
+
+sys.path.insert(0, os.path.dirname(__file__))
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+from fixtures import scaled  # noqa: E402
+from mappers.account_mapper import AccountMapper  # noqa: E402
+from mappers.order_mapper import OrderMapper  # noqa: E402
+from mappers.position_mapper import PositionMapper  # noqa: E402
+from mappers.tradingday_mapper import TradingDayMapper  # noqa: E402
+
+# Fixture -> mapper
+MAPPERS = {
+    "list_orders": OrderMapper,
+    "list_positions": PositionMapper,
+    "get_account": AccountMapper,
+    "get_trading_days": TradingDayMapper,
+}
+
+
+def measure(create: Callable[[], Any], instances: int) -> float:
+    """Get the traced bytes per instance of creating the instances."""
+    gc.collect()
+    tracemalloc.start()
+    objects = [create() for _ in range(instances)]
+    size, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del objects
+    return size / instances
+
+
+def copier(cls: type, fields: Dict[str, Any]) -> Callable[[], Any]:
+    """Create a function creating instances of cls with the given fields."""
+    items = list(fields.items())
+
+    def create() -> Any:
+        obj = cls.__new__(cls)
+        for field, value in items:
+            setattr(obj, field, value)
+        return obj
+
+    return create
+
+
+def main(instances: int) -> None:
+    """Run the benchmark."""
+    print(f"{instances:,} instances per model")
+    rows: List[str] = []
+    for fixture, mapper_class in MAPPERS.items():
+        model = mapper_class.instance().map(scaled(fixture, 1)[0])
+        fields = model.__dict__
+        # A class per model with a per-instance __dict__, like before slots
+        plain_class = type(type(model).__name__, (), {})
+        plain = measure(copier(plain_class, fields), instances)
+        slotted = measure(copier(type(model), fields), instances)
+        rows.append(
+            f"{type(model).__name__:>14}: {plain:6.0f} -> {slotted:6.0f} bytes "
+            f"({len(fields)} fields, {slotted / plain:.0%})"
+        )
+    print("\n".join(rows))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--instances", type=int, default=1_000_000)
+    args = parser.parse_args()
+    main(args.instances)
@@ -0,0 +1,97 @@
+"""Compare the executor and aiohttp transports of AlpacaApi.
+
+A local aiohttp server answers the order endpoints with the fixtures in tests/data
+after a fixed latency. Both transports then fan out N concurrent get_order and
+submit_order calls and the wall time per batch is reported.
+
+Usage (from the repository root):
+    python benchmarks/bench_transport.py --calls 200 --latency 0.02
+"""
+import argparse
+import asyncio
+import json
+import os
+import sys
+import time
+from typing import Any, Callable, Dict
+
+from aiohttp import web
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+from domainmodels.order import OrderSide  # noqa: E402
+from tradingapi.alpaca.alpaca_api import AlpacaApi, Transport  # noqa: E402
+
+DATA_DIR = os.path.join(os.path.dirname(__file__), "..", "tests", "data")
+
+
+def load_raw(path: str) -> Any:
+    """Load a fixture and strip the _raw envelope of the sdk entities."""
+    with open(os.path.join(DATA_DIR, path), "r") as d:
+        data = json.loads(d.read())
+    return data.get("_raw", data) if isinstance(data, dict) else data
+
+
+def make_app(latency: float) -> web.Application:
+    """Create an app serving the order endpoints after a fixed latency."""
+    order = load_raw("get_order/api_get_order.json")
+    submitted = load_raw("submit_order/api_submit_order.json")
+
+    async def get_order(request: web.Request) -> web.Response:
+        await asyncio.sleep(latency)
+        return web.json_response(order)
+
+    async def submit_order(request: web.Request) -> web.Response:
+        await asyncio.sleep(latency)
+        return web.json_response(submitted)
+
+    app = web.Application()
+    app.router.add_get("/v2/orders/{order_id}", get_order)
+    app.router.add_post("/v2/orders", submit_order)
+    return app
+
+
+async def timed(calls: int, factory: Callable) -> float:
+    """Run calls coroutines concurrently and return the wall time in seconds."""
+    start = time.perf_counter()
+    await asyncio.gather(*[factory() for _ in range(calls)])
+    return time.perf_counter() - start
+
+
+async def main(calls: int, latency: float, port: int) -> None:
+    """Run the benchmark for both transports."""
+    runner = web.AppRunner(make_app(latency))
+    await runner.setup()
+    await web.TCPSite(runner, "127.0.0.1", port).start()
+
+    env: Dict[str, str] = {
+        "APCA_API_KEY_ID": "bench",
+        "APCA_API_SECRET_KEY": "bench",
+        "APCA_API_BASE_URL": f"http://127.0.0.1:{port}",
+    }
+    print(f"{calls} concurrent calls, {latency * 1000:.0f} ms server latency")
+    try:
+        for transport in Transport:
+            api = AlpacaApi(env, transport=transport)
+            get_order = await timed(calls, lambda: api.get_order("bench"))
+            submit_order = await timed(
+                calls, lambda: api.submit_order("TSLA", 1, OrderSide.BUY)
+            )
+            await api.close()
+            print(
+                f"{transport.value:>10}: get_order {get_order:.3f}s, "
+                f"submit_order {submit_order:.3f}s"
+            )
+    finally:
+        await runner.cleanup()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--calls", type=int, default=200)
+    parser.add_argument("--latency", type=float, default=0.02)
+    parser.add_argument("--port", type=int, default=8765)
+    args = parser.parse_args()
+    asyncio.get_event_loop().run_until_complete(
+        main(args.calls, args.latency, args.port)
+    )
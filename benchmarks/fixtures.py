@@ -0,0 +1,58 @@
+"""Load the tests/data fixtures as sdk entities, scaled to a given size."""
+import json
+import os
+from typing import Any, List
+
+from alpaca_trade_api.entity import Account, Calendar, Clock, Order, Position
+from mappers.account_mapper import AccountMapper
+from mappers.clock_mapper import ClockMapper
+from mappers.closed_positions_mapper import ClosedPositionMapper
+from mappers.order_mapper import OrderMapper
+from mappers.position_mapper import PositionMapper
+from mappers.tradingday_mapper import TradingDayMapper
+
+DATA_DIR = os.path.join(os.path.dirname(__file__), "..", "tests", "data")
+
+# Fixture name -> (file with the raw sdk response, entity class)
+FIXTURES = {
+    "get_account": ("get_account/api_get_account.json", Account),
+    "get_clock": ("get_clock/api_get_clock.json", Clock),
+    "get_order": ("get_order/api_get_order.json", Order),
+    "submit_order": ("submit_order/api_submit_order.json", Order),
+    "close_position": ("close_position/api_closed_position.json", Order),
+    "list_orders": ("list_orders/api_list_orders.json", Order),
+    "get_position": ("get_position/api_get_position.json", Position),
+    "list_positions": ("list_positions/api_list_positions.json", Position),
+    "get_trading_days": ("get_trading_days/api_get_trading_days.json", Calendar),
+    "close_all_positions": ("close_all_positions/api_close_all_positions.json", Order),
+}
+
+# Fixture name -> mapper of its entities
+MAPPERS = {
+    "get_account": AccountMapper,
+    "get_clock": ClockMapper,
+    "get_order": OrderMapper,
+    "submit_order": OrderMapper,
+    "close_position": OrderMapper,
+    "list_orders": OrderMapper,
+    "get_position": PositionMapper,
+    "list_positions": PositionMapper,
+    "get_trading_days": TradingDayMapper,
+    "close_all_positions": ClosedPositionMapper,
+}
+
+
+def load_raw(name: str) -> List[Any]:
+    """Load the raw json records of a fixture, without the _raw envelope."""
+    path, _ = FIXTURES[name]
+    with open(os.path.join(DATA_DIR, path), "r") as d:
+        data = json.loads(d.read())
+    records = data if isinstance(data, list) else [data]
+    return [record.get("_raw", record) for record in records]
+
+
+def scaled(name: str, size: int) -> List[Any]:
+    """Create size entities by repeating the records of a fixture."""
+    _, entity = FIXTURES[name]
+    records = load_raw(name)
+    return [entity(dict(records[i % len(records)])) for i in range(size)]
@@ -0,0 +1,174 @@
+"""Load generator driving AlpacaApi against the local stand-in server.
+
+For every method, N coroutines call AlpacaApi concurrently in a loop and the
+client-side latency of every call is recorded. The report lists the p50, p95
+and p99 latency, the throughput and the errors by status per method. Retries of
+throttled requests are part of the latency, as the caller waits for them.
+
+Concurrent calls of the coalesced read methods (e.g. get_account) share one
+request to the server, as they would in production.
+
+Usage (from the repository root):
+    python benchmarks/load_test.py --concurrency 50 --calls 20 --latency 0.02
+    python benchmarks/load_test.py --transport aiohttp --throttle-rate 0.05 \
+        --methods get_order submit_order --output load.json
+    python benchmarks/load_test.py --url http://127.0.0.1:8765
+"""
+import argparse
+import asyncio
+import json
+import os
+import sys
+import time
+from collections import Counter
+from datetime import datetime
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(__file__))
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+from domainmodels.order import OrderSide  # noqa: E402
+from fixtures import load_raw  # noqa: E402
+from standin_server import add_arguments, from_arguments, start  # noqa: E402
+from tradingapi.alpaca.alpaca_api import AlpacaApi, Transport  # noqa: E402
+
+ORDER_ID = load_raw("get_order")[0]["id"]
+
+# Method -> call of the method on an AlpacaApi
+CALLS: Dict[str, Callable[[AlpacaApi], Awaitable[Any]]] = {
+    "get_account": lambda api: api.get_account(),
+    "get_clock": lambda api: api.get_clock(),
+    "get_trading_days": lambda api: api.get_trading_days(
+        datetime(2022, 3, 1), datetime(2022, 3, 15)
+    ),
+    "list_orders": lambda api: api.list_orders(),
+    "get_order": lambda api: api.get_order(ORDER_ID),
+    "submit_order": lambda api: api.submit_order("AAPL", 1, OrderSide.BUY),
+    "cancel_order": lambda api: api.cancel_order(ORDER_ID),
+    "list_positions": lambda api: api.list_positions(),
+    "get_position": lambda api: api.get_position("AAPL"),
+    "close_position": lambda api: api.close_position("AAPL"),
+}
+
+
+def error_key(ex: Exception) -> str:
+    """Get the HTTP status of a failed call, or the exception name."""
+    status = getattr(ex, "http_status_code", None) or getattr(ex, "status_code", None)
+    return str(status) if status is not None else type(ex).__name__
+
+
+async def drive(
+    api: AlpacaApi, method: str, concurrency: int, calls: int
+) -> Dict[str, Any]:
+    """Call a method from concurrency coroutines, calls times each.
+
+    Args:
+        api (AlpacaApi): The api to drive.
+        method (str): The method, a key of CALLS.
+        concurrency (int): The number of concurrent coroutines.
+        calls (int): The number of calls per coroutine.
+
+    Returns:
+        Dict[str, Any]: The latency percentiles, throughput and errors.
+    """
+    call = CALLS[method]
+    latencies: List[float] = []
+    errors: Counter = Counter()
+
+    async def worker() -> None:
+        for _ in range(calls):
+            start = time.perf_counter()
+            try:
+                await call(api)
+            except Exception as ex:
+                errors[error_key(ex)] += 1
+            latencies.append(time.perf_counter() - start)
+
+    start = time.perf_counter()
+    await asyncio.gather(*[worker() for _ in range(concurrency)])
+    elapsed = time.perf_counter() - start
+
+    p50, p95, p99 = np.percentile(np.asarray(latencies) * 1e3, [50, 95, 99])
+    return {
+        "method": method,
+        "calls": len(latencies),
+        "seconds": elapsed,
+        "calls_per_second": len(latencies) / elapsed,
+        "p50_ms": p50,
+        "p95_ms": p95,
+        "p99_ms": p99,
+        "errors": dict(errors),
+    }
+
+
+async def run(args: argparse.Namespace) -> List[Dict[str, Any]]:
+    """Start the stand-in server unless a url is given and drive all methods."""
+    runner = None
+    url = args.url
+    if url is None:
+        runner = await start(from_arguments(args), port=args.port)
+        url = f"http://127.0.0.1:{args.port}"
+
+    env = {
+        "APCA_API_KEY_ID": "load",
+        "APCA_API_SECRET_KEY": "load",
+        "APCA_API_BASE_URL": url,
+        "APCA_RETRY_MAX": str(args.retry_max),
+        "APCA_RETRY_WAIT": str(args.retry_wait),
+    }
+    api = AlpacaApi(env, transport=Transport(args.transport))
+    try:
+        if args.order_stream:
+            await api.start_order_stream()
+        return [
+            await drive(api, method, args.concurrency, args.calls)
+            for method in args.methods
+        ]
+    finally:
+        await api.close()
+        if runner is not None:
+            await runner.cleanup()
+
+
+def print_report(results: List[Dict[str, Any]]) -> None:
+    """Print the results as a table."""
+    print(
+        f"{'method':<18}{'calls':>7}{'calls/s':>10}"
+        f"{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}  errors"
+    )
+    for r in results:
+        errors = ", ".join(f"{k}: {v}" for k, v in sorted(r["errors"].items()))
+        print(
+            f"{r['method']:<18}{r['calls']:>7}{r['calls_per_second']:>10.1f}"
+            f"{r['p50_ms']:>9.2f}{r['p95_ms']:>9.2f}{r['p99_ms']:>9.2f}  {errors}"
+        )
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    """Run the load test and report the results."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--url", help="A running server, defaults to a local one.")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--transport", choices=[t.value for t in Transport])
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--calls", type=int, default=20)
+    parser.add_argument("--methods", nargs="+", choices=CALLS, default=list(CALLS))
+    parser.add_argument("--retry-max", type=int, default=3)
+    parser.add_argument("--retry-wait", type=int, default=1)
+    parser.add_argument("--order-stream", action="store_true")
+    parser.add_argument("--output", help="Also write the results as json.")
+    add_arguments(parser)
+    parser.set_defaults(transport=Transport.AIOHTTP.value)
+    args = parser.parse_args(argv)
+
+    results = asyncio.run(run(args))
+    print_report(results)
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump({"arguments": vars(args), "results": results}, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
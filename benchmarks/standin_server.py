@@ -0,0 +1,315 @@
+"""Local stand-in for the alpaca trading API, backed by the tests/data fixtures.
+
+The server speaks the REST endpoints used by AlpacaApi (account, clock, calendar,
+orders and positions) and the trade updates websocket. Every REST response is
+delayed by a configurable latency and can fail with a configurable rate of
+500 errors and 429 throttles, such that load tests exercise the retry and error
+paths of the client without touching the broker.
+
+Submitted orders are kept in memory and announced on the stream with a "new"
+and a "fill" trade update. Positions are not changed by closing them, so long
+load tests see the same portfolio throughout.
+
+Usage (from the repository root):
+    python benchmarks/standin_server.py --port 8765 --latency 0.02 \
+        --error-rate 0.01 --throttle-rate 0.05
+    APCA_API_BASE_URL=http://127.0.0.1:8765 python my_strategy.py
+"""
+import argparse
+import asyncio
+import os
+import random
+import sys
+import uuid
+from datetime import datetime, timezone
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Set
+
+from aiohttp import WSMsgType, web
+
+sys.path.insert(0, os.path.dirname(__file__))
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+from fixtures import load_raw  # noqa: E402
+
+Handler = Callable[[web.Request], Awaitable[web.StreamResponse]]
+
+
+class StandInBroker:
+    """The state and failure behaviour of the stand-in server.
+
+    Attributes:
+        latency (float): The mean seconds every REST response is delayed by.
+        jitter (float): The maximum seconds added to or removed from latency.
+        error_rate (float): The share of REST requests failing with a 500.
+        throttle_rate (float): The share of REST requests throttled with a 429.
+        retry_after (int): The Retry-After seconds of throttled responses.
+        fill_delay (float): The seconds between the new and fill trade updates
+            of a submitted order.
+        requests (Dict[str, int]): The number of requests per route and status.
+    """
+
+    def __init__(
+        self,
+        latency: float = 0.0,
+        jitter: float = 0.0,
+        error_rate: float = 0.0,
+        throttle_rate: float = 0.0,
+        retry_after: int = 1,
+        fill_delay: float = 0.01,
+        seed: Optional[int] = None,
+    ) -> None:
+        """Class initialization function."""
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.throttle_rate = throttle_rate
+        self.retry_after = retry_after
+        self.fill_delay = fill_delay
+        self.random = random.Random(seed)
+        self.requests: Dict[str, int] = {}
+
+        self.account = load_raw("get_account")[0]
+        self.clock = load_raw("get_clock")[0]
+        self.calendar = load_raw("get_trading_days")
+        self.submitted = load_raw("submit_order")[0]
+        self.closed = load_raw("close_position")[0]
+        self.closed_all = load_raw("close_all_positions")
+        orders = load_raw("list_orders") + load_raw("get_order")
+        self.orders = {order["id"]: order for order in orders}
+        self.positions = {p["symbol"]: p for p in load_raw("list_positions")}
+        self.streams: Set[web.WebSocketResponse] = set()
+
+    @web.middleware
+    async def middleware(self, request: web.Request, handler: Handler) -> Any:
+        """Delay the REST responses and inject errors and throttles."""
+        if request.path == "/stream":
+            return await handler(request)
+
+        delay = self.latency + self.random.uniform(-self.jitter, self.jitter)
+        await asyncio.sleep(max(delay, 0.0))
+
+        draw = self.random.random()
+        if draw < self.throttle_rate:
+            response: web.StreamResponse = web.json_response(
+                {"code": 42910000, "message": "rate limit exceeded"},
+                status=429,
+                headers={"Retry-After": str(self.retry_after)},
+            )
+        elif draw < self.throttle_rate + self.error_rate:
+            response = web.json_response(
+                {"code": 50010000, "message": "internal server error"}, status=500
+            )
+        else:
+            response = await handler(request)
+
+        resource = request.match_info.route.resource
+        path = request.path if resource is None else resource.canonical
+        key = f"{request.method} {path} {response.status}"
+        self.requests[key] = self.requests.get(key, 0) + 1
+        return response
+
+    async def get_account(self, request: web.Request) -> web.Response:
+        """GET /v2/account."""
+        return web.json_response(self.account)
+
+    async def get_clock(self, request: web.Request) -> web.Response:
+        """GET /v2/clock."""
+        return web.json_response(self.clock)
+
+    async def get_calendar(self, request: web.Request) -> web.Response:
+        """GET /v2/calendar, filtered by the start and end dates."""
+        start = request.query.get("start", "0000-00-00")
+        end = request.query.get("end", "9999-99-99")
+        days = [day for day in self.calendar if start <= day["date"] <= end]
+        return web.json_response(days)
+
+    async def list_orders(self, request: web.Request) -> web.Response:
+        """GET /v2/orders, limited to the requested number of orders."""
+        limit = int(request.query.get("limit", 50))
+        return web.json_response(list(self.orders.values())[-limit:])
+
+    async def submit_order(self, request: web.Request) -> web.Response:
+        """POST /v2/orders, announced on the stream as new and then filled."""
+        params = await request.json()
+        now = datetime.now(timezone.utc).isoformat()
+        order = dict(
+            self.submitted,
+            id=str(uuid.uuid4()),
+            client_order_id=params.get("client_order_id") or str(uuid.uuid4()),
+            symbol=params["symbol"],
+            qty=str(params["qty"]),
+            side=params["side"],
+            type=params["type"],
+            time_in_force=params["time_in_force"],
+            limit_price=params.get("limit_price"),
+            stop_price=params.get("stop_price"),
+            status="accepted",
+            created_at=now,
+            updated_at=now,
+            submitted_at=now,
+        )
+        self.orders[order["id"]] = order
+        asyncio.ensure_future(self._fill(order))
+        return web.json_response(order)
+
+    async def get_order(self, request: web.Request) -> web.Response:
+        """GET /v2/orders/{order_id}."""
+        order = self.orders.get(request.match_info["order_id"])
+        if order is None:
+            return self._not_found("order not found")
+        return web.json_response(order)
+
+    async def cancel_order(self, request: web.Request) -> web.Response:
+        """DELETE /v2/orders/{order_id}."""
+        if request.match_info["order_id"] not in self.orders:
+            return self._not_found("order not found")
+        return web.Response(status=204)
+
+    async def cancel_all_orders(self, request: web.Request) -> web.Response:
+        """DELETE /v2/orders."""
+        return web.json_response([], status=207)
+
+    async def list_positions(self, request: web.Request) -> web.Response:
+        """GET /v2/positions."""
+        return web.json_response(list(self.positions.values()))
+
+    async def get_position(self, request: web.Request) -> web.Response:
+        """GET /v2/positions/{symbol}."""
+        position = self.positions.get(request.match_info["symbol"])
+        if position is None:
+            return self._not_found("position does not exist")
+        return web.json_response(position)
+
+    async def close_position(self, request: web.Request) -> web.Response:
+        """DELETE /v2/positions/{symbol}, the positions are kept."""
+        symbol = request.match_info["symbol"]
+        if symbol not in self.positions:
+            return self._not_found("position does not exist")
+        return web.json_response(dict(self.closed, symbol=symbol))
+
+    async def close_all_positions(self, request: web.Request) -> web.Response:
+        """DELETE /v2/positions, the positions are kept."""
+        return web.json_response(self.closed_all, status=207)
+
+    async def stream(self, request: web.Request) -> web.WebSocketResponse:
+        """The trade updates websocket."""
+        ws = web.WebSocketResponse()
+        await ws.prepare(request)
+        try:
+            async for msg in ws:
+                if msg.type != WSMsgType.TEXT:
+                    break
+                action = msg.json().get("action")
+                if action == "authenticate":
+                    await ws.send_json(
+                        {"stream": "authorization", "data": {"status": "authorized"}}
+                    )
+                elif action == "listen":
+                    await ws.send_json(
+                        {"stream": "listening", "data": {"streams": ["trade_updates"]}}
+                    )
+                    self.streams.add(ws)
+        finally:
+            self.streams.discard(ws)
+        return ws
+
+    async def _fill(self, order: Dict[str, Any]) -> None:
+        """Announce a submitted order as new and then fill it."""
+        await self._publish("new", order)
+        await asyncio.sleep(self.fill_delay)
+        now = datetime.now(timezone.utc).isoformat()
+        order.update(
+            status="filled",
+            filled_qty=order["qty"],
+            filled_at=now,
+            updated_at=now,
+        )
+        await self._publish("fill", order)
+
+    async def _publish(self, event: str, order: Dict[str, Any]) -> None:
+        """Send a trade update to all listening streams."""
+        message = {"stream": "trade_updates", "data": {"event": event, "order": order}}
+        for ws in list(self.streams):
+            if not ws.closed:
+                await ws.send_json(message)
+
+    def _not_found(self, message: str) -> web.Response:
+        """Create the 404 response of an unknown order or position."""
+        return web.json_response({"code": 40410000, "message": message}, status=404)
+
+    def app(self) -> web.Application:
+        """Create the aiohttp application serving this broker."""
+        app = web.Application(middlewares=[self.middleware])
+        routes = [
+            ("GET", "/v2/account", self.get_account),
+            ("GET", "/v2/clock", self.get_clock),
+            ("GET", "/v2/calendar", self.get_calendar),
+            ("GET", "/v2/orders", self.list_orders),
+            ("POST", "/v2/orders", self.submit_order),
+            ("DELETE", "/v2/orders", self.cancel_all_orders),
+            ("GET", "/v2/orders/{order_id}", self.get_order),
+            ("DELETE", "/v2/orders/{order_id}", self.cancel_order),
+            ("GET", "/v2/positions", self.list_positions),
+            ("DELETE", "/v2/positions", self.close_all_positions),
+            ("GET", "/v2/positions/{symbol}", self.get_position),
+            ("DELETE", "/v2/positions/{symbol}", self.close_position),
+            ("GET", "/stream", self.stream),
+        ]
+        for method, path, handler in routes:
+            app.router.add_route(method, path, handler)
+        return app
+
+
+async def start(
+    broker: StandInBroker, host: str = "127.0.0.1", port: int = 8765
+) -> web.AppRunner:
+    """Serve the broker in the background of the running event loop.
+
+    Args:
+        broker (StandInBroker): The broker to serve.
+        host (str): The interface to listen on.
+        port (int): The port to listen on.
+
+    Returns:
+        web.AppRunner: The runner, call its cleanup to stop serving.
+    """
+    runner = web.AppRunner(broker.app())
+    await runner.setup()
+    await web.TCPSite(runner, host, port).start()
+    return runner
+
+
+def add_arguments(parser: argparse.ArgumentParser) -> None:
+    """Add the options of StandInBroker to a command line parser."""
+    parser.add_argument("--latency", type=float, default=0.02)
+    parser.add_argument("--jitter", type=float, default=0.0)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--throttle-rate", type=float, default=0.0)
+    parser.add_argument("--retry-after", type=int, default=1)
+    parser.add_argument("--seed", type=int)
+
+
+def from_arguments(args: argparse.Namespace) -> StandInBroker:
+    """Create the broker configured on the command line."""
+    return StandInBroker(
+        latency=args.latency,
+        jitter=args.jitter,
+        error_rate=args.error_rate,
+        throttle_rate=args.throttle_rate,
+        retry_after=args.retry_after,
+        seed=args.seed,
+    )
+
+
+def main(argv: List[str]) -> None:
+    """Serve the stand-in broker until interrupted."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    add_arguments(parser)
+    args = parser.parse_args(argv)
+    web.run_app(from_arguments(args).app(), host=args.host, port=args.port)
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
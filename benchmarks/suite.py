@@ -0,0 +1,197 @@
+"""Benchmark suite over the tests/data fixtures with machine-readable output.
+
+For every fixture and size the suite measures:
+    mapper:   the time per record of its mapper,
+    api:      the time per call of the AlpacaApi coroutine with a mocked REST
+              client, i.e. the wrapper overhead including executor and mapping,
+    memory:   the traced bytes per mapped object.
+
+The results are written as json. Given a baseline from an earlier run, results
+that got slower or bigger than the tolerance allows are reported and the suite
+exits with status 1, such that regressions between releases are caught.
+
+Usage (from the repository root):
+    python benchmarks/suite.py --sizes 1 100 10000 --output results.json
+    python benchmarks/suite.py --baseline results.json --tolerance 0.25
+"""
+import argparse
+import asyncio
+import gc
+import json
+import os
+import platform
+import sys
+import time
+import tracemalloc
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, List, Tuple
+from unittest.mock import Mock
+
+sys.path.insert(0, os.path.dirname(__file__))
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+from domainmodels.order import OrderSide  # noqa: E402
+from fixtures import FIXTURES, MAPPERS, scaled  # noqa: E402
+from tradingapi.alpaca.alpaca_api import AlpacaApi  # noqa: E402
+
+ENV = {"APCA_API_KEY_ID": "bench", "APCA_API_SECRET_KEY": "bench"}
+
+# Fixture -> (AlpacaApi method, its arguments, mocked REST method, returns a list)
+API_CALLS: Dict[str, Tuple[str, Tuple, str, bool]] = {
+    "get_account": ("get_account", (), "get_account", False),
+    "get_clock": ("get_clock", (), "get_clock", False),
+    "get_order": ("get_order", ("order-id",), "get_order", False),
+    "submit_order": (
+        "submit_order",
+        ("AAPL", 1, OrderSide.BUY),
+        "submit_order",
+        False,
+    ),
+    "close_position": ("close_position", ("AAPL",), "close_position", False),
+    "list_orders": ("list_orders", (), "list_orders", True),
+    "get_position": ("get_position", ("AAPL",), "get_position", False),
+    "list_positions": ("list_positions", (), "list_positions", True),
+    "get_trading_days": (
+        "get_trading_days",
+        (datetime(2022, 3, 1), datetime(2022, 3, 15)),
+        "get_calendar",
+        True,
+    ),
+    "close_all_positions": (
+        "close_all_positions",
+        (),
+        "close_all_positions",
+        True,
+    ),
+}
+
+# Group -> metric compared against the baseline, lower is better
+METRICS = {
+    "mapper": "us_per_record",
+    "api": "us_per_call",
+    "memory": "bytes_per_object",
+}
+
+
+def best_of(repeat: int, func: Callable[[], Any]) -> float:
+    """Get the shortest wall time in seconds of repeated calls of func."""
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        times.append(time.perf_counter() - start)
+    return min(times)
+
+
+def bench_mapper(name: str, size: int, repeat: int) -> Dict[str, Any]:
+    """Measure the mapper of a fixture."""
+    entities = scaled(name, size)
+    mapper = MAPPERS[name].instance()
+    seconds = best_of(repeat, lambda: mapper.map_list(entities))
+    return {"us_per_record": seconds / size * 1e6}
+
+
+def bench_memory(name: str, size: int) -> Dict[str, Any]:
+    """Measure the memory of the mapped objects of a fixture."""
+    entities = scaled(name, size)
+    mapper = MAPPERS[name].instance()
+    gc.collect()
+    tracemalloc.start()
+    mapped = mapper.map_list(entities)
+    traced, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del mapped
+    return {"bytes_per_object": traced / size}
+
+
+async def bench_api(name: str, size: int, repeat: int) -> Dict[str, Any]:
+    """Measure the AlpacaApi call of a fixture with a mocked REST client."""
+    method, args, rest_method, is_list = API_CALLS[name]
+    entities = scaled(name, size if is_list else 1)
+
+    api = AlpacaApi(ENV)
+    api.api = Mock()
+    getattr(api.api, rest_method).return_value = entities if is_list else entities[0]
+    call = getattr(api, method)
+
+    calls = max(10, 10_000 // size)
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for _ in range(calls):
+            await call(*args)
+        times.append((time.perf_counter() - start) / calls)
+    await api.close()
+    return {"us_per_call": min(times) * 1e6, "records": len(entities)}
+
+
+async def run(sizes: List[int], repeat: int) -> List[Dict[str, Any]]:
+    """Run all benchmarks."""
+    results = []
+    for name in FIXTURES:
+        for size in sizes:
+            key = {"fixture": name, "size": size}
+            results.append(
+                {"group": "mapper", **key, **bench_mapper(name, size, repeat)}
+            )
+            results.append({"group": "memory", **key, **bench_memory(name, size)})
+            if name in API_CALLS and (size == sizes[0] or API_CALLS[name][3]):
+                api = await bench_api(name, size, repeat)
+                results.append({"group": "api", **key, **api})
+    return results
+
+
+def regressions(
+    results: List[Dict[str, Any]], baseline: List[Dict[str, Any]], tolerance: float
+) -> List[str]:
+    """Get the results that are worse than the baseline by more than tolerance."""
+    previous = {(r["group"], r["fixture"], r["size"]): r for r in baseline}
+    found = []
+    for result in results:
+        old = previous.get((result["group"], result["fixture"], result["size"]))
+        metric = METRICS[result["group"]]
+        if old is not None and result[metric] > old[metric] * (1 + tolerance):
+            found.append(
+                f"{result['group']} {result['fixture']} size {result['size']}: "
+                f"{metric} {old[metric]:.2f} -> {result[metric]:.2f}"
+            )
+    return found
+
+
+def main(args: argparse.Namespace) -> int:
+    """Run the suite, write the results and compare them with the baseline."""
+    results = asyncio.run(run(args.sizes, args.repeat))
+    report = {
+        "created_at": datetime.now(timezone.utc).isoformat(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "sizes": args.sizes,
+        "repeat": args.repeat,
+        "results": results,
+    }
+
+    output = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(output)
+    else:
+        print(output)
+
+    if args.baseline:
+        with open(args.baseline, "r") as f:
+            baseline = json.loads(f.read())["results"]
+        found = regressions(results, baseline, args.tolerance)
+        for regression in found:
+            print(f"REGRESSION {regression}", file=sys.stderr)
+        return 1 if found else 0
+    return 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1, 100, 10_000])
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--output", help="The json file, defaults to stdout.")
+    parser.add_argument("--baseline", help="A json file of an earlier run.")
+    parser.add_argument("--tolerance", type=float, default=0.25)
+    sys.exit(main(parser.parse_args()))
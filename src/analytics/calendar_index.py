@@ -0,0 +1,133 @@
+"""Vectorized queries on the trading calendar."""
+
+from enum import IntEnum
+from typing import Any, List
+
+import numpy as np
+from domainmodels.trading_day import TradingDay
+
+
+class Session(IntEnum):
+    """The session a timestamp falls into."""
+
+    CLOSED = 0
+    PRE_MARKET = 1
+    OPEN = 2
+    AFTER_HOURS = 3
+
+
+class CalendarIndex:
+    """Index over trading days answering queries for whole timestamp arrays.
+
+    The open and close times of the trading days are kept in sorted datetime64
+    arrays, such that every query is a binary search with np.searchsorted for all
+    timestamps at once instead of a Python loop over the trading days.
+
+    Timestamps are expected in the same (naive, exchange local) time as the open
+    and close times of the trading days. Every array-like accepted by
+    np.asarray(..., dtype="datetime64[ns]") can be passed, e.g. a list of
+    datetimes, a datetime64 array or a naive pandas DatetimeIndex.
+
+    Attributes:
+        trading_days (List[TradingDay]): The trading days, sorted by date.
+        opens (np.ndarray): The open times as datetime64[ns].
+        closes (np.ndarray): The close times as datetime64[ns].
+        days (np.ndarray): The dates as datetime64[D].
+    """
+
+    def __init__(self, trading_days: List[TradingDay]) -> None:
+        """Class initialization function.
+
+        Args:
+            trading_days (List[TradingDay]): The trading days to index.
+        """
+        days = [day for day in trading_days if day.open and day.close]
+        opens = np.array([day.open for day in days], "datetime64[ns]")
+        closes = np.array([day.close for day in days], "datetime64[ns]")
+        order = np.argsort(opens, kind="stable")
+
+        self.trading_days = [days[i] for i in order]
+        self.opens = opens[order]
+        self.closes = closes[order]
+        self.days = self.opens.astype("datetime64[D]")
+
+    def day_index(self, timestamps: Any) -> np.ndarray:
+        """Get the index of the trading day of each timestamp.
+
+        Args:
+            timestamps (Any): The timestamps.
+
+        Returns:
+            np.ndarray: The index into trading_days, or -1 if the date of the
+                timestamp is not a trading day.
+        """
+        ts_days = np.asarray(timestamps, "datetime64[ns]").astype("datetime64[D]")
+        if len(self.days) == 0:
+            return np.full(ts_days.shape, -1)
+
+        index = np.searchsorted(self.days, ts_days)
+        clipped = np.minimum(index, len(self.days) - 1)
+        is_trading_day = (index < len(self.days)) & (self.days[clipped] == ts_days)
+        return np.where(is_trading_day, index, -1)
+
+    def is_open(self, timestamps: Any) -> np.ndarray:
+        """Check whether the market is open at each timestamp.
+
+        Args:
+            timestamps (Any): The timestamps.
+
+        Returns:
+            np.ndarray: Boolean array, True where the market is open.
+        """
+        ts = np.asarray(timestamps, "datetime64[ns]")
+        if len(self.opens) == 0:
+            return np.zeros(ts.shape, bool)
+
+        # The last open at or before each timestamp
+        index = np.searchsorted(self.opens, ts, side="right") - 1
+        clipped = np.maximum(index, 0)
+        return (index >= 0) & (ts < self.closes[clipped])
+
+    def session_of(self, timestamps: Any) -> np.ndarray:
+        """Get the session of each timestamp.
+
+        Args:
+            timestamps (Any): The timestamps.
+
+        Returns:
+            np.ndarray: Array of Session values (int8). Timestamps on trading days
+                before the open are PRE_MARKET, after the close AFTER_HOURS, and
+                timestamps on other days CLOSED.
+        """
+        ts = np.asarray(timestamps, "datetime64[ns]")
+        index = self.day_index(ts)
+        sessions = np.full(ts.shape, Session.CLOSED, np.int8)
+        if len(self.opens) == 0:
+            return sessions
+
+        is_trading_day = index >= 0
+        clipped = np.maximum(index, 0)
+        before_open = ts < self.opens[clipped]
+        after_close = ts >= self.closes[clipped]
+
+        sessions[is_trading_day] = Session.OPEN
+        sessions[is_trading_day & before_open] = Session.PRE_MARKET
+        sessions[is_trading_day & after_close] = Session.AFTER_HOURS
+        return sessions
+
+    def next_open(self, timestamps: Any) -> np.ndarray:
+        """Get the first open strictly after each timestamp.
+
+        Args:
+            timestamps (Any): The timestamps.
+
+        Returns:
+            np.ndarray: The next open times as datetime64[ns], NaT after the last
+                indexed trading day.
+        """
+        ts = np.asarray(timestamps, "datetime64[ns]")
+        index = np.searchsorted(self.opens, ts, side="right")
+        next_opens = np.full(ts.shape, np.datetime64("NaT"), "datetime64[ns]")
+        has_next = index < len(self.opens)
+        next_opens[has_next] = self.opens[index[has_next]]
+        return next_opens
@@ -0,0 +1,142 @@
+"""Vectorized analytics over a positions snapshot."""
+
+from typing import Any, List
+
+import numpy as np
+import pandas as pd
+
+
+class Portfolio:
+    """Exposure, weights, P&L and concentration of a positions snapshot.
+
+    All aggregates are computed with NumPy over the position columns when the
+    portfolio is created, so creating one per snapshot replaces the Python loops
+    over DomainPosition. Market values are signed by the side of the position,
+    short positions count negative towards the net exposure.
+
+    Attributes:
+        symbols (np.ndarray): The symbols of the positions.
+        market_value (np.ndarray): The signed market values.
+        weights (np.ndarray): The signed market values relative to the gross
+            exposure, 0 if there is no exposure.
+        unrealized_pl (np.ndarray): The unrealized P&L of the positions.
+        pl_contribution (np.ndarray): The unrealized P&L relative to the total
+            cost basis, summing up to unrealized_plpc.
+        gross_exposure (float): The sum of the absolute market values.
+        net_exposure (float): The sum of the signed market values.
+        long_market_value (float): The market value of the long positions.
+        short_market_value (float): The (negative) market value of the short
+            positions.
+        total_cost_basis (float): The sum of the absolute cost bases.
+        total_unrealized_pl (float): The unrealized P&L of the portfolio.
+        total_unrealized_intraday_pl (float): The intraday P&L of the portfolio.
+        unrealized_plpc (float): The unrealized P&L relative to the cost basis.
+        herfindahl (float): The sum of squared weights, 1 for a single position.
+    """
+
+    def __init__(
+        self,
+        symbols: Any,
+        side: Any,
+        market_value: Any,
+        cost_basis: Any,
+        unrealized_pl: Any,
+        unrealized_intraday_pl: Any,
+    ) -> None:
+        """Class initialization function.
+
+        Args:
+            symbols (Any): The symbols of the positions.
+            side (Any): The sides of the positions, "long" or "short".
+            market_value (Any): The market values, signed or not.
+            cost_basis (Any): The cost bases, signed or not.
+            unrealized_pl (Any): The unrealized P&L.
+            unrealized_intraday_pl (Any): The unrealized intraday P&L.
+        """
+        self.symbols = np.asarray(symbols, dtype=object)
+        is_short = np.asarray(side, dtype=object) == "short"
+        sign = np.where(is_short, -1.0, 1.0)
+
+        abs_market_value = np.abs(np.asarray(market_value, dtype=np.float64))
+        self.market_value = sign * abs_market_value
+        self.unrealized_pl = np.asarray(unrealized_pl, dtype=np.float64)
+        intraday_pl = np.asarray(unrealized_intraday_pl, dtype=np.float64)
+
+        self.gross_exposure = float(abs_market_value.sum())
+        self.net_exposure = float(self.market_value.sum())
+        self.short_market_value = float(self.market_value[is_short].sum())
+        self.long_market_value = self.net_exposure - self.short_market_value
+
+        gross = self.gross_exposure
+        self.weights = self.market_value / gross if gross else np.zeros_like(sign)
+        self.herfindahl = float(np.square(self.weights).sum())
+
+        self.total_cost_basis = float(
+            np.abs(np.asarray(cost_basis, dtype=np.float64)).sum()
+        )
+        self.total_unrealized_pl = float(self.unrealized_pl.sum())
+        self.total_unrealized_intraday_pl = float(intraday_pl.sum())
+        cost = self.total_cost_basis
+        self.pl_contribution = (
+            self.unrealized_pl / cost if cost else np.zeros_like(sign)
+        )
+        self.unrealized_plpc = self.total_unrealized_pl / cost if cost else 0.0
+
+    @classmethod
+    def from_frame(cls, positions: pd.DataFrame) -> "Portfolio":
+        """Create the portfolio of a list_positions_frame snapshot.
+
+        Args:
+            positions (pd.DataFrame): The positions, see BaseApi.list_positions_frame.
+
+        Returns:
+            Portfolio: The portfolio.
+        """
+        return cls(
+            positions["symbol"].to_numpy(dtype=object),
+            positions["side"].to_numpy(dtype=object),
+            positions["market_value"].to_numpy(),
+            positions["cost_basis"].to_numpy(),
+            positions["unrealized_pl"].to_numpy(),
+            positions["unrealized_intraday_pl"].to_numpy(),
+        )
+
+    def top(self, n: int) -> np.ndarray:
+        """Get the indexes of the n largest positions by absolute market value.
+
+        Args:
+            n (int): The number of positions.
+
+        Returns:
+            np.ndarray: The indexes, largest position first.
+        """
+        abs_weights = np.abs(self.weights)
+        n = min(n, len(abs_weights))
+        if n <= 0:
+            return np.empty(0, dtype=np.intp)
+
+        # Partition first, such that only n positions are sorted
+        largest = np.argpartition(-abs_weights, n - 1)[:n]
+        return largest[np.argsort(-abs_weights[largest], kind="stable")]
+
+    def top_symbols(self, n: int) -> List[str]:
+        """Get the symbols of the n largest positions by absolute market value.
+
+        Args:
+            n (int): The number of positions.
+
+        Returns:
+            List[str]: The symbols, largest position first.
+        """
+        return list(self.symbols[self.top(n)])
+
+    def concentration(self, n: int) -> float:
+        """Get the share of the gross exposure in the n largest positions.
+
+        Args:
+            n (int): The number of positions.
+
+        Returns:
+            float: The share, between 0 and 1.
+        """
+        return float(np.abs(self.weights[self.top(n)]).sum())
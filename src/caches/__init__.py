@@ -0,0 +1 @@
+"""Caches."""
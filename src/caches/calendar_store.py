@@ -0,0 +1,157 @@
+"""Persistent store of the trading calendar."""
+
+import json
+import os
+from bisect import bisect_left, bisect_right
+from datetime import date, datetime, timedelta
+from typing import List, Optional, Tuple
+
+from domainmodels.trading_day import TradingDay
+
+DateRange = Tuple[date, date]
+
+
+class CalendarStore:
+    """Trading days of the date ranges already fetched from the broker.
+
+    The store records which date ranges are known, such that only the missing
+    sub-ranges of a request have to be fetched. Ranges are merged as they are
+    added and the trading days are kept sorted by date, so a request is served
+    by two binary searches. Only dates up to today are recorded as known, since
+    the calendar of future dates can still change.
+
+    If a path is given the store is loaded from and saved to that json file.
+    """
+
+    def __init__(self, path: Optional[str] = None) -> None:
+        """Class initialization function.
+
+        Args:
+            path (str, optional): The json file to persist the store in. Defaults
+                to an in-memory store.
+        """
+        self.path = path
+        self._ranges: List[DateRange] = []
+        self._dates: List[date] = []
+        self._days: List[TradingDay] = []
+
+        if path is not None and os.path.exists(path):
+            self.load()
+
+    def missing_ranges(self, start: date, end: date) -> List[DateRange]:
+        """Get the sub-ranges of start to end (inclusive) that are not known.
+
+        Args:
+            start (date): The first date.
+            end (date): The last date.
+
+        Returns:
+            List[DateRange]: The missing ranges, sorted by date.
+        """
+        if start > end:
+            return []
+
+        missing = []
+        current = start
+        for known_start, known_end in self._ranges:
+            if known_end < current:
+                continue
+            if known_start > end:
+                break
+            if known_start > current:
+                missing.append((current, known_start - timedelta(days=1)))
+            current = known_end + timedelta(days=1)
+            if current > end:
+                return missing
+
+        missing.append((current, end))
+        return missing
+
+    def add(self, start: date, end: date, trading_days: List[TradingDay]) -> None:
+        """Add the trading days fetched for start to end (inclusive).
+
+        Args:
+            start (date): The first date that was fetched.
+            end (date): The last date that was fetched.
+            trading_days (List[TradingDay]): The fetched trading days.
+        """
+        for trading_day in trading_days:
+            day = trading_day.date
+            if day is None or day < start or day > end:
+                continue
+            i = bisect_left(self._dates, day)
+            if i < len(self._dates) and self._dates[i] == day:
+                self._days[i] = trading_day
+            else:
+                self._dates.insert(i, day)
+                self._days.insert(i, trading_day)
+
+        known_end = min(end, date.today())
+        if start <= known_end:
+            self._add_range(start, known_end)
+
+        if self.path is not None:
+            self.save()
+
+    def get(self, start: date, end: date) -> List[TradingDay]:
+        """Get the stored trading days from start to end (inclusive).
+
+        Args:
+            start (date): The first date.
+            end (date): The last date.
+
+        Returns:
+            List[TradingDay]: The trading days, sorted by date.
+        """
+        return self._days[
+            bisect_left(self._dates, start) : bisect_right(self._dates, end)
+        ]
+
+    def _add_range(self, start: date, end: date) -> None:
+        """Add a known range and merge it with overlapping or adjacent ranges."""
+        ranges = []
+        for known_start, known_end in self._ranges:
+            one_day = timedelta(days=1)
+            if known_start <= end + one_day and start <= known_end + one_day:
+                start, end = min(start, known_start), max(end, known_end)
+            else:
+                ranges.append((known_start, known_end))
+        ranges.append((start, end))
+        self._ranges = sorted(ranges)
+
+    def load(self) -> None:
+        """Load the store from its json file."""
+        assert self.path is not None
+        with open(self.path, "r") as f:
+            data = json.loads(f.read())
+
+        self._ranges = [
+            (date.fromisoformat(start), date.fromisoformat(end))
+            for start, end in data["ranges"]
+        ]
+        self._dates = []
+        self._days = []
+        for open_, close in data["days"]:
+            trading_day = TradingDay()
+            trading_day.open = datetime.fromisoformat(open_)
+            trading_day.close = datetime.fromisoformat(close)
+            self._dates.append(trading_day.open.date())
+            self._days.append(trading_day)
+
+    def save(self) -> None:
+        """Save the store to its json file, replacing it atomically."""
+        assert self.path is not None
+        data = {
+            "ranges": [
+                [start.isoformat(), end.isoformat()] for start, end in self._ranges
+            ],
+            "days": [
+                [day.open.isoformat(), day.close.isoformat()]
+                for day in self._days
+                if day.open is not None and day.close is not None
+            ],
+        }
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(data, f)
+        os.replace(tmp_path, self.path)
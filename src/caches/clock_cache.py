@@ -0,0 +1,85 @@
+"""Locally advanced market clock."""
+
+import time
+from datetime import datetime, timedelta
+from typing import Optional
+
+from domainmodels.clock import DomainClock
+
+
+class ClockCache:
+    """Answers clock requests locally between the boundaries of a fetched clock.
+
+    A fetched clock tells when the market opens and closes next, so until the
+    earlier of the two boundaries has passed is_open cannot change and only the
+    timestamp has to be advanced. The cached clock is dropped once a boundary has
+    passed or it is older than the ttl, whichever comes first.
+
+    Attributes:
+        ttl (float): The maximum age in seconds of the fetched clock.
+        hits (int): The number of clocks answered from the cache.
+        misses (int): The number of clocks that had to be fetched.
+    """
+
+    def __init__(self, ttl: float) -> None:
+        """Class initialization function.
+
+        Args:
+            ttl (float): The maximum age in seconds of the fetched clock.
+        """
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._clock: Optional[DomainClock] = None
+        self._fetched_at = 0.0
+
+    def get(self) -> Optional[DomainClock]:
+        """Get the current clock if it can be computed from the cached clock.
+
+        Returns:
+            Optional[DomainClock]: The current clock, or None if it has to be
+                fetched.
+        """
+        clock = self._clock
+        elapsed = time.monotonic() - self._fetched_at
+        if clock is None or elapsed > self.ttl:
+            self.misses += 1
+            return None
+
+        # Checked in update
+        assert clock.timestamp is not None
+        assert clock.next_open is not None
+        assert clock.next_close is not None
+
+        timestamp = clock.timestamp + timedelta(seconds=elapsed)
+        if timestamp >= min(clock.next_open, clock.next_close):
+            self.misses += 1
+            return None
+
+        current_clock = DomainClock()
+        current_clock.is_open = clock.next_close < clock.next_open
+        current_clock.next_close = clock.next_close
+        current_clock.next_open = clock.next_open
+        current_clock.timestamp = timestamp
+
+        self.hits += 1
+        return current_clock
+
+    def update(self, clock: DomainClock) -> None:
+        """Cache a freshly fetched clock.
+
+        Clocks without datetime fields can not be advanced and are not cached.
+
+        Args:
+            clock (DomainClock): The fetched clock.
+        """
+        fields = [clock.timestamp, clock.next_open, clock.next_close]
+        if all(isinstance(field, datetime) for field in fields):
+            self._clock = clock
+            self._fetched_at = time.monotonic()
+        else:
+            self._clock = None
+
+    def clear(self) -> None:
+        """Drop the cached clock."""
+        self._clock = None
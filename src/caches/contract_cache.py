@@ -0,0 +1,140 @@
+"""Persistent cache of qualified interactive brokers contracts."""
+
+import json
+import os
+import time
+from typing import Dict, Iterable, Optional, Tuple
+
+from ib_insync import Contract
+from ib_insync.util import dataclassNonDefaults
+
+ContractKey = Tuple[str, str, str]
+
+
+class ContractCache:
+    """Qualified contracts by symbol, exchange and currency and by conId.
+
+    Qualifying a contract costs a contract details round trip to the gateway,
+    while the conId and the other fields of a listed stock practically never
+    change. Contracts are looked up by conId, or by symbol, exchange and
+    currency for contracts that are not qualified yet.
+
+    If a path is given the cache is loaded from and saved to that json file,
+    such that it is warm from the start of the next session. A symbol may be
+    reassigned to another contract, e.g. after a merger, so contracts qualified
+    longer than max_age ago are only loaded by conId and are qualified again
+    when looked up by symbol.
+
+    Attributes:
+        hits (int): The number of contracts found in the cache.
+        misses (int): The number of contracts that had to be qualified.
+    """
+
+    def __init__(self, path: Optional[str] = None, max_age: float = 86400) -> None:
+        """Class initialization function.
+
+        Args:
+            path (str, optional): The json file to persist the cache in. Defaults
+                to an in-memory cache.
+            max_age (float): The seconds a persisted contract is looked up by
+                symbol, exchange and currency after it was qualified. Defaults
+                to a day.
+        """
+        self.path = path
+        self.max_age = max_age
+        self.hits = 0
+        self.misses = 0
+        self._by_key: Dict[ContractKey, Contract] = {}
+        self._by_con_id: Dict[int, Contract] = {}
+        self._qualified_at: Dict[int, float] = {}
+
+        if path is not None and os.path.exists(path):
+            self.load()
+
+    def get(self, contract: Contract) -> Optional[Contract]:
+        """Get the qualified version of a contract.
+
+        Args:
+            contract (Contract): A contract with a conId, or a symbol, exchange
+                and currency.
+
+        Returns:
+            Optional[Contract]: The qualified contract, or None if it is not cached.
+        """
+        if contract.conId:
+            qualified = self._by_con_id.get(contract.conId)
+        else:
+            qualified = self._by_key.get(_key(contract))
+
+        if qualified is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return qualified
+
+    def add(self, contracts: Iterable[Contract]) -> None:
+        """Add qualified contracts, contracts without conId are ignored.
+
+        Args:
+            contracts (Iterable[Contract]): The qualified contracts.
+        """
+        added = False
+        now = time.time()
+        for contract in contracts:
+            if contract.conId:
+                self._by_con_id[contract.conId] = contract
+                self._by_key[_key(contract)] = contract
+                self._qualified_at[contract.conId] = now
+                added = True
+
+        if added and self.path is not None:
+            self.save()
+
+    def load(self) -> None:
+        """Load the cache from its json file, dropping the expired symbol keys."""
+        assert self.path is not None
+        with open(self.path, "r") as f:
+            data = json.loads(f.read())
+
+        self._by_key = {}
+        self._by_con_id = {}
+        self._qualified_at = {}
+        now = time.time()
+        for entry in data["contracts"]:
+            # Files without qualification times only hold the contract fields
+            contract = Contract.create(**entry.get("contract", entry))
+            qualified_at = entry.get("qualified_at", 0.0)
+            self._by_con_id[contract.conId] = contract
+            self._qualified_at[contract.conId] = qualified_at
+            if now - qualified_at <= self.max_age:
+                self._by_key[_key(contract)] = contract
+
+    def save(self) -> None:
+        """Save the cache to its json file, replacing it atomically."""
+        assert self.path is not None
+        data = {
+            "contracts": [
+                {
+                    "contract": dataclassNonDefaults(contract),
+                    "qualified_at": self._qualified_at[con_id],
+                }
+                for con_id, contract in self._by_con_id.items()
+            ]
+        }
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(data, f)
+        os.replace(tmp_path, self.path)
+
+    def __len__(self) -> int:
+        """Get the number of cached contracts.
+
+        Returns:
+            int: The number of contracts.
+        """
+        return len(self._by_con_id)
+
+
+def _key(contract: Contract) -> ContractKey:
+    """Get the symbol, exchange and currency of a contract."""
+    return (contract.symbol, contract.exchange, contract.currency)
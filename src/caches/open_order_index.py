@@ -0,0 +1,102 @@
+"""Local index of the open orders of an interactive brokers account."""
+
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from ib_insync import OrderStatus, Trade
+
+
+class OpenOrderIndex:
+    """Open orders indexed by permId and orderId, fed by ib_insync order events.
+
+    The index is seeded with a snapshot of the open orders, e.g. of
+    reqAllOpenOrders, and then kept current with the openOrder and orderStatus
+    events: an order is added once the gateway assigned its permId and removed
+    once it is filled or cancelled. The orderId is only unique per client, so
+    it is indexed together with the clientId. The index only answers requests
+    while synced is set, i.e. from the seed until the connection is lost.
+
+    Orders placed by other clients are only updated if the connection uses the
+    master client id, otherwise they stay indexed until the next seed.
+
+    Attributes:
+        synced (bool): Whether the index reflects all open orders.
+    """
+
+    def __init__(self) -> None:
+        """Class initialization function."""
+        self.synced = False
+        self._by_perm_id: Dict[int, Trade] = {}
+        self._by_order_id: Dict[Tuple[int, int], int] = {}
+
+    def seed(self, trades: Iterable[Trade]) -> None:
+        """Replace the index with a snapshot of the open orders.
+
+        Args:
+            trades (Iterable[Trade]): The trades of the open orders.
+        """
+        self.clear()
+        for trade in trades:
+            self.update(trade)
+        self.synced = True
+
+    def update(self, trade: Trade) -> None:
+        """Insert, replace or remove the order of a trade.
+
+        Args:
+            trade (Trade): The trade of an open order event or status event.
+        """
+        order = trade.order
+        if not order.permId:  # Not acknowledged by the gateway yet
+            return
+
+        if trade.orderStatus.status in OrderStatus.DoneStates:
+            self._remove(order.permId)
+        else:
+            self._by_perm_id[order.permId] = trade
+            self._by_order_id[(order.clientId, order.orderId)] = order.permId
+
+    def _remove(self, perm_id: int) -> None:
+        """Remove an order from all indexes."""
+        trade = self._by_perm_id.pop(perm_id, None)
+        if trade is not None:
+            key = (trade.order.clientId, trade.order.orderId)
+            if self._by_order_id.get(key) == perm_id:
+                del self._by_order_id[key]
+
+    def get(self, perm_id: int) -> Optional[Trade]:
+        """Get the trade of an open order by its permId.
+
+        Args:
+            perm_id (int): The permId of the order.
+
+        Returns:
+            Optional[Trade]: The trade, or None if the order is not open.
+        """
+        return self._by_perm_id.get(perm_id)
+
+    def get_by_order_id(self, client_id: int, order_id: int) -> Optional[Trade]:
+        """Get the trade of an open order by the client and orderId that placed it.
+
+        Args:
+            client_id (int): The client id of the client that placed the order.
+            order_id (int): The orderId of the order.
+
+        Returns:
+            Optional[Trade]: The trade, or None if the order is not open.
+        """
+        perm_id = self._by_order_id.get((client_id, order_id))
+        return None if perm_id is None else self._by_perm_id.get(perm_id)
+
+    def list(self) -> List[Trade]:
+        """List a snapshot of the open orders, in the order they were placed.
+
+        Returns:
+            List[Trade]: The trades of the open orders.
+        """
+        return list(self._by_perm_id.values())
+
+    def clear(self) -> None:
+        """Remove all orders and mark the index as not synced."""
+        self.synced = False
+        self._by_perm_id.clear()
+        self._by_order_id.clear()
@@ -0,0 +1,200 @@
+"""Local store of orders kept current by trade updates."""
+
+from collections import OrderedDict
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, List, Optional, Set
+
+from alpaca_trade_api.entity import Order
+from domainmodels.order import DomainOrder
+from helpers.timestamps import to_datetime
+
+from mappers.mapper import raw_fields
+from mappers.order_mapper import OrderMapper
+
+OPEN_STATUSES = {
+    "new",
+    "partially_filled",
+    "accepted",
+    "pending_new",
+    "accepted_for_bidding",
+    "pending_cancel",
+    "pending_replace",
+    "stopped",
+    "suspended",
+    "calculated",
+    "held",
+    "done_for_day",
+}
+
+# Orders without a timestamp sort before all others
+NO_TIMESTAMP = datetime.min.replace(tzinfo=timezone.utc)
+
+
+class OrderStore:
+    """Orders indexed by id, symbol and status.
+
+    The store is fed with the raw orders of the REST api and the trade updates
+    stream. Of two versions of an order the one updated last is kept, so a
+    snapshot that was requested before a trade update arrived can not overwrite
+    it. The store only answers requests while synced is set, i.e. while the
+    stream is connected and the store has been seeded since it connected.
+
+    Filled, cancelled and other closed orders do not change anymore, only the
+    max_closed most recently updated of them are kept, such that a long running
+    stream does not grow the store without bound. Evicted orders are requested
+    from the REST api again.
+
+    Attributes:
+        synced (bool): Whether the store reflects all changes of the broker.
+        max_closed (int): The maximum number of closed orders kept.
+        listeners (List[Callable[[str, DomainOrder], None]]): Called with the
+            status and the order whenever an order changes.
+    """
+
+    def __init__(self, max_closed: int = 10000) -> None:
+        """Class initialization function.
+
+        Args:
+            max_closed (int): The maximum number of closed orders kept. Defaults
+                to 10000.
+        """
+        self.synced = False
+        self.max_closed = max_closed
+        self.listeners: List[Callable[[str, DomainOrder], None]] = []
+        self._mapper = OrderMapper.instance()
+        self._orders: Dict[str, DomainOrder] = {}
+        self._updated_at: Dict[str, datetime] = {}
+        self._submitted_at: Dict[str, datetime] = {}
+        self._status: Dict[str, str] = {}
+        self._by_symbol: Dict[str, Set[str]] = {}
+        self._by_status: Dict[str, Set[str]] = {}
+        # The ids of the closed orders, the least recently updated first
+        self._closed: "OrderedDict[str, None]" = OrderedDict()
+
+    def update(self, order: Order) -> Optional[DomainOrder]:
+        """Insert or replace an order unless the stored version is more recent.
+
+        Args:
+            order (Order): The raw order of the REST api or a trade update.
+
+        Returns:
+            Optional[DomainOrder]: The stored order, or None if the stored version
+                was more recent.
+        """
+        raw = raw_fields(order)
+        order_id = raw["id"]
+        updated_at = _timestamp(raw.get("updated_at"))
+        if updated_at < self._updated_at.get(order_id, NO_TIMESTAMP):
+            return None
+
+        self._remove(order_id)
+        domain_order = self._mapper.map(order)
+        status = raw.get("status") or ""
+        self._orders[order_id] = domain_order
+        self._updated_at[order_id] = updated_at
+        self._submitted_at[order_id] = _timestamp(raw.get("submitted_at"))
+        self._status[order_id] = status
+        self._by_symbol.setdefault(domain_order.symbol, set()).add(order_id)
+        self._by_status.setdefault(status, set()).add(order_id)
+        if status not in OPEN_STATUSES:
+            self._closed[order_id] = None
+            while len(self._closed) > self.max_closed:
+                self._evict(next(iter(self._closed)))
+
+        for listener in self.listeners:
+            listener(status, domain_order)
+
+        return domain_order
+
+    def _remove(self, order_id: str) -> None:
+        """Remove an order from all indexes."""
+        domain_order = self._orders.pop(order_id, None)
+        if domain_order is None:
+            return
+
+        status = self._status.pop(order_id)
+        self._by_symbol[domain_order.symbol].discard(order_id)
+        self._by_status[status].discard(order_id)
+        self._closed.pop(order_id, None)
+
+    def _evict(self, order_id: str) -> None:
+        """Remove an order and its timestamps, e.g. a closed order."""
+        symbol = self._orders[order_id].symbol
+        self._remove(order_id)
+        self._updated_at.pop(order_id, None)
+        self._submitted_at.pop(order_id, None)
+        if not self._by_symbol[symbol]:
+            del self._by_symbol[symbol]
+
+    def get(self, order_id: str) -> Optional[DomainOrder]:
+        """Get an order by id.
+
+        Args:
+            order_id (str): The id of the order.
+
+        Returns:
+            Optional[DomainOrder]: The order, or None if it is not stored.
+        """
+        return self._orders.get(order_id)
+
+    def get_status(self, order_id: str) -> Optional[str]:
+        """Get the broker status of an order, e.g. "new" or "filled".
+
+        Args:
+            order_id (str): The id of the order.
+
+        Returns:
+            Optional[str]: The status, or None if the order is not stored.
+        """
+        return self._status.get(order_id)
+
+    def list(
+        self, status: str = "open", symbol: Optional[str] = None
+    ) -> List[DomainOrder]:
+        """List the stored orders, the most recently submitted first.
+
+        Args:
+            status (str): "open", "closed", "all" or a broker status like "filled".
+            symbol (str, optional): Only list orders for this symbol.
+
+        Returns:
+            List[DomainOrder]: The orders.
+        """
+        if status == "all":
+            ids = set(self._orders)
+        elif status in ("open", "closed"):
+            open_ids = set().union(
+                *[self._by_status.get(s, set()) for s in OPEN_STATUSES]
+            )
+            ids = open_ids if status == "open" else set(self._orders) - open_ids
+        else:
+            ids = set(self._by_status.get(status, set()))
+
+        if symbol is not None:
+            ids &= self._by_symbol.get(symbol, set())
+
+        return [
+            self._orders[i]
+            for i in sorted(ids, key=self._submitted_at.__getitem__, reverse=True)
+        ]
+
+    def clear(self) -> None:
+        """Remove all orders and mark the store as not synced."""
+        self.synced = False
+        self._orders.clear()
+        self._updated_at.clear()
+        self._submitted_at.clear()
+        self._status.clear()
+        self._by_symbol.clear()
+        self._by_status.clear()
+        self._closed.clear()
+
+
+def _timestamp(value: Any) -> datetime:
+    """Convert a timestamp of an order to a comparable, timezone aware datetime."""
+    timestamp = to_datetime(value or None)
+    if timestamp is None:
+        return NO_TIMESTAMP
+    if timestamp.tzinfo is None:
+        return timestamp.replace(tzinfo=timezone.utc)
+    return timestamp
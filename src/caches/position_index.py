@@ -0,0 +1,142 @@
+"""Local index of the positions of an interactive brokers account."""
+
+from typing import Dict, Iterable, List, Optional, Union
+
+from ib_insync import PortfolioItem, Position
+
+IbPosition = Union[Position, PortfolioItem]
+
+
+class PositionIndex:
+    """Positions indexed by conId and symbol, fed by ib_insync position events.
+
+    The gateway pushes a position update whenever the quantity of a position
+    changes and a portfolio update whenever its market value changes. The index
+    keeps the latest of both per contract, so a position is looked up without
+    copying and scanning the lists of ib_insync. A position is reported as its
+    portfolio item while the quantities of both agree, since the portfolio item
+    additionally carries the market value and P&L.
+
+    Attributes:
+        account (str): The account of the positions, all accounts if empty.
+    """
+
+    def __init__(self, account: str = "") -> None:
+        """Class initialization function.
+
+        Args:
+            account (str): The account of the positions, all accounts if empty.
+        """
+        self.account = account
+        self._positions: Dict[int, Position] = {}
+        self._portfolio: Dict[int, PortfolioItem] = {}
+        self._by_symbol: Dict[str, int] = {}
+
+    def seed(
+        self, positions: Iterable[Position], portfolio: Iterable[PortfolioItem]
+    ) -> None:
+        """Replace the index with the positions and portfolio of ib_insync.
+
+        Args:
+            positions (Iterable[Position]): The positions, e.g. of ib.positions().
+            portfolio (Iterable[PortfolioItem]): The portfolio items, e.g. of
+                ib.portfolio().
+        """
+        self.clear()
+        for position in positions:
+            self.update_position(position)
+        for item in portfolio:
+            self.update_portfolio(item)
+
+    def update_position(self, position: Position) -> None:
+        """Insert, replace or remove the position of a contract.
+
+        Args:
+            position (Position): The position update, removed if it is flat.
+        """
+        if self.account and position.account != self.account:
+            return
+
+        con_id = position.contract.conId
+        if position.position:
+            self._positions[con_id] = position
+            self._by_symbol[position.contract.symbol] = con_id
+        else:
+            self._remove(con_id)
+
+    def update_portfolio(self, item: PortfolioItem) -> None:
+        """Insert, replace or remove the portfolio item of a contract.
+
+        Args:
+            item (PortfolioItem): The portfolio update, removed if it is flat.
+        """
+        if self.account and item.account != self.account:
+            return
+
+        if item.position:
+            self._portfolio[item.contract.conId] = item
+        else:
+            self._portfolio.pop(item.contract.conId, None)
+
+    def _remove(self, con_id: int) -> None:
+        """Remove the position of a contract from all indexes."""
+        position = self._positions.pop(con_id, None)
+        self._portfolio.pop(con_id, None)
+        if (
+            position is not None
+            and self._by_symbol.get(position.contract.symbol) == con_id
+        ):
+            del self._by_symbol[position.contract.symbol]
+
+    def get(self, con_id: int) -> Optional[IbPosition]:
+        """Get the position of a contract.
+
+        Args:
+            con_id (int): The conId of the contract.
+
+        Returns:
+            Optional[IbPosition]: The portfolio item if it is current, else the
+                position, or None if there is no position.
+        """
+        position = self._positions.get(con_id)
+        if position is None:
+            return None
+
+        item = self._portfolio.get(con_id)
+        if item is not None and item.position == position.position:
+            return item
+        return position
+
+    def get_by_symbol(self, symbol: str) -> Optional[IbPosition]:
+        """Get the position of a symbol.
+
+        Args:
+            symbol (str): The symbol, e.g. AAPL.
+
+        Returns:
+            Optional[IbPosition]: The position, or None if there is no position.
+        """
+        con_id = self._by_symbol.get(symbol)
+        return None if con_id is None else self.get(con_id)
+
+    def list(self) -> List[IbPosition]:
+        """List a snapshot of the positions, in the order they were opened.
+
+        Returns:
+            List[IbPosition]: The positions.
+        """
+        return [self.get(con_id) for con_id in self._positions]  # type: ignore
+
+    def clear(self) -> None:
+        """Remove all positions."""
+        self._positions.clear()
+        self._portfolio.clear()
+        self._by_symbol.clear()
+
+    def __len__(self) -> int:
+        """Get the number of positions.
+
+        Returns:
+            int: The number of positions.
+        """
+        return len(self._positions)
@@ -3,6 +3,8 @@ from datetime import datetime
 from enum import Enum
 from uuid import UUID
 
+from domainmodels.model import Model
+
 
 class Status(str, Enum):
     """The type of the order."""
@@ -23,9 +25,42 @@ class CryptoStatus(str, Enum):
     INACTIVE = "INACTIVE"
 
 
-class DomainAccount:
+class DomainAccount(Model):
     """An account."""
 
+    __slots__ = (
+        "id",
+        "account_number",
+        "account_blocked",
+        "accrued_fees",
+        "buying_power",
+        "cash",
+        "created_at",
+        "currency",
+        "daytrade_count",
+        "daytrading_buying_power",
+        "equity",
+        "initial_margin",
+        "last_equity",
+        "last_maintenance_margin",
+        "long_market_value",
+        "maintenance_margin",
+        "multiplier",
+        "non_marginable_buying_power",
+        "pattern_day_trader",
+        "pending_transfer_in",
+        "portfolio_value",
+        "regt_buying_power",
+        "short_market_value",
+        "shorting_enabled",
+        "sma",
+        "status",
+        "crypto_status",
+        "trade_suspended_by_user",
+        "trading_blocked",
+        "transfers_blocked",
+    )
+
     id: UUID
     account_number: str
     account_blocked: bool
@@ -0,0 +1,119 @@
+"""Base class of the domain models."""
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+# Marks a field that is not set
+_MISSING = object()
+
+
+class Model:
+    """A domain model storing its fields in slots instead of a __dict__.
+
+    A slotted instance takes a fraction of the memory of an instance with a
+    __dict__, which matters for large sets of orders, positions or trading days.
+    Subclasses declare their fields in __slots__ and set defaults in __init__,
+    since slots can not have class level defaults.
+
+    For compatibility __dict__ is emulated: reading it returns the fields that
+    are set, assigning a dict to it sets the given fields.
+    """
+
+    __slots__: Tuple[str, ...] = ()
+    _fields: Tuple[str, ...] = ()
+
+    def __init_subclass__(cls, **kwargs: Any) -> None:
+        """Collect the slots of the class and its bases."""
+        super().__init_subclass__(**kwargs)
+        cls._fields = tuple(
+            field
+            for klass in reversed(cls.__mro__)
+            for field in klass.__dict__.get("__slots__", ())
+            if not field.startswith("_")
+        )
+
+    @property  # type: ignore[misc]
+    def __dict__(self) -> Dict[str, Any]:  # type: ignore[override]
+        """Get the fields that are set.
+
+        Returns:
+            Dict[str, Any]: The fields by name.
+        """
+        fields = {}
+        for field in self._fields:
+            value = getattr(self, field, _MISSING)
+            if value is not _MISSING:
+                fields[field] = value
+        return fields
+
+    @__dict__.setter
+    def __dict__(self, fields: Dict[str, Any]) -> None:
+        """Set the given fields."""
+        for field, value in fields.items():
+            setattr(self, field, value)
+
+
+class LazyModel(Model):
+    """A model mapping its fields from the raw broker fields when accessed.
+
+    Subclasses derive from the eager model, declare the _raw and _values slots
+    and set a converter function for every field in _converters. Each field is
+    shadowed by a property converting the raw field when it is read, so fields
+    that are never read are never converted.
+
+    Fields converted to immutable values like strings and enums are converted
+    on every read, which is as cheap as keeping them. The fields in
+    _cached_fields, e.g. nested objects, and fields that are assigned are kept
+    in _values, which is only allocated once needed.
+    """
+
+    __slots__ = ()
+    _raw: Dict[str, Any]
+    _values: Optional[List[Any]]
+    _converters: Dict[str, Callable[[Dict[str, Any]], Any]] = {}
+    _cached_fields: Tuple[str, ...] = ()
+
+    def __init_subclass__(cls, **kwargs: Any) -> None:
+        """Install a property for every field of the model."""
+        super().__init_subclass__(**kwargs)
+        for index, field in enumerate(cls._fields):
+            cached = field in cls._cached_fields
+            setattr(cls, field, _lazy_field(index, cls._converters[field], cached))
+
+    def __init__(self, raw: Dict[str, Any]) -> None:
+        """Class initialization function.
+
+        Args:
+            raw (Dict[str, Any]): The json fields of the broker entity.
+        """
+        # The slots are declared by the subclass
+        self._raw = raw  # type: ignore[misc]
+        self._values = None  # type: ignore[misc]
+
+    def _set_value(self, index: int, value: Any) -> None:
+        """Keep the value of a field."""
+        values = self._values
+        if values is None:
+            values = self._values = [_MISSING] * len(self._fields)  # type: ignore
+        values[index] = value
+
+
+def _lazy_field(
+    index: int, convert: Callable[[Dict[str, Any]], Any], cached: bool
+) -> property:
+    """Create the property of a lazily converted field."""
+
+    def get(self: LazyModel) -> Any:
+        values = self._values
+        if values is not None:
+            value = values[index]
+            if value is not _MISSING:
+                return value
+
+        value = convert(self._raw)
+        if cached:
+            self._set_value(index, value)
+        return value
+
+    def set(self: LazyModel, value: Any) -> None:
+        self._set_value(index, value)
+
+    return property(get, set)
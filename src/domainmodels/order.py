@@ -2,6 +2,8 @@
 from enum import Enum
 from typing import Optional
 
+from domainmodels.model import Model
+
 
 class OrderSide(str, Enum):
     """The side of the order."""
@@ -40,38 +42,73 @@ class OrderClass(str, Enum):
     ONE_TRIGGERS_ORDER = "oto"
 
 
-class TakeProfit:
+class TakeProfit(Model):
     """The take profit."""
 
+    __slots__ = ("limit_price",)
+
     limit_price: float
 
 
-class StopLoss:
+class StopLoss(Model):
     """The stop loss."""
 
+    __slots__ = ("stop_price", "limit_price")
+
     stop_price: float
     limit_price: float
 
 
-class DomainOrder:
+class DomainOrder(Model):
     """The domain order."""
 
-    id: Optional[str] = None
+    __slots__ = (
+        "id",
+        "symbol",
+        "qty",
+        "side",
+        "type",
+        "time_in_force",
+        "limit_price",
+        "stop_price",
+        "extended_hours",
+        "order_class",
+        "take_profit",
+        "stop_loss",
+        "trail_price",
+        "trail_percent",
+        "notional",
+    )
+
+    id: Optional[str]
     symbol: str
     qty: int
-    side: OrderSide = OrderSide.BUY
-    type: Type = Type.MARKET
-    time_in_force: TimeInForce = TimeInForce.DAY
-    limit_price: Optional[float] = None
-    stop_price: Optional[float] = None
-    extended_hours: Optional[bool] = None
-    order_class: Optional[OrderClass] = None
-    take_profit: Optional[TakeProfit] = None
-    stop_loss: Optional[StopLoss] = None
-    trail_price: Optional[float] = None
-    trail_percent: Optional[float] = None
-    notional: Optional[float] = None
+    side: OrderSide
+    type: Type
+    time_in_force: TimeInForce
+    limit_price: Optional[float]
+    stop_price: Optional[float]
+    extended_hours: Optional[bool]
+    order_class: Optional[OrderClass]
+    take_profit: Optional[TakeProfit]
+    stop_loss: Optional[StopLoss]
+    trail_price: Optional[float]
+    trail_percent: Optional[float]
+    notional: Optional[float]
 
     def __init__(self, symbol: str) -> None:
         """Class initiator function."""
+        self.id = None
         self.symbol = symbol
+        self.side = OrderSide.BUY
+        self.type = Type.MARKET
+        self.time_in_force = TimeInForce.DAY
+        self.limit_price = None
+        self.stop_price = None
+        self.extended_hours = None
+        self.order_class = None
+        self.take_profit = None
+        self.stop_loss = None
+        self.trail_price = None
+        self.trail_percent = None
+        self.notional = None
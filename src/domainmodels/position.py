@@ -1,6 +1,8 @@
 """A position."""
 from enum import Enum
 
+from domainmodels.model import Model
+
 
 class Exchange(str, Enum):
     """The identifier of the exchange."""
@@ -23,8 +25,28 @@ class AssetClass(str, Enum):
     US_EQUITY = "us_equity"
 
 
-class DomainPosition:
-    """The domain order."""
+class DomainPosition(Model):
+    """The domain position."""
+
+    __slots__ = (
+        "asset_id",
+        "symbol",
+        "qty",
+        "asset_marginable",
+        "avg_entry_price",
+        "market_value",
+        "cost_basis",
+        "unrealized_pl",
+        "unrealized_plpc",
+        "unrealized_intraday_pl",
+        "unrealized_intraday_plpc",
+        "current_price",
+        "lastday_price",
+        "change_today",
+        "side",
+        "exchange",
+        "asset_class",
+    )
 
     asset_id: str
     symbol: str
@@ -40,6 +62,12 @@ class DomainPosition:
     current_price: float
     lastday_price: float
     change_today: float
-    side: PositionSide = PositionSide.LONG
-    exchange: Exchange = Exchange.NASDAQ
-    asset_class: AssetClass = AssetClass.US_EQUITY
+    side: PositionSide
+    exchange: Exchange
+    asset_class: AssetClass
+
+    def __init__(self) -> None:
+        """Class initiator function."""
+        self.side = PositionSide.LONG
+        self.exchange = Exchange.NASDAQ
+        self.asset_class = AssetClass.US_EQUITY
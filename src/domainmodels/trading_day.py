@@ -3,12 +3,21 @@
 from datetime import date, datetime
 from typing import Optional
 
+from domainmodels.model import Model
 
-class TradingDay:
+
+class TradingDay(Model):
     """Represents a trading day with open and close date times."""
 
-    close: Optional[datetime] = None
-    open: Optional[datetime] = None
+    __slots__ = ("close", "open")
+
+    close: Optional[datetime]
+    open: Optional[datetime]
+
+    def __init__(self) -> None:
+        """Class initiator function."""
+        self.close = None
+        self.open = None
 
     @property
     def date(self) -> Optional[date]:
@@ -1,15 +1,18 @@
 """Wraps synchronous I/O blocking calls."""
 
 import asyncio
+from concurrent.futures import Executor
 from functools import partial, wraps
-from typing import Any, Callable
+from typing import Any, Callable, Optional
 
 
-def async_wrap(func: Callable) -> Callable:
+def async_wrap(func: Callable, executor: Optional[Executor] = None) -> Callable:
     """Wrap a synchronous function such that it can be called async.
 
     Args:
         func (Callable): The function to wrap.
+        executor (Executor, optional): The executor to run the function in.
+            Defaults to the default executor of the event loop.
 
     Returns:
         Callable: The async wrapper function.
@@ -20,6 +23,6 @@ def async_wrap(func: Callable) -> Callable:
         """The wrapped function."""
         loop = asyncio.get_event_loop()
         pfunc = partial(func, *args, **kwargs)
-        return await loop.run_in_executor(None, pfunc)
+        return await loop.run_in_executor(executor, pfunc)
 
     return run
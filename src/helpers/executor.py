@@ -0,0 +1,114 @@
+"""Thread pool executor for blocking broker I/O that keeps usage statistics."""
+
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Callable, Optional
+
+
+class ExecutorStats:
+    """A snapshot of the usage of an ApiExecutor."""
+
+    max_workers: int
+    queue_depth: int
+    in_flight: int
+    completed: int
+    wait_time_total: float
+    wait_time_max: float
+    run_time_total: float
+
+    @property
+    def wait_time_mean(self) -> float:
+        """Get the mean time a call waited in the queue for a worker.
+
+        Returns:
+            float: The mean wait time in seconds.
+        """
+        started = self.in_flight + self.completed
+        return self.wait_time_total / started if started > 0 else 0.0
+
+
+class ApiExecutor(ThreadPoolExecutor):
+    """ThreadPoolExecutor that tracks queue depth, in-flight calls and wait times.
+
+    The wait time of a call is the time between its submission and the moment a
+    worker thread picks it up. Comparing it with the run time tells whether the
+    latency of a call comes from the broker or from an undersized pool.
+    """
+
+    def __init__(
+        self, max_workers: Optional[int] = None, thread_name_prefix: str = ""
+    ) -> None:
+        """Class initialization function.
+
+        Args:
+            max_workers (int, optional): The number of worker threads. Defaults to
+                the ThreadPoolExecutor default.
+            thread_name_prefix (str): The prefix of the worker thread names.
+        """
+        super().__init__(max_workers, thread_name_prefix)
+        self._stats_lock = threading.Lock()
+        self._queue_depth = 0
+        self._in_flight = 0
+        self._completed = 0
+        self._wait_time_total = 0.0
+        self._wait_time_max = 0.0
+        self._run_time_total = 0.0
+
+    def submit(self, fn: Callable, /, *args: Any, **kwargs: Any) -> Future:
+        """Schedule fn(*args, **kwargs) and record its wait and run time.
+
+        Args:
+            fn (Callable): The function to call.
+            *args: Positional arguments of fn.
+            **kwargs: Keyword arguments of fn.
+
+        Returns:
+            Future: The future of the call.
+        """
+        submitted_at = time.perf_counter()
+
+        def run() -> Any:
+            started_at = time.perf_counter()
+            wait_time = started_at - submitted_at
+            with self._stats_lock:
+                self._queue_depth -= 1
+                self._in_flight += 1
+                self._wait_time_total += wait_time
+                self._wait_time_max = max(self._wait_time_max, wait_time)
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                with self._stats_lock:
+                    self._in_flight -= 1
+                    self._completed += 1
+                    self._run_time_total += time.perf_counter() - started_at
+
+        with self._stats_lock:
+            self._queue_depth += 1
+        future = super().submit(run)
+        future.add_done_callback(self._on_done)
+        return future
+
+    def _on_done(self, future: Future) -> None:
+        """Remove calls from the queue that were cancelled before they started."""
+        if future.cancelled():
+            with self._stats_lock:
+                self._queue_depth -= 1
+
+    def stats(self) -> ExecutorStats:
+        """Get a consistent snapshot of the executor usage.
+
+        Returns:
+            ExecutorStats: The statistics.
+        """
+        stats = ExecutorStats()
+        with self._stats_lock:
+            stats.max_workers = self._max_workers
+            stats.queue_depth = self._queue_depth
+            stats.in_flight = self._in_flight
+            stats.completed = self._completed
+            stats.wait_time_total = self._wait_time_total
+            stats.wait_time_max = self._wait_time_max
+            stats.run_time_total = self._run_time_total
+        return stats
@@ -0,0 +1,129 @@
+"""Latency histogram with a bounded relative error."""
+
+import math
+from typing import Iterator, List, Tuple
+
+
+class LatencyHistogram:
+    """HDR-style histogram of latencies.
+
+    Latencies are counted in integer units (microseconds by default) in buckets
+    whose width grows with the value, like in HdrHistogram: values below
+    2 * sub_bucket_half are counted exactly, every further power of two is split
+    into sub_bucket_half buckets. The relative error of a reported value is thus
+    bounded by the significant digits, independent of its magnitude, while a
+    recording is a few integer operations and the memory grows with the log of
+    the largest value only.
+
+    Attributes:
+        count (int): The number of recorded latencies.
+        sum (float): The sum of the recorded latencies in seconds.
+        min (float): The smallest recorded latency in seconds, 0 if empty.
+        max (float): The largest recorded latency in seconds, 0 if empty.
+    """
+
+    def __init__(self, significant_digits: int = 2, unit: float = 1e-6) -> None:
+        """Class initialization function.
+
+        Args:
+            significant_digits (int): The number of significant decimal digits
+                of the reported latencies.
+            unit (float): The resolution in seconds.
+        """
+        self.significant_digits = significant_digits
+        self.unit = unit
+        self.count = 0
+        self.sum = 0.0
+        self.min = 0.0
+        self.max = 0.0
+        self._bits = math.ceil(math.log2(2 * 10**significant_digits))
+        self._half = 1 << (self._bits - 1)
+        self._counts: List[int] = []
+
+    def record(self, seconds: float) -> None:
+        """Record a latency.
+
+        Args:
+            seconds (float): The latency in seconds, negative values count as 0.
+        """
+        seconds = max(seconds, 0.0)
+        index = self._index(int(seconds / self.unit))
+        counts = self._counts
+        if index >= len(counts):
+            counts.extend([0] * (index + 1 - len(counts)))
+        counts[index] += 1
+
+        if self.count == 0 or seconds < self.min:
+            self.min = seconds
+        if seconds > self.max:
+            self.max = seconds
+        self.count += 1
+        self.sum += seconds
+
+    @property
+    def mean(self) -> float:
+        """Get the mean latency.
+
+        Returns:
+            float: The mean latency in seconds, 0 if empty.
+        """
+        return self.sum / self.count if self.count else 0.0
+
+    def percentile(self, percent: float) -> float:
+        """Get the latency below or at which percent of the latencies are.
+
+        Args:
+            percent (float): The percentile, between 0 and 100.
+
+        Returns:
+            float: The latency in seconds, 0 if empty.
+        """
+        if self.count == 0:
+            return 0.0
+        rank = max(math.ceil(percent / 100 * self.count), 1)
+        seen = 0
+        for upper, count in self.buckets():
+            seen += count
+            if seen >= rank:
+                return min(max(upper, self.min), self.max)
+        return self.max
+
+    def buckets(self) -> Iterator[Tuple[float, int]]:
+        """Iterate over the non-empty buckets.
+
+        Yields:
+            Tuple[float, int]: The highest latency in seconds counted by a bucket
+                and its count, in increasing order of latency.
+        """
+        for index, count in enumerate(self._counts):
+            if count:
+                yield self._highest(index) * self.unit, count
+
+    def copy(self) -> "LatencyHistogram":
+        """Get an independent copy of the histogram.
+
+        Returns:
+            LatencyHistogram: The copy.
+        """
+        histogram = LatencyHistogram(self.significant_digits, self.unit)
+        histogram.count = self.count
+        histogram.sum = self.sum
+        histogram.min = self.min
+        histogram.max = self.max
+        histogram._counts = list(self._counts)
+        return histogram
+
+    def _index(self, value: int) -> int:
+        """Get the bucket of a value in units."""
+        shift = value.bit_length() - self._bits
+        if shift <= 0:
+            return value
+        return shift * self._half + (value >> shift)
+
+    def _highest(self, index: int) -> int:
+        """Get the highest value in units counted by a bucket."""
+        if index < 2 * self._half:
+            return index
+        shift = index // self._half - 1
+        lowest = (index - shift * self._half) << shift
+        return lowest + (1 << shift) - 1
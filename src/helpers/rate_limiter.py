@@ -0,0 +1,80 @@
+"""Client-side rate limiting of broker requests."""
+
+import asyncio
+import time
+from typing import Dict, Optional
+
+
+class RateLimiter:
+    """Token bucket rate limiter for coroutines.
+
+    The bucket holds up to burst tokens and refills at rate tokens per second. A
+    request for an endpoint takes the weight of the endpoint (1 by default) from
+    the bucket. If the bucket runs dry the tokens are reserved anyway and the
+    caller sleeps until the refill has covered them, so waiting callers are served
+    in order of arrival and bursts are smoothed locally instead of being rejected
+    by the broker.
+
+    Attributes:
+        calls (int): The number of acquired requests.
+        throttled_calls (int): The number of requests that had to wait.
+        throttled_time (float): The total time in seconds requests waited.
+    """
+
+    def __init__(
+        self, rate: float, burst: float, weights: Optional[Dict[str, float]] = None
+    ) -> None:
+        """Class initialization function.
+
+        Args:
+            rate (float): The number of tokens added per second.
+            burst (float): The capacity of the bucket.
+            weights (Dict[str, float], optional): The number of tokens taken by a
+                request per endpoint. Endpoints not listed take one token.
+
+        Raises:
+            ValueError: If rate or burst is not positive.
+        """
+        if rate <= 0 or burst <= 0:
+            raise ValueError("rate and burst must be positive.")
+
+        self.rate = rate
+        self.burst = burst
+        self.weights = weights or {}
+        self.calls = 0
+        self.throttled_calls = 0
+        self.throttled_time = 0.0
+        self._tokens = float(burst)
+        self._updated_at = time.monotonic()
+
+    async def acquire(self, endpoint: str = "") -> float:
+        """Wait until the bucket allows a request for the endpoint.
+
+        Args:
+            endpoint (str): The endpoint that is about to be requested.
+
+        Returns:
+            float: The time in seconds the request was throttled.
+        """
+        weight = self.weights.get(endpoint, 1.0)
+
+        now = time.monotonic()
+        refill = (now - self._updated_at) * self.rate
+        self._tokens = min(self.burst, self._tokens + refill)
+        self._updated_at = now
+
+        self._tokens -= weight
+        self.calls += 1
+        if self._tokens >= 0:
+            return 0.0
+
+        delay = -self._tokens / self.rate
+        self.throttled_calls += 1
+        self.throttled_time += delay
+        try:
+            await asyncio.sleep(delay)
+        except asyncio.CancelledError:
+            self._tokens += weight  # Give back the reservation
+            raise
+
+        return delay
@@ -0,0 +1,173 @@
+"""Capture of raw broker responses for later replay."""
+
+import glob
+import json
+import os
+import queue
+import threading
+import time
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+# Marks the end of the queue for the writer thread
+_STOP = object()
+
+
+class Recorder:
+    """Writes raw broker responses to rotating json lines files in the background.
+
+    record only puts the response on a queue, so the caller never waits for the
+    disk. A writer thread takes everything queued since its last write, converts
+    it to json lines and appends them with a single write and flush. Once the file
+    exceeds max_bytes it is rotated like logging.handlers.RotatingFileHandler does:
+    path is renamed to path.1, path.1 to path.2 and so on, keeping backup_count
+    old files.
+
+    Every line holds the time, the method, its arguments and the raw json of the
+    response, see read_recording.
+
+    Attributes:
+        path (str): The file written to.
+        recorded (int): The number of responses written.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        max_bytes: int = 16 * 1024 * 1024,
+        backup_count: int = 5,
+        batch_size: int = 1024,
+    ) -> None:
+        """Class initialization function.
+
+        Args:
+            path (str): The file to write to, its directory is created if missing.
+            max_bytes (int): The size in bytes after which the file is rotated.
+            backup_count (int): The number of rotated files to keep.
+            batch_size (int): The maximum number of responses per write.
+        """
+        self.path = path
+        self.max_bytes = max_bytes
+        self.backup_count = backup_count
+        self.batch_size = batch_size
+        self.recorded = 0
+        self._queue: "queue.SimpleQueue[Any]" = queue.SimpleQueue()
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+
+    def record(self, method: str, args: Tuple, kwargs: Dict, response: Any) -> None:
+        """Queue a response for writing.
+
+        Args:
+            method (str): The broker method that was called.
+            args (Tuple): The positional arguments of the call.
+            kwargs (Dict): The keyword arguments of the call.
+            response (Any): The raw response, an sdk entity, a list of them or None.
+        """
+        if self._thread is None:
+            self._start()
+        self._queue.put((time.time(), method, args, kwargs, response))
+
+    def close(self) -> None:
+        """Write all queued responses and stop the writer thread."""
+        with self._lock:
+            thread, self._thread = self._thread, None
+        if thread is not None:
+            self._queue.put(_STOP)
+            thread.join()
+
+    def _start(self) -> None:
+        """Start the writer thread."""
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(
+                    target=self._write, name="Recorder", daemon=True
+                )
+                self._thread.start()
+
+    def _write(self) -> None:
+        """Write the queued responses in batches until stopped."""
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        file = open(self.path, "a")
+        try:
+            stopped = False
+            while not stopped:
+                # Wait for a response, then take all others already queued
+                batch = []
+                item = self._queue.get()
+                while item is not _STOP:
+                    batch.append(item)
+                    if len(batch) >= self.batch_size or self._queue.empty():
+                        break
+                    item = self._queue.get()
+                stopped = item is _STOP
+
+                file.write("".join(_to_line(*item) for item in batch))
+                file.flush()
+                self.recorded += len(batch)
+                if file.tell() >= self.max_bytes:
+                    file.close()
+                    self._rotate()
+                    file = open(self.path, "a")
+        finally:
+            file.close()
+
+    def _rotate(self) -> None:
+        """Shift the rotated files by one and rotate the current file."""
+        for i in range(self.backup_count - 1, 0, -1):
+            if os.path.exists(f"{self.path}.{i}"):
+                os.replace(f"{self.path}.{i}", f"{self.path}.{i + 1}")
+        if self.backup_count > 0:
+            os.replace(self.path, f"{self.path}.1")
+        else:
+            os.remove(self.path)
+
+
+def _to_line(
+    recorded_at: float, method: str, args: Tuple, kwargs: Dict, response: Any
+) -> str:
+    """Convert a recorded response to a json line."""
+    record = {
+        "time": recorded_at,
+        "method": method,
+        "args": args,
+        "kwargs": kwargs,
+        "response": _to_json(response),
+    }
+    return json.dumps(record, default=str) + "\n"
+
+
+def _to_json(response: Any) -> Any:
+    """Get the raw json of a response, unwrapping the sdk entities."""
+    if isinstance(response, list):
+        return [_to_json(o) for o in response]
+    if hasattr(response, "_raw"):
+        return response._raw
+    return response
+
+
+def read_recording(path: str) -> Iterator[Dict[str, Any]]:
+    """Read the responses of a Recorder, oldest first.
+
+    Args:
+        path (str): The path the recorder wrote to, rotated files are included.
+
+    Yields:
+        Dict[str, Any]: The recorded responses with the keys time, method, args,
+            kwargs and response.
+    """
+    rotated: List[Tuple[int, str]] = []
+    for file in glob.glob(glob.escape(path) + ".*"):
+        suffix = file[len(path) + 1 :]
+        if suffix.isdigit():
+            rotated.append((int(suffix), file))
+    files = [file for _, file in sorted(rotated, reverse=True)]
+    if os.path.exists(path):
+        files.append(path)
+
+    for file in files:
+        with open(file, "r") as f:
+            for line in f:
+                if line.strip():
+                    yield json.loads(line)
@@ -0,0 +1,80 @@
+"""Coalescing of identical concurrent calls."""
+
+import asyncio
+from functools import partial, wraps
+from typing import Any, Awaitable, Callable, Dict, Hashable
+
+
+class SingleFlight:
+    """Share one in-flight call between all concurrent callers with the same key.
+
+    The first caller of a key starts the call, every caller arriving while it is
+    still running awaits the same result instead of starting a new one. Once the
+    call completes the key is forgotten, so later callers start a fresh call.
+
+    Attributes:
+        calls (int): The number of calls made through do.
+        merged (int): The number of calls that joined an in-flight call.
+    """
+
+    def __init__(self) -> None:
+        """Class initialization function."""
+        self.calls = 0
+        self.merged = 0
+        self._in_flight: Dict[Hashable, asyncio.Future] = {}
+
+    async def do(self, key: Hashable, func: Callable[[], Awaitable[Any]]) -> Any:
+        """Await func, or the in-flight call with the same key if there is one.
+
+        Args:
+            key (Hashable): The key identifying identical calls.
+            func (Callable[[], Awaitable[Any]]): Starts the call.
+
+        Returns:
+            Any: The result of the call.
+        """
+        self.calls += 1
+        future = self._in_flight.get(key)
+        if future is None:
+            future = asyncio.ensure_future(func())
+            self._in_flight[key] = future
+            future.add_done_callback(partial(self._forget, key))
+        else:
+            self.merged += 1
+
+        # Shielded such that a cancelled caller does not cancel the others
+        return await asyncio.shield(future)
+
+    def _forget(self, key: Hashable, future: asyncio.Future) -> None:
+        """Remove a completed call and mark its exception as retrieved."""
+        if self._in_flight.get(key) is future:
+            del self._in_flight[key]
+        if not future.cancelled():
+            future.exception()
+
+
+def coalesce(func: Callable) -> Callable:
+    """Coalesce identical concurrent calls of an API coroutine method.
+
+    The instance must have a SingleFlight as attribute single_flight. Calls with
+    unhashable arguments are not coalesced.
+
+    Args:
+        func (Callable): The coroutine method to wrap.
+
+    Returns:
+        Callable: The coalescing wrapper method.
+    """
+
+    @wraps(func)
+    async def run(self: Any, *args: Any, **kwargs: Any) -> Any:
+        """The wrapped method."""
+        key = (func.__name__, args, frozenset(kwargs.items()))
+        try:
+            hash(key)
+        except TypeError:
+            return await func(self, *args, **kwargs)
+
+        return await self.single_flight.do(key, partial(func, self, *args, **kwargs))
+
+    return run
@@ -0,0 +1,155 @@
+"""Fast conversion of broker timestamps to datetime, date and time."""
+
+import re
+from datetime import date, datetime, time, timedelta, timezone
+from functools import lru_cache
+from typing import Any, Dict, Optional, Union, overload
+
+import pandas as pd
+from dateutil import parser
+
+# ISO-8601 / RFC3339 as sent by the brokers, e.g. 2022-03-16T18:41:54.63257Z
+ISO_DATETIME = re.compile(
+    r"(\d{4})-(\d{2})-(\d{2})[T ](\d{2}):(\d{2})(?::(\d{2})(?:\.(\d+))?)?"
+    r"\s*(Z|[+-]\d{2}:?\d{2})?$"
+)
+ISO_DATE = re.compile(r"(\d{4})-(\d{2})-(\d{2})$")
+ISO_TIME = re.compile(r"(\d{2}):?(\d{2})(?::(\d{2}))?$")
+
+_timezones: Dict[str, timezone] = {"Z": timezone.utc}
+
+
+@overload
+def to_datetime(value: None) -> None:
+    ...
+
+
+@overload
+def to_datetime(value: Union[str, datetime]) -> datetime:
+    ...
+
+
+def to_datetime(value: Any) -> Optional[datetime]:
+    """Convert a timestamp of the broker to a datetime.
+
+    ISO-8601 / RFC3339 strings are parsed with a fixed pattern and pandas
+    Timestamps are converted directly, other strings fall back to dateutil.
+    Fractions beyond microseconds are truncated. Parsed strings are cached, as
+    the same timestamps are converted again and again.
+
+    Args:
+        value (Any): A string, pandas Timestamp, datetime or None.
+
+    Returns:
+        Optional[datetime]: The datetime, or None if value is None.
+    """
+    if value is None:
+        return None
+    if isinstance(value, pd.Timestamp):
+        return value.to_pydatetime(warn=False)
+    if isinstance(value, datetime):
+        return value
+    return _parse_datetime(value)
+
+
+@overload
+def to_date(value: None) -> None:
+    ...
+
+
+@overload
+def to_date(value: Union[str, date]) -> date:
+    ...
+
+
+def to_date(value: Any) -> Optional[date]:
+    """Convert a date of the broker, e.g. 2022-03-01, to a date.
+
+    Args:
+        value (Any): A string, pandas Timestamp, date or None.
+
+    Returns:
+        Optional[date]: The date, or None if value is None.
+    """
+    if value is None:
+        return None
+    if isinstance(value, datetime):
+        return value.date()
+    if isinstance(value, date):
+        return value
+    return _parse_date(value)
+
+
+@overload
+def to_time(value: None) -> None:
+    ...
+
+
+@overload
+def to_time(value: Union[str, time]) -> time:
+    ...
+
+
+def to_time(value: Any) -> Optional[time]:
+    """Convert a time of day of the broker, e.g. 09:30 or 0930, to a time.
+
+    Args:
+        value (Any): A string, time or None.
+
+    Returns:
+        Optional[time]: The time, or None if value is None.
+    """
+    if value is None or isinstance(value, time):
+        return value
+    return _parse_time(value)
+
+
+@lru_cache(maxsize=8192)
+def _parse_datetime(value: str) -> datetime:
+    """Parse a datetime string, with a fast path for ISO-8601."""
+    match = ISO_DATETIME.match(value)
+    if match is None:
+        return parser.parse(value)
+
+    year, month, day, hour, minute, second, fraction, offset = match.groups()
+    microsecond = int(fraction[:6].ljust(6, "0")) if fraction else 0
+    return datetime(
+        int(year),
+        int(month),
+        int(day),
+        int(hour),
+        int(minute),
+        int(second or 0),
+        microsecond,
+        _timezone(offset) if offset else None,
+    )
+
+
+def _timezone(offset: str) -> timezone:
+    """Get the timezone of a UTC offset like Z, +02:00 or -0500."""
+    tz = _timezones.get(offset)
+    if tz is None:
+        digits = offset[1:].replace(":", "")
+        delta = timedelta(hours=int(digits[:2]), minutes=int(digits[2:]))
+        tz = _timezones[offset] = timezone(-delta if offset[0] == "-" else delta)
+    return tz
+
+
+@lru_cache(maxsize=8192)
+def _parse_date(value: str) -> date:
+    """Parse a date string, with a fast path for ISO-8601."""
+    match = ISO_DATE.match(value)
+    if match is None:
+        return parser.parse(value).date()
+    year, month, day = match.groups()
+    return date(int(year), int(month), int(day))
+
+
+@lru_cache(maxsize=1024)
+def _parse_time(value: str) -> time:
+    """Parse a time of day string, with a fast path for HH:MM[:SS] and HHMM."""
+    match = ISO_TIME.match(value)
+    if match is None:
+        return parser.parse(value).time()
+    hour, minute, second = match.groups()
+    return time(int(hour), int(minute), int(second or 0))
@@ -1,8 +1,9 @@
 """Mapper."""
 from alpaca_trade_api.entity import Clock
 from domainmodels.clock import DomainClock
+from helpers.timestamps import to_datetime
 
-from mappers.mapper import Mapper
+from mappers.mapper import Mapper, raw_fields
 
 
 class ClockMapper(Mapper[Clock, DomainClock]):
@@ -12,12 +13,14 @@ class ClockMapper(Mapper[Clock, DomainClock]):
 
     def map(self, clock: Clock) -> DomainClock:
         """Function to map from Clock to DomainClock."""
+        raw = raw_fields(clock)
+
         # Clock
         domain_clock = DomainClock()
 
-        domain_clock.is_open = clock.is_open
-        domain_clock.next_close = clock.next_close
-        domain_clock.next_open = clock.next_open
-        domain_clock.timestamp = clock.timestamp
+        domain_clock.is_open = raw["is_open"]
+        domain_clock.next_close = to_datetime(raw["next_close"])
+        domain_clock.next_open = to_datetime(raw["next_open"])
+        domain_clock.timestamp = to_datetime(raw["timestamp"])
 
         return domain_clock
@@ -0,0 +1,112 @@
+"""Mappers from a list of entities to a columnar pandas DataFrame."""
+from enum import Enum
+from typing import Any, Dict, List, Sequence
+
+import numpy as np
+import pandas as pd
+
+from mappers.mapper import Mapper, raw_fields
+
+# Column kinds
+STRING = "string"
+CATEGORY = "category"
+FLOAT = "float"
+BOOL = "bool"
+DATETIME = "datetime"
+
+
+class FrameMapper(Mapper[Sequence[Any], pd.DataFrame]):
+    """Maps a list of entities to a DataFrame with one typed column per field.
+
+    The columns are built from the json fields of the sdk entities, so no domain
+    objects are created in between. Domain objects can be mapped as well, their
+    enums are stored by value.
+
+    Attributes:
+        columns (Dict[str, str]): The kind of each column by field name.
+    """
+
+    columns: Dict[str, str] = {}
+
+    def map(self, entities: Sequence[Any]) -> pd.DataFrame:
+        """Map the entities to a DataFrame with a row per entity.
+
+        Args:
+            entities (Sequence[Any]): The sdk entities or domain objects.
+
+        Returns:
+            pd.DataFrame: The columns of the entities.
+        """
+        records = [raw_fields(entity) for entity in entities]
+        return pd.DataFrame(
+            {
+                field: _column([record.get(field) for record in records], kind)
+                for field, kind in self.columns.items()
+            }
+        )
+
+
+def _column(values: List[Any], kind: str) -> Any:
+    """Convert the values of a field to a column of the given kind."""
+    if kind in (CATEGORY, STRING) and values and isinstance(values[0], Enum):
+        values = [getattr(value, "value", value) for value in values]
+
+    if kind == FLOAT:
+        # Decimal strings and None are converted by numpy, None becomes NaN
+        return np.array(values, dtype=np.float64)
+    if kind == BOOL:
+        return np.array(values, dtype=bool)
+    if kind == DATETIME:
+        return pd.to_datetime(values, utc=True).astype("datetime64[ns, UTC]")
+    if kind == CATEGORY:
+        return pd.Categorical(values)
+    return np.array(values, dtype=object)
+
+
+class PositionFrameMapper(FrameMapper):
+    """Maps positions to a DataFrame."""
+
+    columns = {
+        "asset_id": STRING,
+        "symbol": CATEGORY,
+        "exchange": CATEGORY,
+        "asset_class": CATEGORY,
+        "side": CATEGORY,
+        "asset_marginable": BOOL,
+        "qty": FLOAT,
+        "avg_entry_price": FLOAT,
+        "market_value": FLOAT,
+        "cost_basis": FLOAT,
+        "unrealized_pl": FLOAT,
+        "unrealized_plpc": FLOAT,
+        "unrealized_intraday_pl": FLOAT,
+        "unrealized_intraday_plpc": FLOAT,
+        "current_price": FLOAT,
+        "lastday_price": FLOAT,
+        "change_today": FLOAT,
+    }
+
+
+class OrderFrameMapper(FrameMapper):
+    """Maps orders to a DataFrame."""
+
+    columns = {
+        "id": STRING,
+        "symbol": CATEGORY,
+        "side": CATEGORY,
+        "type": CATEGORY,
+        "time_in_force": CATEGORY,
+        "status": CATEGORY,
+        "qty": FLOAT,
+        "filled_qty": FLOAT,
+        "limit_price": FLOAT,
+        "stop_price": FLOAT,
+        "filled_avg_price": FLOAT,
+        "notional": FLOAT,
+        "trail_price": FLOAT,
+        "trail_percent": FLOAT,
+        "extended_hours": BOOL,
+        "submitted_at": DATETIME,
+        "updated_at": DATETIME,
+        "filled_at": DATETIME,
+    }
@@ -0,0 +1,54 @@
+"""Account mapper for interactive brokers."""
+from typing import Dict, Sequence
+
+from domainmodels.account import DomainAccount, Status
+from ib_insync import AccountValue
+
+from mappers.mapper import Mapper
+
+# Account summary tag -> DomainAccount field, the values are converted to float
+FLOAT_TAGS = {
+    "AccruedCash": "accrued_fees",
+    "BuyingPower": "buying_power",
+    "TotalCashValue": "cash",
+    "NetLiquidation": "equity",
+    "InitMarginReq": "initial_margin",
+    "PreviousDayEquityWithLoanValue": "last_equity",
+    "MaintMarginReq": "maintenance_margin",
+    "GrossPositionValue": "long_market_value",
+}
+
+
+class IbAccountMapper(Mapper[Sequence[AccountValue], DomainAccount]):
+    """Mapper to map from the account summary values to DomainAccount.
+
+    Interactive brokers reports the account as one value per tag. The fields
+    without an equivalent tag are None.
+    """
+
+    def map(self, values: Sequence[AccountValue]) -> DomainAccount:
+        """Function to map from the account summary values to DomainAccount."""
+        tags: Dict[str, AccountValue] = {}
+        for value in values:
+            if value.account != "ALL":
+                tags.setdefault(value.tag, value)
+
+        domain_account = DomainAccount()
+        for field in DomainAccount._fields:
+            setattr(domain_account, field, None)
+
+        net_liquidation = tags.get("NetLiquidation")
+        if net_liquidation is not None:
+            setattr(domain_account, "id", net_liquidation.account)
+            domain_account.account_number = net_liquidation.account
+            domain_account.currency = net_liquidation.currency
+
+        for tag, field in FLOAT_TAGS.items():
+            if tag in tags:
+                setattr(domain_account, field, float(tags[tag].value))
+        domain_account.portfolio_value = domain_account.equity
+        if "SMA" in tags:
+            domain_account.sma = int(float(tags["SMA"].value))
+        domain_account.status = Status.ACTIVE
+
+        return domain_account
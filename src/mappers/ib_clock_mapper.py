@@ -0,0 +1,39 @@
+"""Clock mapper for interactive brokers."""
+from datetime import datetime
+from typing import Tuple
+
+from domainmodels.clock import DomainClock
+from ib_insync import ContractDetails
+
+from mappers.ib_tradingday_mapper import IbTradingDayMapper, exchange_timezone
+from mappers.mapper import Mapper
+
+
+class IbClockMapper(Mapper[Tuple[datetime, ContractDetails], DomainClock]):
+    """Mapper to map from the server time and a contract's hours to DomainClock.
+
+    The market is open if the time is within a liquid session of the contract,
+    the next open and close are the next session boundaries after the time, in
+    the timezone of the exchange.
+    """
+
+    def map(self, time_and_details: Tuple[datetime, ContractDetails]) -> DomainClock:
+        """Function to map from the time and ContractDetails to DomainClock."""
+        now, details = time_and_details
+        timezone = exchange_timezone(details)
+        timestamp = now.astimezone(timezone)
+
+        domain_clock = DomainClock()
+        domain_clock.timestamp = timestamp
+        domain_clock.is_open = False
+        for trading_day in IbTradingDayMapper.instance().map(details):
+            opened_at = trading_day.open.replace(tzinfo=timezone)  # type: ignore
+            closed_at = trading_day.close.replace(tzinfo=timezone)  # type: ignore
+            if opened_at <= timestamp < closed_at:
+                domain_clock.is_open = True
+            if domain_clock.next_open is None and timestamp < opened_at:
+                domain_clock.next_open = opened_at
+            if domain_clock.next_close is None and timestamp < closed_at:
+                domain_clock.next_close = closed_at
+
+        return domain_clock
@@ -0,0 +1,162 @@
+"""Order mappers for interactive brokers."""
+from typing import Any, Optional, Tuple
+
+from domainmodels.order import DomainOrder, OrderClass, OrderSide, TimeInForce, Type
+from ib_insync import Order, Trade
+from ib_insync.util import UNSET_DOUBLE
+
+from mappers.mapper import Mapper
+
+# IB order type <-> Type
+TYPES = {
+    "MKT": Type.MARKET,
+    "LMT": Type.LIMIT,
+    "STP": Type.STOP,
+    "STP LMT": Type.STOP_LIMIT,
+    "TRAIL": Type.TRAILING_STOP,
+}
+ORDER_TYPES = {e: k for k, e in TYPES.items()}
+
+# IB order types executing at the close <-> Type with TimeInForce.MARKET_ON_CLOSE
+CLOSE_TYPES = {"MOC": Type.MARKET, "LOC": Type.LIMIT}
+CLOSE_ORDER_TYPES = {e: k for k, e in CLOSE_TYPES.items()}
+
+# IB time in force <-> TimeInForce, market on close is an IB order type
+TIMES_IN_FORCE = {
+    "DAY": TimeInForce.DAY,
+    "GTC": TimeInForce.GOOD_TILL_CANCELLED,
+    "OPG": TimeInForce.MARKET_ON_OPEN,
+    "IOC": TimeInForce.IMMIDIATE_OR_CANCEL,
+    "FOK": TimeInForce.FILL_OR_KILL,
+}
+TIFS = {e: k for k, e in TIMES_IN_FORCE.items()}
+
+# IB action <-> OrderSide
+SIDES = {"BUY": OrderSide.BUY, "SELL": OrderSide.SELL}
+ACTIONS = {e: k for k, e in SIDES.items()}
+SIDES["SSHORT"] = OrderSide.SELL
+
+
+class IbOrderMapper(Mapper[Trade, DomainOrder]):
+    """Mapper to map from Trade to DomainOrder.
+
+    The id of the order is its permId, which is unique across all clients and
+    sessions of an account. The gateway also reports orders placed manually in
+    TWS, whose order type may have no equivalent, e.g. MIT or REL.
+    """
+
+    def map(self, trade: Trade) -> DomainOrder:
+        """Function to map from Trade to DomainOrder.
+
+        Args:
+            trade (Trade): The trade of the order.
+
+        Returns:
+            DomainOrder: The order.
+
+        Raises:
+            ValueError: If the action or order type has no equivalent.
+        """
+        order = trade.order
+        if order.action not in SIDES:
+            raise ValueError(f"Unsupported action {order.action}")
+        if order.orderType not in TYPES and order.orderType not in CLOSE_TYPES:
+            raise ValueError(f"Unsupported order type {order.orderType}")
+
+        domain_order = DomainOrder(trade.contract.symbol)
+        domain_order.id = str(order.permId)
+        domain_order.qty = quantity(order.totalQuantity)
+        domain_order.side = SIDES[order.action]
+        if order.orderType in CLOSE_TYPES:
+            domain_order.type = CLOSE_TYPES[order.orderType]
+            domain_order.time_in_force = TimeInForce.MARKET_ON_CLOSE
+        else:
+            domain_order.type = TYPES[order.orderType]
+            domain_order.time_in_force = TIMES_IN_FORCE.get(order.tif, TimeInForce.DAY)
+        domain_order.extended_hours = order.outsideRth
+        domain_order.order_class = OrderClass.SIMPLE
+
+        domain_order.limit_price = _price(order.lmtPrice)
+        if domain_order.type == Type.TRAILING_STOP:
+            domain_order.trail_price = _price(order.auxPrice)
+            domain_order.trail_percent = _price(order.trailingPercent)
+        else:
+            domain_order.stop_price = _price(order.auxPrice)
+        domain_order.notional = _price(order.cashQty)
+
+        return domain_order
+
+
+class IbOrderRequestMapper(Mapper[DomainOrder, Order]):
+    """Mapper to map from DomainOrder to the Order to place."""
+
+    def map(self, domain_order: DomainOrder) -> Order:
+        """Function to map from DomainOrder to Order.
+
+        Args:
+            domain_order (DomainOrder): The order to place.
+
+        Returns:
+            Order: The IB order, without contract.
+
+        Raises:
+            ValueError: If the order is not a simple order, or its combination of
+                type and time in force has no IB equivalent.
+        """
+        if domain_order.take_profit is not None or domain_order.stop_loss is not None:
+            raise ValueError("Take profit and stop loss orders are not supported.")
+
+        order_type, tif = _order_type(domain_order.type, domain_order.time_in_force)
+        order = Order(
+            action=ACTIONS[domain_order.side],
+            totalQuantity=domain_order.qty,
+            orderType=order_type,
+            tif=tif,
+            outsideRth=bool(domain_order.extended_hours),
+        )
+        if domain_order.limit_price is not None:
+            order.lmtPrice = domain_order.limit_price
+        if domain_order.type == Type.TRAILING_STOP:
+            if domain_order.trail_price is not None:
+                order.auxPrice = domain_order.trail_price
+            if domain_order.trail_percent is not None:
+                order.trailingPercent = domain_order.trail_percent
+        elif domain_order.stop_price is not None:
+            order.auxPrice = domain_order.stop_price
+        if domain_order.notional is not None:
+            order.cashQty = domain_order.notional
+
+        return order
+
+
+def _order_type(type: Type, time_in_force: TimeInForce) -> Tuple[str, str]:
+    """Get the IB order type and time in force of a type and time in force.
+
+    Args:
+        type (Type): The type of the order.
+        time_in_force (TimeInForce): The time in force of the order.
+
+    Returns:
+        Tuple[str, str]: The IB order type and time in force.
+
+    Raises:
+        ValueError: If the combination has no IB equivalent.
+    """
+    if time_in_force == TimeInForce.MARKET_ON_CLOSE:
+        if type not in CLOSE_ORDER_TYPES:
+            raise ValueError(f"{type} orders can not execute at the close.")
+        return CLOSE_ORDER_TYPES[type], "DAY"
+
+    if type not in ORDER_TYPES or time_in_force not in TIFS:
+        raise ValueError(f"{type} orders with {time_in_force} are not supported.")
+    return ORDER_TYPES[type], TIFS[time_in_force]
+
+
+def quantity(value: float) -> Any:
+    """Get an IB quantity as int if it is whole, IB reports all of them as float."""
+    return int(value) if float(value).is_integer() else value
+
+
+def _price(value: float) -> Optional[float]:
+    """Get an IB price, None if it is unset."""
+    return None if value == UNSET_DOUBLE else value
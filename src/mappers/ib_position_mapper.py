@@ -0,0 +1,69 @@
+"""Position mapper for interactive brokers."""
+from typing import Union
+
+from domainmodels.position import DomainPosition, Exchange, PositionSide
+from ib_insync import PortfolioItem, Position
+
+from mappers.ib_order_mapper import quantity
+from mappers.mapper import Mapper
+from mappers.position_mapper import EXCHANGES
+
+# Fields IB does not report for a position
+MISSING_FIELDS = (
+    "asset_marginable",
+    "unrealized_intraday_pl",
+    "unrealized_intraday_plpc",
+    "lastday_price",
+    "change_today",
+)
+
+# Fields IB only reports for a portfolio item
+PORTFOLIO_FIELDS = ("current_price", "market_value", "unrealized_pl", "unrealized_plpc")
+
+
+class IbPositionMapper(Mapper[Union[Position, PortfolioItem], DomainPosition]):
+    """Mapper to map from Position or PortfolioItem to DomainPosition.
+
+    Positions only carry the quantity and the average cost, portfolio items
+    additionally the market price, market value and unrealized P&L. The fields
+    without an equivalent are None.
+    """
+
+    def map(self, position: Union[Position, PortfolioItem]) -> DomainPosition:
+        """Function to map from Position or PortfolioItem to DomainPosition."""
+        contract = position.contract
+        qty = position.position
+        if isinstance(position, PortfolioItem):
+            avg_cost = position.averageCost
+        else:
+            avg_cost = position.avgCost
+        multiplier = float(contract.multiplier or 1)
+
+        domain_position = DomainPosition()
+        domain_position.asset_id = str(contract.conId)
+        domain_position.symbol = contract.symbol
+        domain_position.qty = quantity(qty)
+        domain_position.side = PositionSide.LONG if qty >= 0 else PositionSide.SHORT
+        domain_position.exchange = EXCHANGES.get(
+            contract.primaryExchange or contract.exchange, Exchange.UNKNOWN
+        )
+        domain_position.avg_entry_price = avg_cost / multiplier
+        domain_position.cost_basis = avg_cost * qty
+        for field in MISSING_FIELDS:
+            setattr(domain_position, field, None)
+
+        if isinstance(position, PortfolioItem):
+            cost = abs(domain_position.cost_basis)
+            domain_position.current_price = position.marketPrice
+            domain_position.market_value = position.marketValue
+            domain_position.unrealized_pl = position.unrealizedPNL
+            setattr(
+                domain_position,
+                "unrealized_plpc",
+                position.unrealizedPNL / cost if cost else None,
+            )
+        else:
+            for field in PORTFOLIO_FIELDS:
+                setattr(domain_position, field, None)
+
+        return domain_position
@@ -0,0 +1,61 @@
+"""Trading day mapper for interactive brokers."""
+from datetime import datetime, tzinfo
+from typing import Dict, List
+
+from dateutil import tz
+from domainmodels.trading_day import TradingDay
+from ib_insync import ContractDetails
+
+from mappers.mapper import Mapper
+
+
+class IbTradingDayMapper(Mapper[ContractDetails, List[TradingDay]]):
+    """Mapper to map from the liquid hours of a contract to TradingDays.
+
+    Interactive brokers has no market calendar, but the contract details of a
+    stock list its regular trading sessions of the coming days, e.g.
+    20220316:0930-20220316:1600;20220317:0930-20220317:1600;20220319:CLOSED.
+    The sessions of a day are merged, the times are local to the exchange like
+    the ones of TradingDayMapper.
+    """
+
+    def map(self, details: ContractDetails) -> List[TradingDay]:
+        """Function to map from ContractDetails to TradingDays."""
+        sessions: Dict[str, TradingDay] = {}
+        for session in details.liquidHours.split(";"):
+            if not session or session.endswith("CLOSED"):
+                continue
+            start, end = session.split("-")
+            day = start[:8]
+            opened_at = datetime.strptime(start, "%Y%m%d:%H%M")
+            # Sessions were listed as 20220316:0930-1600 before TWS 970
+            closed_at = datetime.strptime(
+                end if ":" in end else f"{day}:{end}", "%Y%m%d:%H%M"
+            )
+
+            trading_day = sessions.get(day)
+            if trading_day is None:
+                trading_day = sessions[day] = TradingDay()
+                trading_day.open = opened_at
+                trading_day.close = closed_at
+            else:
+                trading_day.open = min(trading_day.open or opened_at, opened_at)
+                trading_day.close = max(trading_day.close or closed_at, closed_at)
+
+        return [sessions[day] for day in sorted(sessions)]
+
+
+def exchange_timezone(details: ContractDetails) -> tzinfo:
+    """Get the timezone of the exchange of a contract.
+
+    Args:
+        details (ContractDetails): The details of the contract.
+
+    Returns:
+        tzinfo: The timezone, New York if IB reports an unknown timezone.
+    """
+    return (
+        tz.gettz(details.timeZoneId or "America/New_York")
+        or tz.gettz("America/New_York")
+        or tz.UTC
+    )
@@ -0,0 +1,39 @@
+"""Mappers returning domain objects that map their fields on first access."""
+from alpaca_trade_api.entity import Order, Position
+from domainmodels.model import LazyModel
+from domainmodels.order import DomainOrder
+from domainmodels.position import DomainPosition
+
+from mappers import order_mapper, position_mapper
+from mappers.mapper import Mapper, raw_fields
+
+
+class LazyOrder(LazyModel, DomainOrder):
+    """A DomainOrder mapping its fields from the raw order on first access."""
+
+    __slots__ = ("_raw", "_values")
+    _converters = order_mapper.CONVERTERS
+    _cached_fields = ("take_profit", "stop_loss")
+
+
+class LazyPosition(LazyModel, DomainPosition):
+    """A DomainPosition mapping its fields from the raw position on first access."""
+
+    __slots__ = ("_raw", "_values")
+    _converters = position_mapper.CONVERTERS
+
+
+class LazyOrderMapper(Mapper[Order, DomainOrder]):
+    """Mapper to map from Order to a LazyOrder."""
+
+    def map(self, order: Order) -> DomainOrder:
+        """Function to map from Order to LazyOrder."""
+        return LazyOrder(raw_fields(order))
+
+
+class LazyPositionMapper(Mapper[Position, DomainPosition]):
+    """Mapper to map from Position to a LazyPosition."""
+
+    def map(self, position: Position) -> DomainPosition:
+        """Function to map from Position to LazyPosition."""
+        return LazyPosition(raw_fields(position))
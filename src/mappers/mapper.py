@@ -1,9 +1,12 @@
 """Mapper."""
 from abc import abstractmethod
-from typing import Generic, TypeVar
+from typing import Any, Dict, Generic, Iterable, List, Type, TypeVar
 
 Tin = TypeVar("Tin")
 Tout = TypeVar("Tout")
+TMapper = TypeVar("TMapper", bound="Mapper")
+
+_instances: Dict[type, Any] = {}
 
 
 class Mapper(Generic[Tin, Tout]):
@@ -17,7 +20,44 @@ class Mapper(Generic[Tin, Tout]):
         """Class initialization function."""
         pass
 
+    @classmethod
+    def instance(cls: Type[TMapper]) -> TMapper:
+        """Get the shared instance of the mapper.
+
+        Mappers are stateless, so one instance per class can be reused for every
+        response instead of creating a new one per call.
+
+        Returns:
+            TMapper: The shared instance.
+        """
+        mapper = _instances.get(cls)
+        if mapper is None:
+            mapper = _instances[cls] = cls()
+        return mapper
+
     @abstractmethod
     def map(self, obj_a: Tin) -> Tout:
         """Function to map from a to b."""
         pass
+
+    def map_list(self, objs: Iterable[Tin]) -> List[Tout]:
+        """Function to map a list from a to b."""
+        map_ = self.map
+        return [map_(obj) for obj in objs]
+
+
+def raw_fields(entity: Any) -> Dict[str, Any]:
+    """Get the json fields backing an alpaca_trade_api entity.
+
+    Reading the fields from the json dict skips the attribute lookup of the
+    entity, which falls through to Entity.__getattr__ for every field. Entities
+    whose fields were assigned to __dict__ directly are returned as they are.
+
+    Args:
+        entity (Any): The entity.
+
+    Returns:
+        Dict[str, Any]: The fields.
+    """
+    fields = entity.__dict__
+    return fields.get("_raw", fields)
@@ -1,4 +1,6 @@
 """A mapper maps all day."""
+from typing import Any, Callable, Dict, Optional
+
 from alpaca_trade_api.entity import Order
 from domainmodels.order import (
     DomainOrder,
@@ -9,45 +11,90 @@ from domainmodels.order import (
     Type,
 )
 
-from mappers.mapper import Mapper
+from mappers.mapper import Mapper, raw_fields
+
+# Enum lookups by value, computed once instead of calling the enum per order
+ORDER_SIDES = {e.value: e for e in OrderSide}
+TYPES = {e.value: e for e in Type}
+TIME_IN_FORCES = {e.value: e for e in TimeInForce}
 
 
 class OrderMapper(Mapper[Order, DomainOrder]):
     """Mapper to map from Order to DomainOrder."""
 
     def map(self, order: Order) -> DomainOrder:
-        """Function to map from Order to DomainOrder."""  # Order
-        domain_order = DomainOrder(order.symbol)
-
-        domain_order.id = order.id
-        domain_order.qty = order.qty
-        domain_order.side = OrderSide(order.side)
-        domain_order.type = Type(order.type)
-        domain_order.time_in_force = TimeInForce(order.time_in_force)
-        domain_order.limit_price = order.limit_price
-        domain_order.stop_price = order.stop_price
-        domain_order.extended_hours = order.extended_hours
-        domain_order.trail_price = order.trail_price
-        domain_order.trail_percent = order.trail_percent
-        domain_order.notional = order.notional
-
-        # Take Profit
-        try:
-            take_profit = TakeProfit()
-            take_profit.limit_price = (
-                order.take_profit and order.take_profit.limit_price
-            )
-            domain_order.take_profit = take_profit
-        except AttributeError:
-            domain_order.take_profit = None
-
-        # Stop Loss
-        try:
-            stop_loss = StopLoss()
-            stop_loss.limit_price = order.stop_loss and order.stop_loss.limit_price
-            stop_loss.stop_price = order.stop_loss and order.stop_loss.stop_price
-            domain_order.stop_loss = stop_loss
-        except AttributeError:
-            domain_order.stop_loss = None
+        """Function to map from Order to DomainOrder."""
+        raw = raw_fields(order)
+
+        # Order
+        domain_order = DomainOrder(raw["symbol"])
+
+        domain_order.id = raw["id"]
+        domain_order.qty = raw["qty"]
+        side = raw["side"]
+        domain_order.side = ORDER_SIDES.get(side) or OrderSide(side)
+        type = raw["type"]
+        domain_order.type = TYPES.get(type) or Type(type)
+        time_in_force = raw["time_in_force"]
+        domain_order.time_in_force = TIME_IN_FORCES.get(time_in_force) or TimeInForce(
+            time_in_force
+        )
+        domain_order.limit_price = raw["limit_price"]
+        domain_order.stop_price = raw["stop_price"]
+        domain_order.extended_hours = raw["extended_hours"]
+        domain_order.trail_price = raw["trail_price"]
+        domain_order.trail_percent = raw["trail_percent"]
+        domain_order.notional = raw["notional"]
+
+        domain_order.take_profit = map_take_profit(raw)
+        domain_order.stop_loss = map_stop_loss(raw)
 
         return domain_order
+
+
+def map_take_profit(raw: Dict[str, Any]) -> Optional[TakeProfit]:
+    """Map the take profit of a raw order."""
+    raw_take_profit = raw.get("take_profit")
+    if raw_take_profit is None:
+        return None
+
+    take_profit = TakeProfit()
+    take_profit.limit_price = raw_take_profit.get("limit_price")
+    return take_profit
+
+
+def map_stop_loss(raw: Dict[str, Any]) -> Optional[StopLoss]:
+    """Map the stop loss of a raw order."""
+    raw_stop_loss = raw.get("stop_loss")
+    if raw_stop_loss is None:
+        return None
+
+    stop_loss = StopLoss()
+    stop_loss.limit_price = raw_stop_loss.get("limit_price")
+    stop_loss.stop_price = raw_stop_loss.get("stop_price")
+    return stop_loss
+
+
+def _enum(lookup: Dict[str, Any], enum: Any, key: str) -> Callable[[Dict], Any]:
+    """Create a converter of a raw field to an enum."""
+    return lambda raw: lookup.get(raw[key]) or enum(raw[key])
+
+
+# Converter of each DomainOrder field, for mapping the fields one at a time
+CONVERTERS: Dict[str, Callable[[Dict], Any]] = {
+    "id": lambda raw: raw["id"],
+    "symbol": lambda raw: raw["symbol"],
+    "qty": lambda raw: raw["qty"],
+    "side": _enum(ORDER_SIDES, OrderSide, "side"),
+    "type": _enum(TYPES, Type, "type"),
+    "time_in_force": _enum(TIME_IN_FORCES, TimeInForce, "time_in_force"),
+    "limit_price": lambda raw: raw["limit_price"],
+    "stop_price": lambda raw: raw["stop_price"],
+    "extended_hours": lambda raw: raw["extended_hours"],
+    "order_class": lambda raw: None,  # not mapped by OrderMapper
+    "take_profit": map_take_profit,
+    "stop_loss": map_stop_loss,
+    "trail_price": lambda raw: raw["trail_price"],
+    "trail_percent": lambda raw: raw["trail_percent"],
+    "notional": lambda raw: raw["notional"],
+}
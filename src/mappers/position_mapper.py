@@ -1,50 +1,82 @@
 """A mapper maps all day."""
+from typing import Any, Callable, Dict
+
 from alpaca_trade_api.entity import Position
 from domainmodels.position import AssetClass, DomainPosition, Exchange, PositionSide
 
-from mappers.mapper import Mapper
+from mappers.mapper import Mapper, raw_fields
+
+# Enum lookups by value, computed once instead of calling the enum per position
+ASSET_CLASSES = {e.value: e for e in AssetClass}
+POSITION_SIDES = {e.value: e for e in PositionSide}
+EXCHANGES = {e.value: e for e in Exchange}
+
+# Fields copied as they are, None if the position does not have them
+OPTIONAL_FIELDS = (
+    "asset_marginable",
+    "avg_entry_price",
+    "market_value",
+    "cost_basis",
+    "unrealized_pl",
+    "unrealized_plpc",
+    "unrealized_intraday_pl",
+    "unrealized_intraday_plpc",
+    "current_price",
+    "lastday_price",
+    "change_today",
+)
 
 
 class PositionMapper(Mapper[Position, DomainPosition]):
     """Mapper to map from Position to DomainPosition."""
 
-    def sa(
-        self, domain_position: DomainPosition, position: Position, attr: str
-    ) -> DomainPosition:
-        """Auxilary function to set attribute in domain_position if it's in position."""
-        if hasattr(position, attr):
-            new_val = getattr(position, attr)
-            setattr(domain_position, attr, new_val)
-        else:
-            setattr(domain_position, attr, None)
-        return domain_position
-
     def map(self, position: Position) -> DomainPosition:
         """Function to map from Position to DomainPosition."""
+        raw = raw_fields(position)
+
         domain_position = DomainPosition()
-        domain_position.symbol = position.symbol
-        domain_position.qty = position.qty
-        domain_position.asset_id = position.asset_id
-        domain_position.asset_class = AssetClass(position.asset_class)
-        domain_position.side = PositionSide(position.side)
+        domain_position.symbol = raw["symbol"]
+        domain_position.qty = raw["qty"]
+        domain_position.asset_id = raw["asset_id"]
+        asset_class = raw["asset_class"]
+        domain_position.asset_class = ASSET_CLASSES.get(asset_class) or AssetClass(
+            asset_class
+        )
+        side = raw["side"]
+        domain_position.side = POSITION_SIDES.get(side) or PositionSide(side)
 
         # Special case
-        if hasattr(position, "exchange"):
-            domain_position.exchange = Exchange(position.exchange)
-        else:
-            domain_position.exchange = Exchange.UNKNOWN
+        domain_position.exchange = map_exchange(raw)
 
         # General cases
-        domain_position = self.sa(domain_position, position, "asset_marginable")
-        domain_position = self.sa(domain_position, position, "avg_entry_price")
-        domain_position = self.sa(domain_position, position, "market_value")
-        domain_position = self.sa(domain_position, position, "cost_basis")
-        domain_position = self.sa(domain_position, position, "unrealized_pl")
-        domain_position = self.sa(domain_position, position, "unrealized_plpc")
-        domain_position = self.sa(domain_position, position, "unrealized_intraday_pl")
-        domain_position = self.sa(domain_position, position, "unrealized_intraday_plpc")
-        domain_position = self.sa(domain_position, position, "current_price")
-        domain_position = self.sa(domain_position, position, "lastday_price")
-        domain_position = self.sa(domain_position, position, "change_today")
+        get = raw.get
+        for field in OPTIONAL_FIELDS:
+            setattr(domain_position, field, get(field))
 
         return domain_position
+
+
+def map_exchange(raw: Dict[str, Any]) -> Exchange:
+    """Map the exchange of a raw position, UNKNOWN if it has none."""
+    exchange = raw.get("exchange")
+    if exchange is None:
+        return Exchange.UNKNOWN
+    return EXCHANGES.get(exchange) or Exchange(exchange)
+
+
+def _optional(field: str) -> Callable[[Dict], Any]:
+    """Create a converter of a raw field that may be missing."""
+    return lambda raw: raw.get(field)
+
+
+# Converter of each DomainPosition field, for mapping the fields one at a time
+CONVERTERS: Dict[str, Callable[[Dict], Any]] = {
+    "symbol": lambda raw: raw["symbol"],
+    "qty": lambda raw: raw["qty"],
+    "asset_id": lambda raw: raw["asset_id"],
+    "asset_class": lambda raw: ASSET_CLASSES.get(raw["asset_class"])
+    or AssetClass(raw["asset_class"]),
+    "side": lambda raw: POSITION_SIDES.get(raw["side"]) or PositionSide(raw["side"]),
+    "exchange": map_exchange,
+    **{field: _optional(field) for field in OPTIONAL_FIELDS},
+}
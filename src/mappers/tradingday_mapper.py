@@ -3,8 +3,9 @@ from datetime import datetime
 
 from alpaca_trade_api.entity import Calendar
 from domainmodels.trading_day import TradingDay
+from helpers.timestamps import to_date, to_time
 
-from mappers.mapper import Mapper
+from mappers.mapper import Mapper, raw_fields
 
 
 class TradingDayMapper(Mapper[Calendar, TradingDay]):
@@ -12,13 +13,12 @@ class TradingDayMapper(Mapper[Calendar, TradingDay]):
 
     def map(self, calendar: Calendar) -> TradingDay:
         """Function to map from Calendar to TradingDay."""
-        # Calendar
+        raw = raw_fields(calendar)
+
+        # Calendar, the open and close times repeat and are parsed once
+        day = to_date(raw["date"])
         trading_day = TradingDay()
-        trading_day.open = datetime.combine(
-            calendar.date.to_pydatetime(), calendar.open
-        )
-        trading_day.close = datetime.combine(
-            calendar.date.to_pydatetime(), calendar.close
-        )
+        trading_day.open = datetime.combine(day, to_time(raw["open"]))
+        trading_day.close = datetime.combine(day, to_time(raw["close"]))
 
         return trading_day
@@ -1,8 +1,15 @@
 """Base class for trading APIs."""
-from datetime import datetime
-from typing import Any, Dict, List, Optional
+import asyncio
+import time
+from datetime import date, datetime, timedelta
+from enum import Enum
+from typing import Any, Dict, List, Optional, Tuple, Union
 
 import alpaca_trade_api as tradeapi
+import pandas as pd
+from alpaca_trade_api.entity import Order, Position
+from alpaca_trade_api.rest import APIError
+from caches.order_store import OrderStore
 from domainmodels.account import DomainAccount
 from domainmodels.clock import DomainClock
 from domainmodels.closed_position import ClosedPosition
@@ -18,13 +25,32 @@ from domainmodels.order import (
 from domainmodels.position import DomainPosition
 from domainmodels.trading_day import TradingDay
 from helpers.async_wrapper import async_wrap
+from helpers.single_flight import coalesce
+from helpers.timestamps import to_datetime
 from mappers.account_mapper import AccountMapper
 from mappers.clock_mapper import ClockMapper
 from mappers.closed_positions_mapper import ClosedPositionMapper
+from mappers.frame_mapper import OrderFrameMapper, PositionFrameMapper
+from mappers.lazy_mapper import LazyOrderMapper, LazyPositionMapper
+from mappers.mapper import Mapper
 from mappers.order_mapper import OrderMapper
 from mappers.position_mapper import PositionMapper
 from mappers.tradingday_mapper import TradingDayMapper
+from requests.exceptions import HTTPError
+from tradingapi.alpaca.async_rest import AsyncRest
+from tradingapi.alpaca.replay_rest import ReplayRest
+from tradingapi.alpaca.trade_update_stream import TradeUpdateStream
 from tradingapi.base.base_api import BaseApi
+from tradingapi.base.exceptions import TradingApiHttpError
+from tradingapi.base.instrumentation import instrument
+
+
+class Transport(str, Enum):
+    """The transport used to send requests to alpaca."""
+
+    EXECUTOR = "executor"
+    AIOHTTP = "aiohttp"
+    REPLAY = "replay"
 
 
 class AlpacaApi(BaseApi):
@@ -34,51 +60,223 @@ class AlpacaApi(BaseApi):
     For reference, please see: https://github.com/alpacahq/alpaca-trade-api-python
     """
 
-    def __init__(self, env_dict: Dict) -> None:
-        """Class initialization function."""
-        super().__init__(env_dict)  # type: ignore
+    def __init__(
+        self,
+        env_dict: Dict,
+        transport: Transport = Transport.EXECUTOR,
+        lazy: bool = False,
+        replay: Optional[str] = None,
+        **kwargs: Any,
+    ) -> None:
+        """Class initialization function.
+
+        Args:
+            env_dict (Dict): The environment variables for alpaca-trade-api.
+            transport (Transport): EXECUTOR runs the blocking sdk in a thread pool,
+                AIOHTTP sends the requests on the event loop with a shared
+                keep-alive connection pool, REPLAY answers the requests with the
+                responses recorded at replay. Defaults to EXECUTOR.
+            lazy (bool): Return orders and positions that map their fields from
+                the raw response on first access, see mappers.lazy_mapper.
+                Defaults to mapping all fields up front.
+            replay (str, optional): The path a Recorder wrote to, required by the
+                REPLAY transport.
+            **kwargs: Keyword arguments of BaseApi, among them the following:
+                max_workers (int): The number of executor threads.
+                rate_limiter (RateLimiter): The rate limiter for all requests, e.g.
+                    RateLimiter(rate=200 / 60, burst=200) for alpaca's default
+                    quota of 200 requests per minute.
+                clock_ttl (float): The maximum age in seconds of the clock
+                    get_clock advances locally.
+                calendar_store (CalendarStore): The store of known trading days.
+                recorder (Recorder): The recorder of the raw responses.
+
+        Raises:
+            ValueError: If the REPLAY transport is used without replay.
+        """
+        super().__init__(env_dict, **kwargs)  # type: ignore
         self.api = tradeapi.REST()
+        self.transport = Transport(transport)
+        self.async_api: Optional[Union[AsyncRest, ReplayRest]] = None
+        if self.transport == Transport.AIOHTTP:
+            self.async_api = AsyncRest()
+        elif self.transport == Transport.REPLAY:
+            if replay is None:
+                raise ValueError("The replay transport requires a replay path.")
+            self.async_api = ReplayRest(replay)
+        self.order_store: Optional[OrderStore] = None
+        self.order_mapper: Mapper[Order, DomainOrder] = (
+            LazyOrderMapper.instance() if lazy else OrderMapper.instance()
+        )
+        self.position_mapper: Mapper[Position, DomainPosition] = (
+            LazyPositionMapper.instance() if lazy else PositionMapper.instance()
+        )
+        self.order_stream: Optional[TradeUpdateStream] = None
+
+    async def _request(self, method: str, *args: Any, **kwargs: Any) -> Any:
+        """Call a method of the sdk through the configured transport.
+
+        Args:
+            method (str): The name of the alpaca_trade_api.REST method.
+            *args: Positional arguments of the method.
+            **kwargs: Keyword arguments of the method.
+
+        Returns:
+            Any: The sdk entity returned by the method.
+
+        Raises:
+            TradingApiHttpError: If the response has an error status code, with
+                either transport.
+        """
+        await self._throttle(method)
+
+        sent_at = time.perf_counter()
+        started_at = [sent_at]
+        try:
+            if self.async_api is not None:
+                response = await getattr(self.async_api, method)(*args, **kwargs)
+            else:
+                sdk_method = getattr(self.api, method)
+
+                def call() -> Any:
+                    started_at.append(time.perf_counter())
+                    return sdk_method(*args, **kwargs)
+
+                try:
+                    response = await async_wrap(call, self.executor)()
+                except (APIError, HTTPError) as ex:
+                    # Raise the errors of the sdk like the aiohttp transport
+                    if ex.response is None:
+                        raise
+                    raise TradingApiHttpError(
+                        ex.response.status_code,
+                        ex.response.reason or "",
+                        ex.response.text or str(ex),
+                    ) from ex
+        finally:
+            # Report the phases to the instrumented call, see BaseApi.instrumentation
+            record = self.instrumentation.current()
+            if record is not None:
+                record.executor_wait += started_at[-1] - sent_at
+                record.network += time.perf_counter() - started_at[-1]
+
+        if self.recorder is not None:
+            self.recorder.record(method, args, kwargs, response)
+        return response
+
+    async def start_order_stream(self, url: Optional[str] = None) -> None:
+        """Keep a local order store current from the trade updates stream.
+
+        While the stream is connected, get_order for known orders and list_orders
+        for open orders are answered from the store instead of the REST api.
 
+        Args:
+            url (str, optional): The websocket url. Defaults to the stream endpoint
+                of APCA_API_BASE_URL.
+        """
+        if self.order_stream is not None:
+            return
+
+        self.order_store = OrderStore()
+        self.order_stream = TradeUpdateStream(
+            self.order_store, self._list_raw_open_orders, url
+        )
+        self.order_stream.start()
+
+    async def _list_raw_open_orders(self) -> List[Any]:
+        """Get all open raw orders, page by page, to seed the order store."""
+        orders: Dict[str, Any] = {}
+        until: Optional[str] = None
+        while True:
+            order_list, cursor = await self._list_raw_orders_page(
+                "open", self.max_orders_page, None, until, "desc"
+            )
+            orders.update((order.id, order) for order in order_list)
+            if cursor is None:
+                return list(orders.values())
+            until = cursor
+
+    async def stop_order_stream(self) -> None:
+        """Stop the trade updates stream and answer orders from the REST api."""
+        if self.order_stream is not None:
+            await self.order_stream.stop()
+        self.order_stream = None
+        self.order_store = None
+
+    async def close(self) -> None:
+        """Release the connections held by the transport and the executor."""
+        await self.stop_order_stream()
+        if self.async_api is not None:
+            await self.async_api.close()
+        await super().close()
+
+    @coalesce
+    @instrument
     async def get_account(self) -> DomainAccount:
         """Get the account."""
         # Get Account
-        get_account_async = async_wrap(self.api.get_account)
-        account = await get_account_async()
+        account = await self._request("get_account")
 
         # Mapping
-        account_mapper = AccountMapper()
+        account_mapper = AccountMapper.instance()
         domain_account = account_mapper.map(account)
 
         return domain_account
 
+    @coalesce
+    @instrument
     async def get_clock(self) -> DomainClock:
         """Returns the clock."""
+        # Advance the cached clock if possible
+        if self.clock_cache is not None:
+            cached_clock = self.clock_cache.get()
+            if cached_clock is not None:
+                return cached_clock
+
         # Get clock
-        get_clock_async = async_wrap(self.api.get_clock)
-        clock = await get_clock_async()
+        clock = await self._request("get_clock")
 
         # Mapping
-        clock_mapper = ClockMapper()
+        clock_mapper = ClockMapper.instance()
         domain_clock = clock_mapper.map(clock)
 
+        if self.clock_cache is not None:
+            self.clock_cache.update(domain_clock)
+
         return domain_clock
 
+    @coalesce
+    @instrument
     async def get_trading_days(
         self, start: datetime, end: datetime
     ) -> List[TradingDay]:
         """Function to get calendars."""
-        get_calendar_async = async_wrap(self.api.get_calendar)
+        if self.calendar_store is None:
+            return await self._fetch_trading_days(start.date(), end.date())
+
+        # Only fetch the dates the store does not know yet
+        missing_ranges = self.calendar_store.missing_ranges(start.date(), end.date())
+        fetched = await asyncio.gather(
+            *[self._fetch_trading_days(*dates) for dates in missing_ranges]
+        )
+        for (missing_start, missing_end), trading_days in zip(missing_ranges, fetched):
+            self.calendar_store.add(missing_start, missing_end, trading_days)
+
+        return self.calendar_store.get(start.date(), end.date())
 
-        calendars = await get_calendar_async(
-            start.strftime("%Y-%m-%d"), end.strftime("%Y-%m-%d")
+    async def _fetch_trading_days(self, start: date, end: date) -> List[TradingDay]:
+        """Fetch the trading days from start to end (inclusive) from alpaca."""
+        calendars = await self._request(
+            "get_calendar", start.strftime("%Y-%m-%d"), end.strftime("%Y-%m-%d")
         )
 
         # Mapping
-        trading_day_mapper = TradingDayMapper()
-        domains_trading_days = [trading_day_mapper.map(c) for c in calendars]
+        trading_day_mapper = TradingDayMapper.instance()
+        domains_trading_days = trading_day_mapper.map_list(calendars)
 
         return domains_trading_days
 
+    @instrument
     async def submit_order(
         self,
         symbol: str,
@@ -119,11 +317,9 @@ class AlpacaApi(BaseApi):
         """
         # We do no mapping here, as the sdk directly takes all of the values
 
-        # Get Account
-        submit_order_async = async_wrap(self.api.submit_order)
-
         # Submit order
-        order = await submit_order_async(
+        order = await self._request(
+            "submit_order",
             symbol=symbol,
             qty=qty,
             side=side.value,
@@ -140,17 +336,14 @@ class AlpacaApi(BaseApi):
             instructions=None,  # not documented in alpaca?
         )
 
-        import json
-
-        with open("tests/data/submit_order/api_submit_order.json", "w") as file:
-            json.dump(order.__dict__, file)
-
         # Mapping
-        order_mapper = OrderMapper()
+        order_mapper = self.order_mapper
         domain_order = order_mapper.map(order)
 
         return domain_order
 
+    @coalesce
+    @instrument
     async def list_orders(self, **kwargs: Any) -> List[DomainOrder]:
         """List orders.
 
@@ -187,93 +380,198 @@ class AlpacaApi(BaseApi):
         else:
             direction = kwargs["direction"]
 
+        # Serve open orders from the synced order store, which holds all of them
+        store = self.order_store
+        no_window = after is None and until is None and direction is None
+        if store is not None and store.synced and status == "open" and no_window:
+            return store.list(status)[:limit]
+
         # Retrieve order list
-        list_orders_async = async_wrap(self.api.list_orders)
-        order_list = await list_orders_async(
-            status=status, limit=limit, after=after, until=until, direction=direction
+        order_list = await self._request(
+            "list_orders",
+            status=status,
+            limit=limit,
+            after=after,
+            until=until,
+            direction=direction,
         )
 
         # Map order list to domain order list
-        order_mapper = OrderMapper()
-        domain_order_list = [order_mapper.map(order) for order in order_list]
+        order_mapper = self.order_mapper
+        domain_order_list = order_mapper.map_list(order_list)
 
         return domain_order_list
 
+    @coalesce
+    @instrument
+    async def list_orders_frame(self, **kwargs: Any) -> pd.DataFrame:
+        """Get orders as columns, see BaseApi.list_orders_frame.
+
+        The orders are always requested from the broker, such that the status and
+        timestamp columns are filled, and mapped without creating domain orders.
+
+        Args:
+            **kwargs: The keyword arguments of list_orders.
+
+        Returns:
+            pd.DataFrame: The orders.
+        """
+        order_list = await self._request(
+            "list_orders",
+            status=kwargs.get("status", "open"),
+            limit=kwargs.get("limit", 50),
+            after=kwargs.get("after"),
+            until=kwargs.get("until"),
+            direction=kwargs.get("direction"),
+        )
+        return OrderFrameMapper.instance().map(order_list)
+
+    async def _list_orders_page(
+        self,
+        status: str,
+        limit: int,
+        after: Optional[str],
+        until: Optional[str],
+        direction: str,
+    ) -> Tuple[List[DomainOrder], Optional[str]]:
+        """Get a page of orders for iter_orders, see BaseApi._list_orders_page."""
+        order_list, cursor = await self._list_raw_orders_page(
+            status, limit, after, until, direction
+        )
+        order_mapper = self.order_mapper
+        return order_mapper.map_list(order_list), cursor
+
+    async def _list_raw_orders_page(
+        self,
+        status: str,
+        limit: int,
+        after: Optional[str],
+        until: Optional[str],
+        direction: str,
+    ) -> Tuple[List[Any], Optional[str]]:
+        """Get a page of raw orders, see BaseApi._list_orders_page.
+
+        Alpaca pages by submission time only, so of more than max_orders_page
+        orders submitted at the same time only the first page is returned and
+        the cursor moves past their timestamp.
+        """
+        order_list = await self._request(
+            "list_orders",
+            status=status,
+            limit=limit,
+            after=after,
+            until=until,
+            direction=direction,
+        )
+
+        # Continue from the last order, alpaca's after and until are exclusive so
+        # the cursor is moved by a microsecond to include its timestamp
+        cursor = None
+        if order_list and len(order_list) == limit:
+            last = to_datetime(order_list[-1].submitted_at)
+            if limit >= self.max_orders_page and (
+                to_datetime(order_list[0].submitted_at) == last
+            ):
+                # The page can not be widened, skip the rest of the timestamp
+                cursor = last.isoformat()
+            else:
+                step = timedelta(microseconds=-1 if direction == "asc" else 1)
+                cursor = (last + step).isoformat()
+        return order_list, cursor
+
+    @coalesce
+    @instrument
     async def get_order(self, order_id: str, **kwargs: Any) -> DomainOrder:
         """Get an order with specific order_id."""
+        # Serve the order from the synced order store
+        if self.order_store is not None and self.order_store.synced:
+            stored_order = self.order_store.get(order_id)
+            if stored_order is not None:
+                return stored_order
+
         # Retrieve order
-        get_order_async = async_wrap(self.api.get_order)
-        order = await get_order_async(order_id=order_id)
+        order = await self._request("get_order", order_id=order_id)
 
         # Map order to domain order
-        order_mapper = OrderMapper()
+        order_mapper = self.order_mapper
         domain_order = order_mapper.map(order)
 
         return domain_order
 
+    @instrument
     async def cancel_order(self, order_id: str, **kwargs: Any) -> None:
         """Cancel an order with specific order_id."""
-        cancel_order_async = async_wrap(self.api.cancel_order)
-        await cancel_order_async(order_id=order_id)
+        await self._request("cancel_order", order_id=order_id)
 
         return None
 
+    @instrument
     async def cancel_all_orders(self, **kwargs: Any) -> None:
         """Cancel all orders."""
-        cancel_all_orders_async = async_wrap(self.api.cancel_all_orders)
-        await cancel_all_orders_async()
+        await self._request("cancel_all_orders")
 
         return None
 
+    @coalesce
+    @instrument
     async def list_positions(self, **kwargs: Any) -> List[DomainPosition]:
         """Get a list of open positions."""
         # Retrieve positions
-        list_positions_async = async_wrap(self.api.list_positions)
-        position_list = await list_positions_async()
+        position_list = await self._request("list_positions")
 
         # Map position list to domain position list
-        position_mapper = PositionMapper()
-        domain_position_list = [
-            position_mapper.map(position) for position in position_list
-        ]
+        position_mapper = self.position_mapper
+        domain_position_list = position_mapper.map_list(position_list)
 
         return domain_position_list
 
+    @coalesce
+    @instrument
+    async def list_positions_frame(self, **kwargs: Any) -> pd.DataFrame:
+        """Get open positions as columns, see BaseApi.list_positions_frame.
+
+        Args:
+            **kwargs: The keyword arguments of list_positions.
+
+        Returns:
+            pd.DataFrame: The positions, mapped without creating domain positions.
+        """
+        position_list = await self._request("list_positions")
+        return PositionFrameMapper.instance().map(position_list)
+
+    @coalesce
+    @instrument
     async def get_position(self, symbol: str, **kwargs: Any) -> DomainPosition:
         """Get an open position for a symbol."""
         # Retrieve position
-        get_position_async = async_wrap(self.api.get_position)
-        position = await get_position_async(symbol=symbol)
+        position = await self._request("get_position", symbol=symbol)
 
         # Map positions to domain positions
-        position_mapper = PositionMapper()
+        position_mapper = self.position_mapper
         domain_position = position_mapper.map(position)
 
         return domain_position
 
+    @instrument
     async def close_position(self, symbol: str, **kwargs: Any) -> DomainOrder:
         """Liquidates the position for the given symbol at market price."""
         # Get closed position
-        close_position_async = async_wrap(self.api.close_position)
-        order = await close_position_async(symbol=symbol)
+        order = await self._request("close_position", symbol=symbol)
 
         # Map positions to domain positions
-        order_mapper = OrderMapper()
+        order_mapper = self.order_mapper
         domain_order = order_mapper.map(order)
 
         return domain_order
 
+    @instrument
     async def close_all_positions(self, **kwargs: Any) -> List[ClosedPosition]:
         """Liquidates all open positions at market price."""
         # Get list of closed positions
-        close_all_positions_async = async_wrap(self.api.close_all_positions)
-        closed_positions = await close_all_positions_async()
+        closed_positions = await self._request("close_all_positions")
 
         # Map position list to domain position list
-        closed_position_mapper = ClosedPositionMapper()
-        domain_closed_positions_list = [
-            closed_position_mapper.map(closed_position)
-            for closed_position in closed_positions
-        ]
+        closed_position_mapper = ClosedPositionMapper.instance()
+        domain_closed_positions_list = closed_position_mapper.map_list(closed_positions)
 
         return domain_closed_positions_list
@@ -0,0 +1,196 @@
+"""Non-blocking REST client for the alpaca trading API."""
+import asyncio
+import os
+from typing import Any, Dict, List, Optional
+
+import aiohttp
+from alpaca_trade_api.entity import Account, Calendar, Clock, Order, Position
+from tradingapi.base.exceptions import TradingApiHttpError
+
+
+class AsyncRest:
+    """Asyncio counterpart of the subset of alpaca_trade_api.REST used by AlpacaApi.
+
+    All requests share one aiohttp session with a keep-alive connection pool, so
+    concurrent calls are multiplexed on the event loop instead of occupying one
+    executor thread each. The responses are wrapped in the same entities as the
+    synchronous sdk returns, such that the existing mappers can be reused.
+    """
+
+    def __init__(self, max_connections: int = 100) -> None:
+        """Class initialization function.
+
+        Args:
+            max_connections (int): The size of the connection pool.
+        """
+        self.base_url = os.environ.get(
+            "APCA_API_BASE_URL", "https://api.alpaca.markets"
+        ).rstrip("/")
+        self.api_version = os.environ.get("APCA_API_VERSION", "v2")
+        self.headers = {
+            "APCA-API-KEY-ID": os.environ.get("APCA_API_KEY_ID", ""),
+            "APCA-API-SECRET-KEY": os.environ.get("APCA_API_SECRET_KEY", ""),
+        }
+        self.max_connections = max_connections
+        self.retry = max(int(os.environ.get("APCA_RETRY_MAX", 3)), 0)
+        self.retry_wait = int(os.environ.get("APCA_RETRY_WAIT", 3))
+        self.retry_codes = [
+            int(o) for o in os.environ.get("APCA_RETRY_CODES", "429,504").split(",")
+        ]
+        self._session: Optional[aiohttp.ClientSession] = None
+
+    def _get_session(self) -> aiohttp.ClientSession:
+        """Get the shared session, creating it on the running event loop."""
+        if self._session is None or self._session.closed:
+            connector = aiohttp.TCPConnector(limit=self.max_connections)
+            self._session = aiohttp.ClientSession(
+                connector=connector, headers=self.headers
+            )
+        return self._session
+
+    async def close(self) -> None:
+        """Close the session and release all pooled connections."""
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
+        self._session = None
+
+    async def _request(
+        self, method: str, path: str, data: Optional[Dict] = None
+    ) -> Any:
+        """Send a request and decode the json body.
+
+        Args:
+            method (str): The HTTP method.
+            path (str): The path of the endpoint, relative to the api version.
+            data (Dict, optional): Query parameters for GET, json body otherwise.
+
+        Returns:
+            Any: The decoded json body, or None if the body is empty.
+
+        Raises:
+            TradingApiHttpError: If the response has an error status code.
+        """
+        url = f"{self.base_url}/{self.api_version}{path}"
+        if data is not None:
+            data = {k: v for k, v in data.items() if v is not None}
+        if method == "GET":
+            opts: Dict[str, Any] = {"params": data}
+        else:
+            opts = {"json": data}
+
+        session = self._get_session()
+        retry = self.retry
+        while True:
+            async with session.request(
+                method, url, allow_redirects=False, **opts
+            ) as resp:
+                body = await resp.text()
+                if resp.status < 400:
+                    return await resp.json() if body != "" else None
+                if resp.status in self.retry_codes and retry > 0:
+                    retry -= 1
+                    await asyncio.sleep(self.retry_wait)
+                    continue
+                raise TradingApiHttpError(resp.status, resp.reason or "", body)
+
+    async def get_account(self) -> Account:
+        """Get the account."""
+        return Account(await self._request("GET", "/account"))
+
+    async def get_clock(self) -> Clock:
+        """Get the clock."""
+        return Clock(await self._request("GET", "/clock"))
+
+    async def get_calendar(
+        self, start: Optional[str] = None, end: Optional[str] = None
+    ) -> List[Calendar]:
+        """Get the calendar between start and end."""
+        resp = await self._request("GET", "/calendar", {"start": start, "end": end})
+        return [Calendar(o) for o in resp]
+
+    async def submit_order(
+        self,
+        symbol: str,
+        qty: int,
+        side: str,
+        type: str,
+        time_in_force: str,
+        limit_price: Optional[float] = None,
+        stop_price: Optional[float] = None,
+        client_order_id: Optional[str] = None,
+        extended_hours: Optional[bool] = None,
+        order_class: Optional[str] = None,
+        take_profit: Optional[Dict] = None,
+        stop_loss: Optional[Dict] = None,
+        trail_price: Optional[float] = None,
+        instructions: Optional[str] = None,
+        trail_percent: Optional[float] = None,
+    ) -> Order:
+        """Submit an order, see alpaca_trade_api.REST.submit_order."""
+        params = {
+            "symbol": symbol,
+            "qty": qty,
+            "side": side,
+            "type": type,
+            "time_in_force": time_in_force,
+            "limit_price": limit_price,
+            "stop_price": stop_price,
+            "client_order_id": client_order_id,
+            "extended_hours": extended_hours,
+            "order_class": order_class,
+            "take_profit": take_profit,
+            "stop_loss": stop_loss,
+            "trail_price": trail_price,
+            "trail_percent": trail_percent,
+            "instructions": instructions,
+        }
+        return Order(await self._request("POST", "/orders", params))
+
+    async def list_orders(
+        self,
+        status: Optional[str] = None,
+        limit: Optional[int] = None,
+        after: Optional[str] = None,
+        until: Optional[str] = None,
+        direction: Optional[str] = None,
+    ) -> List[Order]:
+        """Get a list of orders."""
+        params = {
+            "status": status,
+            "limit": limit,
+            "after": after,
+            "until": until,
+            "direction": direction,
+        }
+        resp = await self._request("GET", "/orders", params)
+        return [Order(o) for o in resp]
+
+    async def get_order(self, order_id: str) -> Order:
+        """Get an order."""
+        return Order(await self._request("GET", f"/orders/{order_id}"))
+
+    async def cancel_order(self, order_id: str) -> None:
+        """Cancel an order."""
+        await self._request("DELETE", f"/orders/{order_id}")
+
+    async def cancel_all_orders(self) -> None:
+        """Cancel all open orders."""
+        await self._request("DELETE", "/orders")
+
+    async def list_positions(self) -> List[Position]:
+        """Get a list of open positions."""
+        resp = await self._request("GET", "/positions")
+        return [Position(o) for o in resp]
+
+    async def get_position(self, symbol: str) -> Position:
+        """Get an open position."""
+        return Position(await self._request("GET", f"/positions/{symbol}"))
+
+    async def close_position(self, symbol: str) -> Order:
+        """Liquidate the position for the given symbol at market price."""
+        return Order(await self._request("DELETE", f"/positions/{symbol}"))
+
+    async def close_all_positions(self) -> List[Order]:
+        """Liquidate all open positions at market price."""
+        resp = await self._request("DELETE", "/positions")
+        return [Order(o) for o in resp]
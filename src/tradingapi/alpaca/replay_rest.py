@@ -0,0 +1,97 @@
+"""REST client for the alpaca trading API replaying recorded responses."""
+import json
+from collections import deque
+from typing import Any, Callable, Deque, Dict, Tuple
+
+from alpaca_trade_api.entity import Account, Calendar, Clock, Order, Position
+from helpers.recorder import read_recording
+from tradingapi.base.exceptions import TradingApiError
+
+# REST method -> entity of its response
+ENTITIES = {
+    "get_account": Account,
+    "get_clock": Clock,
+    "get_calendar": Calendar,
+    "submit_order": Order,
+    "list_orders": Order,
+    "get_order": Order,
+    "cancel_order": None,
+    "cancel_all_orders": None,
+    "list_positions": Position,
+    "get_position": Position,
+    "close_position": Order,
+    "close_all_positions": Order,
+}
+
+
+class ReplayRest:
+    """Answers the REST methods used by AlpacaApi from a Recorder's files.
+
+    A call is answered with the responses recorded for the same method and
+    arguments, in the order they were recorded and starting over once all were
+    replayed. Calls with arguments that were never recorded are answered with the
+    responses of the method for any arguments. The responses are wrapped in the
+    same entities as the sdk returns, such that tests and benchmarks exercise the
+    mappers without a broker.
+    """
+
+    def __init__(self, path: str) -> None:
+        """Class initialization function.
+
+        Args:
+            path (str): The path a Recorder wrote to.
+        """
+        self.path = path
+        self._responses: Dict[Tuple[str, str], Deque[Any]] = {}
+        self._by_method: Dict[str, Deque[Any]] = {}
+        for record in read_recording(path):
+            method = record["method"]
+            key = (method, _arguments(record["args"], record["kwargs"]))
+            self._responses.setdefault(key, deque()).append(record["response"])
+            self._by_method.setdefault(method, deque()).append(record["response"])
+
+    def __getattr__(self, method: str) -> Callable:
+        """Get a coroutine function replaying the responses of a REST method.
+
+        Args:
+            method (str): The name of the alpaca_trade_api.REST method.
+
+        Returns:
+            Callable: The coroutine function.
+
+        Raises:
+            AttributeError: If the method is not a REST method of AlpacaApi.
+        """
+        if method not in ENTITIES:
+            raise AttributeError(method)
+
+        async def replay(*args: Any, **kwargs: Any) -> Any:
+            return self._replay(method, args, kwargs)
+
+        return replay
+
+    def _replay(self, method: str, args: Tuple, kwargs: Dict) -> Any:
+        """Get the next recorded response of a call wrapped in its entity."""
+        responses = self._responses.get((method, _arguments(args, kwargs)))
+        if responses is None:
+            responses = self._by_method.get(method)
+        if responses is None:
+            raise TradingApiError(f"No response of {method} in {self.path}.")
+
+        response = responses[0]
+        responses.rotate(-1)
+
+        entity = ENTITIES[method]
+        if entity is None or response is None:
+            return None
+        if isinstance(response, list):
+            return [entity(o) for o in response]
+        return entity(response)
+
+    async def close(self) -> None:
+        """Nothing to release, for symmetry with AsyncRest."""
+
+
+def _arguments(args: Any, kwargs: Dict) -> str:
+    """Get a canonical string of the arguments of a call."""
+    return json.dumps([list(args), kwargs], sort_keys=True, default=str)
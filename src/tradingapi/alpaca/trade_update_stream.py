@@ -0,0 +1,114 @@
+"""Client for the trade updates stream of the alpaca trading API."""
+
+import asyncio
+import json
+import logging
+import os
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+import aiohttp
+from alpaca_trade_api.entity import Order
+from caches.order_store import OrderStore
+
+logger = logging.getLogger(__name__)
+
+
+class TradeUpdateStream:
+    """Feeds an OrderStore from the trade updates websocket.
+
+    After every (re)connect the stream authenticates, subscribes to the
+    trade_updates channel and then seeds the store with a fresh order snapshot.
+    The store is marked as synced once the snapshot is applied and unsynced as
+    soon as the connection is lost, such that no update can be missed while the
+    store answers requests.
+    """
+
+    def __init__(
+        self,
+        store: OrderStore,
+        seed: Callable[[], Awaitable[List[Order]]],
+        url: Optional[str] = None,
+        reconnect_wait: float = 1.0,
+    ) -> None:
+        """Class initialization function.
+
+        Args:
+            store (OrderStore): The store to feed.
+            seed (Callable[[], Awaitable[List[Order]]]): Returns the raw orders to
+                seed the store with after connecting.
+            url (str, optional): The websocket url. Defaults to the stream
+                endpoint of APCA_API_BASE_URL.
+            reconnect_wait (float): The seconds to wait before reconnecting.
+        """
+        base_url = os.environ.get("APCA_API_BASE_URL", "https://api.alpaca.markets")
+        self.url = url or base_url.rstrip("/").replace("http", "ws", 1) + "/stream"
+        self.store = store
+        self.seed = seed
+        self.reconnect_wait = reconnect_wait
+        self._task: Optional[asyncio.Task] = None
+
+    def start(self) -> None:
+        """Start streaming in a background task on the running event loop."""
+        if self._task is None or self._task.done():
+            self._task = asyncio.ensure_future(self._run())
+
+    async def stop(self) -> None:
+        """Stop streaming and mark the store as not synced."""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        self.store.synced = False
+
+    async def _run(self) -> None:
+        """Keep the stream connected until stopped."""
+        async with aiohttp.ClientSession() as session:
+            while True:
+                try:
+                    await self._stream(session)
+                except asyncio.CancelledError:
+                    raise
+                except Exception as ex:
+                    logger.warning(f"Trade updates stream failed: {ex}")
+                finally:
+                    self.store.synced = False
+                await asyncio.sleep(self.reconnect_wait)
+
+    async def _stream(self, session: aiohttp.ClientSession) -> None:
+        """Connect, subscribe, seed the store and apply the trade updates."""
+        async with session.ws_connect(self.url) as ws:
+            await ws.send_json(
+                {
+                    "action": "authenticate",
+                    "data": {
+                        "key_id": os.environ.get("APCA_API_KEY_ID", ""),
+                        "secret_key": os.environ.get("APCA_API_SECRET_KEY", ""),
+                    },
+                }
+            )
+            await ws.send_json(
+                {"action": "listen", "data": {"streams": ["trade_updates"]}}
+            )
+
+            async for msg in ws:
+                if msg.type not in (aiohttp.WSMsgType.TEXT, aiohttp.WSMsgType.BINARY):
+                    break
+                await self._handle(json.loads(msg.data))
+
+    async def _handle(self, message: Dict[str, Any]) -> None:
+        """Handle a message of the stream."""
+        stream = message.get("stream")
+        data = message.get("data", {})
+        if stream == "authorization" and data.get("status") != "authorized":
+            raise ConnectionError(f"Trade updates stream not authorized: {data}")
+        elif stream == "listening":
+            # Subscribed, from now on no update is missed
+            self.store.clear()
+            for order in await self.seed():
+                self.store.update(order)
+            self.store.synced = True
+        elif stream == "trade_updates":
+            self.store.update(Order(data["order"]))
@@ -1,10 +1,16 @@
 """Base class for trading APIs."""
+import asyncio
 import os
 from abc import ABC, abstractmethod
 from collections import OrderedDict
 from datetime import datetime
-from typing import Any, Dict, List, Optional
+from typing import Any, AsyncIterator, Dict, List, Optional, Sequence, Set, Tuple, Union
 
+import pandas as pd
+
+from analytics.calendar_index import CalendarIndex
+from caches.calendar_store import CalendarStore
+from caches.clock_cache import ClockCache
 from domainmodels.account import DomainAccount
 from domainmodels.clock import DomainClock
 from domainmodels.closed_position import ClosedPosition
@@ -19,6 +25,13 @@ from domainmodels.order import (
 )
 from domainmodels.position import DomainPosition
 from domainmodels.trading_day import TradingDay
+from helpers.executor import ApiExecutor
+from helpers.rate_limiter import RateLimiter
+from helpers.recorder import Recorder
+from helpers.single_flight import SingleFlight
+from mappers.frame_mapper import OrderFrameMapper, PositionFrameMapper
+from tradingapi.base.exceptions import TradingApiError
+from tradingapi.base.instrumentation import Instrumentation
 
 
 class BaseApi(ABC):
@@ -28,8 +41,41 @@ class BaseApi(ABC):
     For reference, please see: https://github.com/alpacahq/alpaca-trade-api-python
     """
 
-    def __init__(self, env_dict: Dict) -> None:
-        """Class initialization function."""
+    # The largest limit of _list_orders_page, iter_orders widens pages up to it
+    max_orders_page = 500
+
+    def __init__(
+        self,
+        env_dict: Dict,
+        max_workers: Optional[int] = None,
+        rate_limiter: Optional[RateLimiter] = None,
+        clock_ttl: Optional[float] = None,
+        calendar_store: Optional[CalendarStore] = None,
+        recorder: Optional[Recorder] = None,
+    ) -> None:
+        """Class initialization function.
+
+        Args:
+            env_dict (Dict): The environment variables to set for the API.
+            max_workers (int, optional): The number of threads of the executor
+                running blocking broker calls. Defaults to the ThreadPoolExecutor
+                default.
+            rate_limiter (RateLimiter, optional): The rate limiter that every broker
+                request waits for. Defaults to no rate limiting.
+            clock_ttl (float, optional): If set, get_clock is answered locally from
+                a clock fetched at most clock_ttl seconds ago, until the market
+                opens or closes. Defaults to fetching the clock on every call.
+            calendar_store (CalendarStore, optional): If set, get_trading_days only
+                fetches the dates missing from the store. Defaults to fetching the
+                whole range on every call.
+            recorder (Recorder, optional): If set, the raw responses of the broker
+                are written to its files in the background, e.g. to replay them
+                in tests. The recorder is closed with the API. Defaults to no
+                recording.
+
+        Raises:
+            ValueError: If env_dict is not a dictionary of strings.
+        """
         # Check inputs
         is_dict = isinstance(env_dict, dict) or isinstance(env_dict, OrderedDict)
         if not is_dict:
@@ -43,6 +89,40 @@ class BaseApi(ABC):
         for k, v in env_dict.items():
             os.environ[k] = v
 
+        # Dedicated executor, such that broker I/O can be sized and monitored
+        self.executor = ApiExecutor(max_workers, thread_name_prefix=type(self).__name__)
+        self.rate_limiter = rate_limiter
+
+        # Identical concurrent reads share one request, see helpers.single_flight
+        self.single_flight = SingleFlight()
+
+        self.clock_cache = ClockCache(clock_ttl) if clock_ttl is not None else None
+        self.calendar_store = calendar_store
+        self.recorder = recorder
+
+        # Latency histograms, error counts and hooks of the instrumented methods
+        self.instrumentation = Instrumentation()
+
+    async def _throttle(self, endpoint: str) -> None:
+        """Wait until the rate limiter allows a request to the broker.
+
+        Args:
+            endpoint (str): The endpoint that is about to be requested.
+        """
+        if self.rate_limiter is not None:
+            delay = await self.rate_limiter.acquire(endpoint)
+            record = self.instrumentation.current()
+            if record is not None:
+                record.throttle += delay
+
+    async def close(self) -> None:
+        """Release the resources held by the API."""
+        self.executor.shutdown(wait=False)
+        if self.recorder is not None:
+            # Joining the writer waits for the disk, keep it off the event loop
+            loop = asyncio.get_event_loop()
+            await loop.run_in_executor(None, self.recorder.close)
+
     @abstractmethod
     async def get_account(self) -> DomainAccount:
         """Get the account."""
@@ -60,6 +140,18 @@ class BaseApi(ABC):
         """Get the calendars."""
         pass
 
+    async def get_calendar_index(self, start: datetime, end: datetime) -> CalendarIndex:
+        """Get an index for vectorized queries on the trading days.
+
+        Args:
+            start (datetime): The first date of the calendar.
+            end (datetime): The last date of the calendar.
+
+        Returns:
+            CalendarIndex: The index over the trading days from start to end.
+        """
+        return CalendarIndex(await self.get_trading_days(start, end))
+
     @abstractmethod
     async def submit_order(
         self,
@@ -98,11 +190,162 @@ class BaseApi(ABC):
         """
         pass
 
+    async def submit_orders(
+        self, orders: Sequence[DomainOrder], max_concurrency: int = 10
+    ) -> List[Union[DomainOrder, TradingApiError]]:
+        """Submit a batch of orders concurrently.
+
+        At most max_concurrency orders are in flight at the same time. A failing
+        order does not abort the batch, its error is returned in its place.
+
+        Args:
+            orders (Sequence[DomainOrder]): The orders to submit. The fields of each
+                order are passed on to submit_order.
+            max_concurrency (int): The maximum number of concurrent submissions.
+
+        Returns:
+            List[Union[DomainOrder, TradingApiError]]: The placed order or the error
+                for each order, in the same order as orders.
+        """
+        semaphore = asyncio.Semaphore(max_concurrency)
+
+        async def submit(order: DomainOrder) -> Union[DomainOrder, TradingApiError]:
+            async with semaphore:
+                try:
+                    return await self.submit_order(
+                        symbol=order.symbol,
+                        qty=order.qty,
+                        side=order.side,
+                        type=order.type,
+                        time_in_force=order.time_in_force,
+                        extended_hours=bool(order.extended_hours),
+                        order_class=order.order_class or OrderClass.SIMPLE,
+                        stop_price=order.stop_price,
+                        limit_price=order.limit_price,
+                        take_profit=order.take_profit,
+                        stop_loss=order.stop_loss,
+                        trail_price=order.trail_price,
+                        trail_percent=order.trail_percent,
+                        notional=order.notional,
+                    )
+                except TradingApiError as ex:
+                    return ex
+                except Exception as ex:
+                    return TradingApiError(
+                        f"Failed to submit order for {order.symbol}: {ex}"
+                    )
+
+        return list(await asyncio.gather(*[submit(order) for order in orders]))
+
     @abstractmethod
     async def list_orders(self, **kwargs: Any) -> List[DomainOrder]:
         """Get a list with all orders."""
         pass
 
+    async def list_orders_frame(self, **kwargs: Any) -> pd.DataFrame:
+        """Get the orders of list_orders as columns.
+
+        The frame has a row per order, numeric columns as float64, symbols, sides,
+        types and statuses as categoricals and timestamps as UTC datetimes, see
+        OrderFrameMapper. Columns the API does not provide are NaN.
+
+        Args:
+            **kwargs: The keyword arguments of list_orders.
+
+        Returns:
+            pd.DataFrame: The orders.
+        """
+        return OrderFrameMapper.instance().map(await self.list_orders(**kwargs))
+
+    async def iter_orders(
+        self,
+        status: str = "all",
+        after: Optional[str] = None,
+        until: Optional[str] = None,
+        direction: str = "desc",
+        page_size: int = 500,
+    ) -> AsyncIterator[DomainOrder]:
+        """Iterate over all orders between after and until, page by page.
+
+        The next page is requested while the orders of the current page are being
+        consumed, so at most two pages are held in memory at a time.
+
+        Args:
+            status (str): open, closed or all. Defaults to all.
+            after (str, optional): Only orders submitted after this timestamp.
+            until (str, optional): Only orders submitted until this timestamp.
+            direction (str): asc or desc by submission time. Defaults to desc.
+            page_size (int): The number of orders requested per page.
+
+        Yields:
+            DomainOrder: The orders, one at a time.
+        """
+        page: Optional[asyncio.Future] = asyncio.ensure_future(
+            self._list_orders_page(status, page_size, after, until, direction)
+        )
+        # Pages overlap at their boundary timestamp, so the orders of the previous
+        # page are skipped
+        yielded: Set[str] = set()
+        limit = page_size
+        try:
+            while page is not None:
+                orders, cursor = await page
+                new_orders = [order for order in orders if order.id not in yielded]
+
+                # A full page of yielded orders shares one timestamp, the page is
+                # widened to get past it, at the maximum page _list_orders_page
+                # moves the cursor past the timestamp
+                limit = (
+                    page_size if new_orders else min(limit * 2, self.max_orders_page)
+                )
+                if cursor is None:
+                    page = None
+                elif direction == "asc":
+                    page = asyncio.ensure_future(
+                        self._list_orders_page(status, limit, cursor, until, direction)
+                    )
+                else:
+                    page = asyncio.ensure_future(
+                        self._list_orders_page(status, limit, after, cursor, direction)
+                    )
+
+                if new_orders:
+                    yielded = {order.id for order in orders}
+                for order in new_orders:
+                    yield order
+        finally:
+            if page is not None:
+                page.cancel()
+
+    async def _list_orders_page(
+        self,
+        status: str,
+        limit: int,
+        after: Optional[str],
+        until: Optional[str],
+        direction: str,
+    ) -> Tuple[List[DomainOrder], Optional[str]]:
+        """Get a page of orders for iter_orders.
+
+        By default the orders of one list_orders call are the only page, for APIs
+        that can not page through orders.
+
+        Args:
+            status (str): open, closed or all.
+            limit (int): The maximum number of orders of the page.
+            after (str, optional): Only orders submitted after this timestamp.
+            until (str, optional): Only orders submitted until this timestamp.
+            direction (str): asc or desc by submission time.
+
+        Returns:
+            Tuple[List[DomainOrder], Optional[str]]: The orders and the timestamp
+                to continue from, such that the next page includes the orders
+                submitted at the time of the last order, or None if this is the
+                last page. A page of max_orders_page orders submitted at the same
+                time continues after that time instead.
+        """
+        return await self.list_orders(status=status, limit=limit), None
+
     @abstractmethod
     async def get_order(self, order_id: str, **kwargs: Any) -> DomainOrder:
         """Get an order with specific order_id."""
@@ -123,6 +366,21 @@ class BaseApi(ABC):
         """Get a list of open positions."""
         pass
 
+    async def list_positions_frame(self, **kwargs: Any) -> pd.DataFrame:
+        """Get the open positions of list_positions as columns.
+
+        The frame has a row per position, quantities, prices and P&L as float64
+        and symbols, sides, exchanges and asset classes as categoricals, see
+        PositionFrameMapper.
+
+        Args:
+            **kwargs: The keyword arguments of list_positions.
+
+        Returns:
+            pd.DataFrame: The positions.
+        """
+        return PositionFrameMapper.instance().map(await self.list_positions(**kwargs))
+
     @abstractmethod
     async def get_position(self, symbol: str, **kwargs: Any) -> DomainPosition:
         """Get an open position for a symbol."""
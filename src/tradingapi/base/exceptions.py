@@ -21,7 +21,7 @@ class TradingApiError(Exception):
         super().__init__(self.message)
 
 
-class TradingApiHttpError(Exception):
+class TradingApiHttpError(TradingApiError):
     """Exception raised for HTTP errors while communication with APIs."""
 
     def __init__(
@@ -0,0 +1,277 @@
+"""Per-method latency histograms, error counts and call hooks for trading APIs."""
+
+import time
+from contextvars import ContextVar
+from functools import partial, wraps
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+from aiohttp import web
+
+from helpers.histogram import LatencyHistogram
+from tradingapi.base.exceptions import TradingApiHttpError
+
+# The phases a call is split into, mapping is what remains of the total
+PHASES = ("total", "throttle", "executor_wait", "network", "mapping")
+
+# The quantiles exported to Prometheus
+QUANTILES = (0.5, 0.9, 0.95, 0.99, 0.999)
+
+
+class CallRecord:
+    """The timing and outcome of an instrumented call.
+
+    Pre call hooks get the record before the call, with only method, args and
+    kwargs set. Post call hooks get it after the call with the times in seconds
+    and the result or the error.
+    """
+
+    __slots__ = (
+        "method",
+        "args",
+        "kwargs",
+        "total",
+        "throttle",
+        "executor_wait",
+        "network",
+        "result",
+        "error",
+    )
+
+    def __init__(self, method: str, args: Tuple, kwargs: Dict) -> None:
+        """Class initialization function.
+
+        Args:
+            method (str): The called method of the API.
+            args (Tuple): The positional arguments of the call.
+            kwargs (Dict): The keyword arguments of the call.
+        """
+        self.method = method
+        self.args = args
+        self.kwargs = kwargs
+        self.total = 0.0
+        self.throttle = 0.0
+        self.executor_wait = 0.0
+        self.network = 0.0
+        self.result: Any = None
+        self.error: Optional[BaseException] = None
+
+    @property
+    def mapping(self) -> float:
+        """Get the time spent locally, mostly mapping the broker responses.
+
+        Returns:
+            float: The total time minus the throttle, executor wait and network time.
+        """
+        return max(self.total - self.throttle - self.executor_wait - self.network, 0.0)
+
+
+class MethodStats:
+    """A snapshot of the calls of a method."""
+
+    method: str
+    calls: int
+    errors: Dict[str, int]
+    latency: Dict[str, LatencyHistogram]
+
+
+Hook = Callable[[CallRecord], None]
+
+
+class Instrumentation:
+    """Collects latency histograms and error counts per method of an API.
+
+    Every instrumented call is timed as a whole and split into the time waited
+    for the rate limiter (throttle), for a free executor thread (executor_wait),
+    for the broker (network, including the sdk) and the rest (mapping). Requests
+    report their phases to the call running in the current context, see current.
+    Failed calls are counted by the HTTP status of TradingApiHttpError or the
+    name of the exception.
+
+    Attributes:
+        pre_call_hooks (List[Hook]): Called with the record before every call.
+        post_call_hooks (List[Hook]): Called with the record after every call.
+    """
+
+    def __init__(self) -> None:
+        """Class initialization function."""
+        self.pre_call_hooks: List[Hook] = []
+        self.post_call_hooks: List[Hook] = []
+        self._latency: Dict[str, Dict[str, LatencyHistogram]] = {}
+        self._errors: Dict[str, Dict[str, int]] = {}
+        self._current: ContextVar[Optional[CallRecord]] = ContextVar(
+            "current_call", default=None
+        )
+
+    def current(self) -> Optional[CallRecord]:
+        """Get the record of the call running in the current context.
+
+        Returns:
+            Optional[CallRecord]: The record, or None outside instrumented calls.
+        """
+        return self._current.get()
+
+    async def call(
+        self,
+        method: str,
+        func: Callable[[], Awaitable[Any]],
+        args: Tuple,
+        kwargs: Dict,
+    ) -> Any:
+        """Await func as an instrumented call of method.
+
+        Args:
+            method (str): The called method.
+            func (Callable[[], Awaitable[Any]]): Starts the call.
+            args (Tuple): The positional arguments of the call, for the hooks.
+            kwargs (Dict): The keyword arguments of the call, for the hooks.
+
+        Returns:
+            Any: The result of the call.
+        """
+        record = CallRecord(method, args, kwargs)
+        for hook in self.pre_call_hooks:
+            hook(record)
+
+        token = self._current.set(record)
+        started_at = time.perf_counter()
+        try:
+            record.result = await func()
+            return record.result
+        except BaseException as ex:
+            record.error = ex
+            raise
+        finally:
+            record.total = time.perf_counter() - started_at
+            self._current.reset(token)
+            self._add(record)
+            for hook in self.post_call_hooks:
+                hook(record)
+
+    def _add(self, record: CallRecord) -> None:
+        """Add the times and the error of a call to its method."""
+        latency = self._latency.get(record.method)
+        if latency is None:
+            latency = self._latency[record.method] = {
+                phase: LatencyHistogram() for phase in PHASES
+            }
+        latency["total"].record(record.total)
+        latency["throttle"].record(record.throttle)
+        latency["executor_wait"].record(record.executor_wait)
+        latency["network"].record(record.network)
+        latency["mapping"].record(record.mapping)
+
+        if record.error is not None:
+            error = record.error
+            if isinstance(error, TradingApiHttpError):
+                status = str(error.http_status_code)
+            else:
+                status = type(error).__name__
+            errors = self._errors.setdefault(record.method, {})
+            errors[status] = errors.get(status, 0) + 1
+
+    def snapshot(self) -> Dict[str, MethodStats]:
+        """Get a copy of the statistics of all called methods.
+
+        Returns:
+            Dict[str, MethodStats]: The statistics by method.
+        """
+        snapshot = {}
+        for method, latency in self._latency.items():
+            stats = MethodStats()
+            stats.method = method
+            stats.calls = latency["total"].count
+            stats.errors = dict(self._errors.get(method, {}))
+            stats.latency = {phase: h.copy() for phase, h in latency.items()}
+            snapshot[method] = stats
+        return snapshot
+
+    def reset(self) -> None:
+        """Forget all recorded calls."""
+        self._latency = {}
+        self._errors = {}
+
+    def prometheus(self, prefix: str = "tradingapi") -> str:
+        """Get the statistics in the Prometheus text exposition format.
+
+        The latencies are exported as a summary per method and phase, the errors
+        as a counter per method and status.
+
+        Args:
+            prefix (str): The prefix of the metric names.
+
+        Returns:
+            str: The metrics.
+        """
+        name = f"{prefix}_call_seconds"
+        lines = [
+            f"# HELP {name} Latency of API calls by method and phase.",
+            f"# TYPE {name} summary",
+        ]
+        snapshot = self.snapshot()
+        for method, stats in snapshot.items():
+            for phase, histogram in stats.latency.items():
+                labels = f'method="{method}",phase="{phase}"'
+                for quantile in QUANTILES:
+                    value = histogram.percentile(quantile * 100)
+                    lines.append(f'{name}{{{labels},quantile="{quantile}"}} {value}')
+                lines.append(f"{name}_sum{{{labels}}} {histogram.sum}")
+                lines.append(f"{name}_count{{{labels}}} {histogram.count}")
+
+        name = f"{prefix}_call_errors_total"
+        lines.append(f"# HELP {name} Failed API calls by method and status.")
+        lines.append(f"# TYPE {name} counter")
+        for method, stats in snapshot.items():
+            for status, count in stats.errors.items():
+                lines.append(f'{name}{{method="{method}",status="{status}"}} {count}')
+        return "\n".join(lines) + "\n"
+
+
+def instrument(func: Callable) -> Callable:
+    """Instrument the calls of an API coroutine method.
+
+    The instance must have an Instrumentation as attribute instrumentation. Apply
+    it below coalesce, such that a coalesced call is timed once.
+
+    Args:
+        func (Callable): The coroutine method to wrap.
+
+    Returns:
+        Callable: The instrumented wrapper method.
+    """
+    method = func.__name__
+
+    @wraps(func)
+    async def run(self: Any, *args: Any, **kwargs: Any) -> Any:
+        """The wrapped method."""
+        call = partial(func, self, *args, **kwargs)
+        return await self.instrumentation.call(method, call, args, kwargs)
+
+    return run
+
+
+async def serve_metrics(
+    instrumentation: Instrumentation, host: str = "127.0.0.1", port: int = 9464
+) -> web.AppRunner:
+    """Serve the metrics of an API for Prometheus at /metrics.
+
+    Args:
+        instrumentation (Instrumentation): The instrumentation of the API.
+        host (str): The interface to listen on. Defaults to local connections only.
+        port (int): The port to listen on.
+
+    Returns:
+        web.AppRunner: The runner, call its cleanup to stop serving.
+    """
+
+    async def metrics(request: web.Request) -> web.Response:
+        return web.Response(
+            body=instrumentation.prometheus().encode(),
+            headers={"Content-Type": "text/plain; version=0.0.4; charset=utf-8"},
+        )
+
+    app = web.Application()
+    app.router.add_get("/metrics", metrics)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    await web.TCPSite(runner, host, port).start()
+    return runner
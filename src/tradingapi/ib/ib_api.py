@@ -1,227 +1,618 @@
-# type: ignore
-"""Base class for trading APIs."""
-import collections
-from typing import Any, Dict, List
+"""Trading API for interactive brokers."""
+import asyncio
+import logging
+import os
+import time
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Sequence
 
 import ib_insync as ibin
-
-
-class IbApi:
+from caches.contract_cache import ContractCache
+from caches.open_order_index import OpenOrderIndex
+from caches.position_index import IbPosition, PositionIndex
+from domainmodels.account import DomainAccount
+from domainmodels.clock import DomainClock
+from domainmodels.closed_position import ClosedPosition, ClosedPositionError
+from domainmodels.order import (
+    DomainOrder,
+    OrderClass,
+    OrderSide,
+    StopLoss,
+    TakeProfit,
+    TimeInForce,
+    Type,
+)
+from domainmodels.position import DomainPosition
+from domainmodels.trading_day import TradingDay
+from helpers.single_flight import coalesce
+from mappers.ib_account_mapper import IbAccountMapper
+from mappers.ib_clock_mapper import IbClockMapper
+from mappers.ib_order_mapper import IbOrderMapper, IbOrderRequestMapper, quantity
+from mappers.ib_position_mapper import IbPositionMapper
+from mappers.ib_tradingday_mapper import IbTradingDayMapper
+from tradingapi.base.base_api import BaseApi
+from tradingapi.base.exceptions import TradingApiError, TradingApiHttpError
+from tradingapi.base.instrumentation import instrument
+
+logger = logging.getLogger(__name__)
+
+# Order states of an order the gateway acknowledged or rejected
+ACKNOWLEDGED_STATES = {
+    ibin.OrderStatus.PreSubmitted,
+    ibin.OrderStatus.Submitted,
+    ibin.OrderStatus.Filled,
+}
+REJECTED_STATES = {
+    ibin.OrderStatus.Cancelled,
+    ibin.OrderStatus.ApiCancelled,
+    ibin.OrderStatus.Inactive,
+}
+
+
+class IbApi(BaseApi):
     """Class for interactive broker API.
 
-    This class use the package ib-insync for making asynchronous requests toward
-    interactive broker trading work station (TWS) api.
+    This class uses the asyncio methods of the package ib-insync to make requests
+    toward the interactive broker trading work station (TWS) or gateway api on
+    the event loop of the caller.
     For reference of TWS, please see :
     https://interactivebrokers.github.io/tws-api/index.html
     and for ib-insync
     https://rawgit.com/erdewit/ib_insync/master/docs/html/readme.html
-    """
 
-    def __init__(self) -> None:
-        """Class initialization function."""
-        self.ib = ibin.ib.IB()
-        self.ib.connect("127.0.0.1", 4002, clientId=13)  # Ports
+    The connection is established on the first request, or with connect. The
+    host, port, client id and account are read from the environment variables
+    IB_HOST, IB_PORT, IB_CLIENT_ID and IB_ACCOUNT.
+    """
 
-    def get_account(self, **kwargs: Any) -> Dict:
-        """Get the accounts associated with login."""
-        accounts_summaries = self.ib.accountSummary()
+    # The contract whose liquid hours are the market hours of get_clock
+    calendar_contract = ibin.Stock("SPY", "SMART", "USD")
 
-        account = {}
-        for account_summary in accounts_summaries:
-            if account_summary.account != "ALL":
-                tag = account_summary.tag
-                value = account_summary.value
-                account[tag] = value
+    def __init__(
+        self,
+        env_dict: Dict,
+        ib: Optional[ibin.IB] = None,
+        submit_timeout: float = 10.0,
+        contract_cache: Optional[ContractCache] = None,
+        **kwargs: Any,
+    ) -> None:
+        """Class initialization function.
 
-        self.account = account
+        Args:
+            env_dict (Dict): The environment variables, e.g. IB_PORT.
+            ib (ibin.IB, optional): The ib-insync client. Defaults to a new one.
+            submit_timeout (float): The seconds to wait for the gateway to
+                acknowledge a placed order.
+            contract_cache (ContractCache, optional): The cache of qualified
+                contracts, e.g. persisted to a file to be warm at startup.
+                Defaults to an in-memory cache.
+            **kwargs: Keyword arguments of BaseApi.
+        """
+        super().__init__(env_dict, **kwargs)  # type: ignore
+        self.host = os.environ.get("IB_HOST", "127.0.0.1")
+        self.port = int(os.environ.get("IB_PORT", 4002))
+        self.client_id = int(os.environ.get("IB_CLIENT_ID", 13))
+        self.account = os.environ.get("IB_ACCOUNT", "")
+        self.ib = ib if ib is not None else ibin.IB()
+        self.submit_timeout = submit_timeout
+        self.contract_cache = (
+            contract_cache if contract_cache is not None else ContractCache()
+        )
+
+        # Positions seeded on connect and kept current by the updates the
+        # gateway pushes
+        self.position_index = PositionIndex(self.account)
+        self.ib.positionEvent += self.position_index.update_position
+        self.ib.updatePortfolioEvent += self.position_index.update_portfolio
+        self.ib.disconnectedEvent += self.position_index.clear
+
+        # Open orders seeded on first use and kept current by order events
+        self.open_order_index = OpenOrderIndex()
+        self.ib.openOrderEvent += self.open_order_index.update
+        self.ib.orderStatusEvent += self.open_order_index.update
+        self.ib.disconnectedEvent += self.open_order_index.clear
+
+    async def connect(self) -> None:
+        """Connect to the gateway, unless connected already."""
+        if not self.ib.isConnected():
+            await self.single_flight.do("connect", self._connect)
+
+    async def _connect(self) -> None:
+        """Connect to the gateway and wait for the initial synchronization."""
+        await self.ib.connectAsync(
+            self.host, self.port, clientId=self.client_id, account=self.account
+        )
+        # The index only keeps the positions and portfolio items of its account
+        self.position_index.seed(self.ib.positions(), self.ib.portfolio())
+
+    async def _request(self, method: str, *args: Any) -> Any:
+        """Await an async request method of ib-insync.
 
-        return account
+        Args:
+            method (str): The name of the ibin.IB method, e.g. reqCurrentTimeAsync.
+            *args: Positional arguments of the method.
 
-    def submit_order(
+        Returns:
+            Any: The result of the request.
+        """
+        await self.connect()
+        await self._throttle(method)
+
+        sent_at = time.perf_counter()
+        try:
+            return await getattr(self.ib, method)(*args)
+        finally:
+            record = self.instrumentation.current()
+            if record is not None:
+                record.network += time.perf_counter() - sent_at
+
+    async def close(self) -> None:
+        """Disconnect from the gateway and release the executor."""
+        self.ib.disconnect()
+        await super().close()
+
+    @coalesce
+    @instrument
+    async def get_account(self) -> DomainAccount:
+        """Get the account."""
+        values = await self._request("accountSummaryAsync", self.account)
+        return IbAccountMapper.instance().map(values)
+
+    @coalesce
+    @instrument
+    async def get_clock(self) -> DomainClock:
+        """Get the clock from the server time and the market's liquid hours."""
+        if self.clock_cache is not None:
+            cached_clock = self.clock_cache.get()
+            if cached_clock is not None:
+                return cached_clock
+
+        now, details = await asyncio.gather(
+            self._request("reqCurrentTimeAsync"), self._calendar_details()
+        )
+        domain_clock = IbClockMapper.instance().map((now, details))
+
+        if self.clock_cache is not None:
+            self.clock_cache.update(domain_clock)
+        return domain_clock
+
+    @coalesce
+    @instrument
+    async def get_trading_days(
+        self, start: datetime, end: datetime
+    ) -> List[TradingDay]:
+        """Get the trading days from start to end.
+
+        Interactive brokers only lists the sessions of the coming days, so past
+        and far future days are missing.
+        """
+        details = await self._calendar_details()
+        trading_days = IbTradingDayMapper.instance().map(details)
+        return [
+            trading_day
+            for trading_day in trading_days
+            if start.date() <= trading_day.date <= end.date()  # type: ignore
+        ]
+
+    async def _calendar_details(self) -> ibin.ContractDetails:
+        """Get the contract details with the liquid hours of the market."""
+        details = await self._request("reqContractDetailsAsync", self.calendar_contract)
+        if not details:
+            raise TradingApiError(f"No details of {self.calendar_contract}.")
+        return details[0]
+
+    @instrument
+    async def submit_order(
         self,
         symbol: str,
         qty: int,
-        side: str,
-        type: str,
-        limit_price: float = None,
-        stop_price: float = None,
-        **kwargs: Any
-    ) -> Dict:
-        """Create and submit an order.
+        side: OrderSide,
+        type: Type = Type.MARKET,
+        time_in_force: TimeInForce = TimeInForce.DAY,
+        extended_hours: bool = False,
+        order_class: OrderClass = OrderClass.SIMPLE,
+        stop_price: Optional[float] = None,
+        limit_price: Optional[float] = None,
+        take_profit: Optional[TakeProfit] = None,
+        stop_loss: Optional[StopLoss] = None,
+        trail_price: Optional[float] = None,
+        trail_percent: Optional[float] = None,
+        notional: Optional[float] = None,
+    ) -> DomainOrder:
+        """Submit an order of a US stock on SMART routing.
 
         Args:
-            symbol: symbol or asset ID
-            qty: quantity of shares to be bought or sold
-            side: order side, can be "SELL" or "BUY"
-            type: order type, can be one of "MKT" (Market), "LMT" (Limit),
-                "STP" (Stop) or "STP_LIMIT" (stop limit)
-            limit_price: the limit price
-            stop_price: the stop price
-            **kwargs: Arbitrary keyword arguments, among them for instance:
-                currency (str = "USD"): the currency in which to place the order
+            symbol: str,
+            qty: int,
+            side: OrderSide,
+            type: Type = Type.MARKET,
+            time_in_force: TimeInForce = TimeInForce.DAY,
+            extended_hours: bool = False,
+            order_class: OrderClass = OrderClass.SIMPLE,
+            stop_price: Optional[float] = None,
+            limit_price: Optional[float] = None,
+            take_profit: Optional[TakeProfit] = None,
+            stop_loss: Optional[StopLoss] = None,
+            trail_price: Optional[float] = None,
+            trail_percent: Optional[float] = None,
+            notional: Optional[float] = None,
 
         Returns:
-            Dict: A list containing the order, based of trade object.
+            DomainOrder: The placed order
         """
-        # Initialize default kwargs if necessary
-        if "currency" not in kwargs:
-            currency = "USD"
-        else:
-            currency = kwargs["currency"]
-
-        # Define order according to dict
-        order_dict = {
-            "STP LMT": {
-                "orderType": type,
-                "totalQuantity": qty,
-                "auxPrice": stop_price,
-                "lmtPrice": limit_price,
-                "action": side,
-            },
-            "STP": {
-                "orderType": type,
-                "totalQuantity": qty,
-                "auxPrice": stop_price,
-                "action": side,
-            },
-            "LMT": {
-                "orderType": type,
-                "totalQuantity": qty,
-                "lmtPrice": limit_price,
-                "action": side,
-            },
-            "MKT": {"orderType": type, "totalQuantity": qty, "action": side},
-        }
-        order_definition = collections.OrderedDict(order_dict[type])  # mypy workaround
-
-        order = ibin.Order(**order_definition)  # Place order
-
-        # Define contract (which asset being traded)
-        contract = ibin.Stock(symbol=symbol, exchange="SMART", currency=currency)
-
-        # Place order, send request
-        trade = self.ib.placeOrder(contract=contract, order=order)
-
-        # Confirm submission
-        self.ib.sleep(2)
-        assert order in self.ib.orders()
-
-        trade_dict = trade.__dict__
-
-        return trade_dict
-
-    def list_orders(self, **kwargs: Any) -> List[Dict]:
-        """Get a list with all orders."""
-        open_orders_dict = [x.__dict__ for x in self.ib.reqAllOpenOrders()]
-
-        return open_orders_dict
-
-    def get_order(self, order_id: str, **kwargs: Any) -> Dict:
-        """Get an order with specific order_id."""
-        open_orders = self.ib.reqAllOpenOrders()
-        for order in open_orders:
-            if order.permId == int(order_id):  # Order id is unique
-                order_dict = order.__dict__
-
-        if "order_dict" not in locals():
-            print("Order doesn't exist!")
-            order_dict = {}
-
-        return order_dict
-
-    def cancel_order(self, order_id: str, **kwargs: Any) -> Dict:
-        """Cancel an order with specific order_id."""
-        open_orders = self.ib.reqAllOpenOrders()
-        for order in open_orders:
-            if order.permId == int(order_id):  # Order id is unique
-                trade = self.ib.cancelOrder(order)
-                trade_dict = trade.__dict__
-        if "trade_dict" not in locals():
-            print("Order doesn't exist!")
-            trade_dict = {}
-
-        return trade_dict
-
-    def cancel_all_orders(self, **kwargs: Any) -> List[Dict]:
-        """Cancel all orders."""
-        cancelled_orders = []
-        open_orders = self.ib.reqAllOpenOrders()
-        for order in open_orders:
-            trade = self.ib.cancelOrder(order)
-            trade_dict = trade.__dict__
-            cancelled_orders.append(trade_dict)
-
-        return cancelled_orders
-
-    def list_positions(self, **kwargs: Any) -> List[Dict]:
-        """Get a list of open positions."""
-        positions = []
-        for x in range(0, len(self.ib.positions())):
-            positions.append(
-                {
-                    "account": self.ib.positions()[x].account,
-                    "contract": self.ib.positions()[x].contract.__dict__,
-                    "quantity": self.ib.positions()[x].position,
-                    "avgCost": self.ib.positions()[x].avgCost,
-                }
+        domain_order = DomainOrder(symbol)
+        domain_order.qty = qty
+        domain_order.side = side
+        domain_order.type = type
+        domain_order.time_in_force = time_in_force
+        domain_order.extended_hours = extended_hours
+        domain_order.order_class = order_class
+        domain_order.stop_price = stop_price
+        domain_order.limit_price = limit_price
+        domain_order.take_profit = take_profit
+        domain_order.stop_loss = stop_loss
+        domain_order.trail_price = trail_price
+        domain_order.trail_percent = trail_percent
+        domain_order.notional = notional
+
+        stock = ibin.Stock(symbol=symbol, exchange="SMART", currency="USD")
+        (contract,) = await self.qualify(stock)
+        return await self._place_order(contract, domain_order)
+
+    async def _place_order(
+        self, contract: ibin.Contract, domain_order: DomainOrder
+    ) -> DomainOrder:
+        """Place an order and wait for the gateway to acknowledge it.
+
+        Args:
+            contract (ibin.Contract): The contract to trade.
+            domain_order (DomainOrder): The order.
+
+        Returns:
+            DomainOrder: The placed order.
+
+        Raises:
+            TradingApiError: If the order is invalid or was not accepted.
+        """
+        try:
+            order = IbOrderRequestMapper.instance().map(domain_order)
+        except ValueError as ex:
+            raise TradingApiError(f"Invalid order for {contract.symbol}: {ex}")
+
+        await self.connect()
+        await self._throttle("placeOrder")
+
+        sent_at = time.perf_counter()
+        trade = self.ib.placeOrder(contract, order)
+        try:
+            status = await self._acknowledgement(trade)
+        finally:
+            record = self.instrumentation.current()
+            if record is not None:
+                record.network += time.perf_counter() - sent_at
+
+        if status in REJECTED_STATES:
+            reason = trade.log[-1].message if trade.log else status
+            raise TradingApiError(f"Order for {contract.symbol} was rejected: {reason}")
+        return IbOrderMapper.instance().map(trade)
+
+    async def _acknowledgement(self, trade: ibin.Trade) -> str:
+        """Wait for the first order status acknowledging or rejecting an order.
+
+        Args:
+            trade (ibin.Trade): The trade of the placed order.
+
+        Returns:
+            str: The acknowledging or rejecting order status.
+
+        Raises:
+            TradingApiError: If the gateway did not answer within submit_timeout.
+                The order is cancelled then, but the cancel may race a late
+                acknowledgement, so the order may still be working; the message
+                carries its orderId and permId to look it up.
+        """
+        acknowledged: asyncio.Future = asyncio.get_running_loop().create_future()
+
+        def on_status(trade: ibin.Trade) -> None:
+            status = trade.orderStatus.status
+            if not acknowledged.done() and (
+                status in ACKNOWLEDGED_STATES or status in REJECTED_STATES
+            ):
+                acknowledged.set_result(status)
+
+        on_status(trade)  # The status may have arrived already
+        trade.statusEvent += on_status
+        try:
+            return await asyncio.wait_for(acknowledged, self.submit_timeout)
+        except asyncio.TimeoutError:
+            order = trade.order
+            if self.ib.isConnected():
+                self.ib.cancelOrder(order)
+            raise TradingApiError(
+                f"Order for {trade.contract.symbol} was not acknowledged within "
+                f"{self.submit_timeout} seconds and was cancelled, it may still be "
+                f"working (orderId {order.orderId}, permId {order.permId})."
             )
-        return positions
+        finally:
+            trade.statusEvent -= on_status
+
+    @coalesce
+    @instrument
+    async def list_orders(self, **kwargs: Any) -> List[DomainOrder]:
+        """List orders.
+
+        Orders whose action or order type has no equivalent, e.g. MIT orders
+        placed in TWS, are skipped with a warning.
+
+        Args:
+            **kwargs: Arbitrary keyword arguments, among them the following:
+                status (str = "open"): open, closed or all. Defaults to open.
+                limit (int = 50): The maximum number of orders.
+
+        Returns:
+            List[DomainOrder]: The orders.
+        """
+        status = kwargs.get("status", "open")
+        limit = kwargs.get("limit", 50)
+
+        trades: List[ibin.Trade] = []
+        if status in ("open", "all"):
+            trades += (await self._open_orders()).list()
+        if status in ("closed", "all"):
+            trades += await self._request("reqCompletedOrdersAsync", False)
+
+        order_mapper = IbOrderMapper.instance()
+        domain_orders: List[DomainOrder] = []
+        for trade in trades:
+            if len(domain_orders) == limit:
+                break
+            try:
+                domain_orders.append(order_mapper.map(trade))
+            except ValueError as ex:
+                logger.warning(f"Skipped order {trade.order.permId}: {ex}")
+        return domain_orders
+
+    @coalesce
+    @instrument
+    async def get_order(self, order_id: str, **kwargs: Any) -> DomainOrder:
+        """Get an open order by its permId.
+
+        Args:
+            order_id (str): The permId of the order.
+            **kwargs: Arbitrary keyword arguments.
+
+        Returns:
+            DomainOrder: The order.
 
-    def get_position(self, symbol: str, **kwargs: Any) -> Dict:
+        Raises:
+            TradingApiError: If the order is not open or has no equivalent.
+        """
+        trade = await self._open_trade(order_id)
+        try:
+            return IbOrderMapper.instance().map(trade)
+        except ValueError as ex:
+            raise TradingApiError(f"Order {order_id} is not supported: {ex}")
+
+    @instrument
+    async def cancel_order(self, order_id: str, **kwargs: Any) -> None:
+        """Cancel an open order by its permId."""
+        trade = await self._open_trade(order_id)
+        await self._throttle("cancelOrder")
+        self.ib.cancelOrder(trade.order)
+
+    @instrument
+    async def cancel_all_orders(self, **kwargs: Any) -> None:
+        """Cancel all open orders."""
+        for trade in (await self._open_orders()).list():
+            await self._throttle("cancelOrder")
+            self.ib.cancelOrder(trade.order)
+
+    async def _open_orders(self) -> OpenOrderIndex:
+        """Get the index of the open orders, seeding it if it is not synced."""
+        if not self.open_order_index.synced:
+            await self.single_flight.do("open_orders", self._seed_open_orders)
+        return self.open_order_index
+
+    async def _seed_open_orders(self) -> None:
+        """Seed the index of the open orders with a snapshot of the gateway."""
+        # The request returns orders, their trades are kept by ib_insync
+        await self._request("reqAllOpenOrdersAsync")
+        self.open_order_index.seed(self.ib.openTrades())
+
+    async def _open_trade(self, order_id: str) -> ibin.Trade:
+        """Get the trade of an open order by its permId.
+
+        Args:
+            order_id (str): The permId of the order.
+
+        Returns:
+            ibin.Trade: The trade.
+
+        Raises:
+            TradingApiError: If there is no open order with the permId.
+        """
+        trade = (await self._open_orders()).get(int(order_id))
+        if trade is None:
+            raise TradingApiError(f"Order {order_id} doesn't exist.")
+        return trade
+
+    @coalesce
+    @instrument
+    async def list_positions(self, **kwargs: Any) -> List[DomainPosition]:
+        """Get a list of open positions."""
+        await self.connect()
+        return IbPositionMapper.instance().map_list(self.position_index.list())
+
+    @coalesce
+    @instrument
+    async def get_position(self, symbol: str, **kwargs: Any) -> DomainPosition:
         """Get an open position for a symbol."""
-        positions = self.list_positions()
+        return IbPositionMapper.instance().map(await self._position(symbol))
 
-        for x in positions:
-            if x["contract"]["symbol"] == symbol:
-                position = x
+    async def _position(self, symbol: str) -> IbPosition:
+        """Get the position of a symbol.
 
-        if "position" not in locals():
-            print("Position for symbol doesn't exist!")
-            position = {}
+        Args:
+            symbol (str): The symbol.
+
+        Returns:
+            IbPosition: The position or portfolio item.
 
+        Raises:
+            TradingApiError: If there is no position for the symbol.
+        """
+        await self.connect()
+        position = self.position_index.get_by_symbol(symbol)
+        if position is None:
+            raise TradingApiError(f"Position for {symbol} doesn't exist.")
         return position
 
-    def close_position(self, symbol: str, **kwargs: Any) -> Dict:
+    @instrument
+    async def close_position(self, symbol: str, **kwargs: Any) -> DomainOrder:
         """Liquidates the position for the given symbol at market price."""
-        for x in range(0, len(self.ib.positions())):
-            if self.ib.positions()[x].contract.symbol == symbol:
-                old_contract = self.ib.positions()[x].contract
-                position = self.ib.positions()[x].position
+        position = await self._position(symbol)
+        (contract,) = await self.qualify(position.contract)
+        return await self._close(position, contract)
+
+    @instrument
+    async def close_all_positions(self, **kwargs: Any) -> List[ClosedPosition]:
+        """Liquidates all open positions at market price."""
+        await self.connect()
+        positions = self.position_index.list()
+        contracts = await self._qualify([p.contract for p in positions])
+        results = await asyncio.gather(
+            *[self._close(p, c) for p, c in zip(positions, contracts)],
+            return_exceptions=True,
+        )
+
+        closed_positions = []
+        for position, contract, result in zip(positions, contracts, results):
+            closed_position = ClosedPosition()
+            closed_position.symbol = position.contract.symbol
+            if isinstance(result, DomainOrder):
+                closed_position.http_status_code = 200
+                closed_position.order = result
+                closed_position.error = None
+            elif isinstance(result, Exception):
+                status_code = 404 if contract is None else _status_code(result)
+                closed_position.http_status_code = status_code
+                closed_position.order = None
+                closed_position.error = _closed_position_error(
+                    position, status_code, result
+                )
+            else:
+                raise result  # E.g. CancelledError
+            closed_positions.append(closed_position)
+        return closed_positions
 
-        if "position" not in locals():
-            print("Position for symbol doesn't exist!")
-            return {}
+    async def _close(
+        self, position: IbPosition, contract: Optional[ibin.Contract]
+    ) -> DomainOrder:
+        """Place a market order flattening a position.
 
-        # Define sell contract according to current contract/position
-        new_contract = ibin.Stock(conId=old_contract.conId)
-        self.ib.qualifyContracts(new_contract)  # Validates the contract
+        Args:
+            position (IbPosition): The position.
+            contract (ibin.Contract, optional): The qualified contract of the
+                position, None if it could not be qualified.
 
-        # Place an order using a contract and order object.
-        order = ibin.MarketOrder("SELL", position)
-        trade = self.ib.placeOrder(contract=new_contract, order=order)
-        assert order in self.ib.orders()
+        Returns:
+            DomainOrder: The placed order.
 
-        return trade.__dict__
+        Raises:
+            TradingApiError: If the contract is unknown.
+        """
+        if contract is None:
+            raise TradingApiError(f"Unknown contract {position.contract}.")
 
-    def close_all_positions(self, **kwargs: Any) -> List[Dict]:
-        """Liquidates all open positions at market price."""
-        closed_positions = []
-        for x in range(0, len(self.ib.positions())):
-            old_contract = self.ib.positions()[x].contract
-            position = self.ib.positions()[x].position
+        domain_order = DomainOrder(position.contract.symbol)
+        domain_order.qty = quantity(abs(position.position))
+        domain_order.side = OrderSide.SELL if position.position > 0 else OrderSide.BUY
+        return await self._place_order(contract, domain_order)
 
-            if "position" not in locals():
-                print("No positions to close!")
-                return [{}]
+    async def qualify(self, *contracts: ibin.Contract) -> List[ibin.Contract]:
+        """Get the qualified versions of contracts, from the cache if possible.
 
-            # Define sell contract according to current contract/position
-            new_contract = ibin.Stock(conId=old_contract.conId)
-            self.ib.qualifyContracts(new_contract)  # Validates the contract
+        The contracts missing from the cache are qualified in one batch and
+        added to the cache. Contracts are looked up by conId if they have one,
+        otherwise by symbol, exchange and currency.
 
-            # Place an order using a contract and order object.
-            order = ibin.order.MarketOrder("SELL", position)
-            trade = self.ib.placeOrder(new_contract, order)
+        Args:
+            *contracts (ibin.Contract): The contracts.
 
-            closed_positions.append(trade.__dict__)
+        Returns:
+            List[ibin.Contract]: The qualified contracts, in the same order.
 
-        return closed_positions
+        Raises:
+            TradingApiError: If a contract is unknown or ambiguous.
+        """
+        qualified = await self._qualify(contracts)
+        for contract, qualified_contract in zip(contracts, qualified):
+            if qualified_contract is None:
+                raise TradingApiError(f"Unknown contract {contract}.")
+        return qualified  # type: ignore
+
+    async def _qualify(
+        self, contracts: Sequence[ibin.Contract]
+    ) -> List[Optional[ibin.Contract]]:
+        """Get the qualified versions of contracts, None for unknown contracts."""
+        qualified = [self.contract_cache.get(contract) for contract in contracts]
+        missing = [i for i, cached in enumerate(qualified) if cached is None]
+        if not missing:
+            return qualified
+
+        # Qualified in place by ib_insync, so copies are qualified instead
+        copies = [
+            ibin.Contract.create(**ibin.util.dataclassNonDefaults(contracts[i]))
+            for i in missing
+        ]
+        found = await self._request("qualifyContractsAsync", *copies)
+        self.contract_cache.add(found)
+
+        found_ids = {id(contract) for contract in found}
+        for i, copy in zip(missing, copies):
+            if id(copy) in found_ids:
+                qualified[i] = copy
+        return qualified
+
+
+def _status_code(error: Exception) -> int:
+    """Get the HTTP status code reporting an error of closing a position.
+
+    Args:
+        error (Exception): The error.
+
+    Returns:
+        int: 422 for rejected or unacknowledged orders, 500 for other errors.
+    """
+    if isinstance(error, TradingApiHttpError):
+        return error.http_status_code
+    if isinstance(error, TradingApiError):
+        return 422
+    return 500
+
+
+def _closed_position_error(
+    position: IbPosition, status_code: int, error: Exception
+) -> ClosedPositionError:
+    """Create the error of a position that could not be closed.
+
+    IB does not report the quantity held for open orders, so all of the position
+    is reported as available.
+
+    Args:
+        position (IbPosition): The position.
+        status_code (int): The HTTP status code reporting the error.
+        error (Exception): The error.
+
+    Returns:
+        ClosedPositionError: The error.
+    """
+    qty = quantity(abs(position.position))
+    closed_position_error = ClosedPositionError()
+    closed_position_error.available = qty
+    closed_position_error.code = status_code
+    closed_position_error.existing_qty = qty
+    closed_position_error.held_for_orders = 0
+    closed_position_error.message = str(error)
+    closed_position_error.symbol = position.contract.symbol
+    return closed_position_error
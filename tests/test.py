@@ -1,13 +1,42 @@
+import asyncio
+import json
+import os
+import tempfile
+import threading
+import time
 import unittest
-from datetime import datetime
+from datetime import date, datetime, time as dt_time, timedelta, timezone
 from unittest.mock import Mock
 
 import aiounittest
+import ib_insync as ibin
+import numpy as np
+import pandas as pd
+import requests
+from aiohttp import ClientSession, web
+from alpaca_trade_api.entity import Clock, Order
+from alpaca_trade_api.rest import APIError
 from testfixtures import compare
 
 import testhelpers.data_helper as dh
-from domainmodels.order import OrderSide, Type as OrderType
-from tradingapi.alpaca.alpaca_api import AlpacaApi
+from testhelpers.fake_gateway import ACCOUNT, FakeGateway, fake_ib, stock
+from analytics.calendar_index import CalendarIndex, Session
+from analytics.portfolio import Portfolio
+from caches.calendar_store import CalendarStore
+from caches.clock_cache import ClockCache
+from caches.contract_cache import ContractCache
+from caches.order_store import OrderStore
+from domainmodels.account import Status
+from domainmodels.order import DomainOrder, OrderSide, TimeInForce, Type as OrderType
+from domainmodels.position import DomainPosition, Exchange, PositionSide
+from helpers.rate_limiter import RateLimiter
+from helpers.recorder import Recorder, read_recording
+from helpers.timestamps import to_date, to_datetime, to_time
+from tradingapi.alpaca.alpaca_api import AlpacaApi, Transport
+from tradingapi.base.base_api import BaseApi
+from tradingapi.base.exceptions import TradingApiError, TradingApiHttpError
+from tradingapi.base.instrumentation import serve_metrics
+from tradingapi.ib.ib_api import IbApi
 
 
 class AlpacaTests(aiounittest.AsyncTestCase):
@@ -68,6 +97,128 @@ class AlpacaTests(aiounittest.AsyncTestCase):
         expected_order = dh.import_expected_submit_order()
         compare(order, expected_order, prefix="Expected order object is different.")
 
+    async def test_submit_orders_ok(self):
+        """Test that a batch is submitted concurrently and failures are isolated."""
+        lock = threading.Lock()
+        in_flight = [0, 0]  # current, maximum
+        api_order = dh.import_api_submit_order()
+
+        def submit_order(symbol, **kwargs):
+            with lock:
+                in_flight[0] += 1
+                in_flight[1] = max(in_flight[1], in_flight[0])
+            time.sleep(0.05)
+            with lock:
+                in_flight[0] -= 1
+            if symbol == "FAIL":
+                raise ValueError("rejected")
+            return api_order
+
+        self.alpaca_api.api.submit_order.side_effect = submit_order
+        orders = []
+        for symbol in ["TSLA", "FAIL", "TSLA", "TSLA", "TSLA", "TSLA"]:
+            order = DomainOrder(symbol)
+            order.qty = 1
+            orders.append(order)
+
+        results = await self.alpaca_api.submit_orders(orders, max_concurrency=3)
+
+        assert len(results) == len(orders)
+        assert isinstance(results[1], TradingApiError)
+        assert all(isinstance(r, DomainOrder) for i, r in enumerate(results) if i != 1)
+        assert 1 < in_flight[1] <= 3
+
+    async def test_rate_limiter_ok(self):
+        """Test that bursts above the bucket size are delayed locally."""
+        self.alpaca_api.rate_limiter = RateLimiter(rate=100, burst=2)
+        self.alpaca_api.api.get_order.return_value = dh.import_api_get_order()
+
+        await asyncio.gather(*[self.alpaca_api.get_order(str(i)) for i in range(5)])
+
+        assert self.alpaca_api.rate_limiter.calls == 5
+        assert self.alpaca_api.rate_limiter.throttled_calls == 3
+        assert abs(self.alpaca_api.rate_limiter.throttled_time - 0.06) < 0.01
+
+    async def test_instrumentation_ok(self):
+        """Test the per-method latency histograms, error counts and call hooks."""
+        self.alpaca_api.rate_limiter = RateLimiter(rate=100, burst=1)
+        self.alpaca_api.api.list_positions.return_value = dh.import_api_list_positions()
+        not_found = requests.Response()
+        not_found.status_code, not_found.reason = 404, "Not Found"
+        not_found._content = b'{"code": 40410000, "message": "order not found"}'
+        self.alpaca_api.api.get_order.side_effect = APIError(
+            json.loads(not_found.content), requests.HTTPError(response=not_found)
+        )
+        calls, records = [], []
+        self.alpaca_api.instrumentation.pre_call_hooks.append(lambda r: calls.append(r.method))
+        self.alpaca_api.instrumentation.post_call_hooks.append(records.append)
+
+        await self.alpaca_api.list_positions()
+        await self.alpaca_api.list_positions()
+        with self.assertRaises(TradingApiHttpError):
+            await self.alpaca_api.get_order("unknown")
+
+        assert calls == ["list_positions", "list_positions", "get_order"]
+        assert records[1].throttle > 0.005
+        assert records[1].total >= records[1].throttle + records[1].network
+        assert len(records[1].result) == 2
+        # The errors of the sdk are raised like those of the aiohttp transport
+        assert records[2].error.http_status_code == 404
+        assert "order not found" in records[2].error.message
+
+        snapshot = self.alpaca_api.instrumentation.snapshot()
+        positions = snapshot["list_positions"]
+        assert positions.calls == 2 and positions.errors == {}
+        assert positions.latency["total"].max == max(r.total for r in records[:2])
+        assert positions.latency["throttle"].percentile(99) > 0.005
+        assert positions.latency["executor_wait"].count == 2
+        assert snapshot["get_order"].errors == {"404": 1}
+
+        runner = await serve_metrics(self.alpaca_api.instrumentation, port=8768)
+        try:
+            async with ClientSession() as session:
+                async with session.get("http://127.0.0.1:8768/metrics") as resp:
+                    metrics = await resp.text()
+        finally:
+            await runner.cleanup()
+        assert "# TYPE tradingapi_call_seconds summary" in metrics
+        assert 'tradingapi_call_seconds_count{method="list_positions",phase="network"} 2' in metrics
+        assert 'tradingapi_call_errors_total{method="get_order",status="404"} 1' in metrics
+
+    async def test_coalesce_reads_ok(self):
+        """Test that identical concurrent reads share one broker request."""
+
+        def get_clock():
+            time.sleep(0.05)
+            return dh.import_api_get_clock()
+
+        self.alpaca_api.api.get_clock.side_effect = get_clock
+
+        clocks = await asyncio.gather(*[self.alpaca_api.get_clock() for _ in range(5)])
+
+        assert self.alpaca_api.api.get_clock.call_count == 1
+        assert all(clock is clocks[0] for clock in clocks)
+        assert self.alpaca_api.single_flight.calls == 5
+        assert self.alpaca_api.single_flight.merged == 4
+
+    async def test_clock_cache_ok(self):
+        """Test that the cached clock is advanced locally until it expires."""
+        with open("tests/data/get_clock/api_get_clock.json", "r") as d:
+            self.alpaca_api.api.get_clock.return_value = Clock(json.loads(d.read()))
+        self.alpaca_api.clock_cache = ClockCache(ttl=0.1)
+
+        fetched_clock = await self.alpaca_api.get_clock()
+        cached_clock = await self.alpaca_api.get_clock()
+
+        assert self.alpaca_api.api.get_clock.call_count == 1
+        assert cached_clock.is_open
+        assert cached_clock.next_close == fetched_clock.next_close
+        assert cached_clock.timestamp > fetched_clock.timestamp
+
+        await asyncio.sleep(0.1)
+        await self.alpaca_api.get_clock()
+        assert self.alpaca_api.api.get_clock.call_count == 2
+
     async def test_get_order_ok(self):
         """Test the get order method."""
         order_id = "4d14a279-275b-4e28-8303-1a8f26b1ff51"
@@ -83,6 +234,100 @@ class AlpacaTests(aiounittest.AsyncTestCase):
         expected_orders = dh.import_expected_list_orders()
         compare(orders, expected_orders, prefix="Expected orders object is different.")
 
+    async def test_lazy_orders_ok(self):
+        """Test that lazy orders map their fields on access like eager ones."""
+        lazy_api = AlpacaApi(self.api_settings, lazy=True)
+        lazy_api.api = self.alpaca_api.api
+        self.alpaca_api.api.list_orders.return_value = dh.import_api_list_orders()
+        orders = await lazy_api.list_orders()
+        expected_orders = dh.import_expected_list_orders()
+
+        assert all(isinstance(order, DomainOrder) for order in orders)
+        assert orders[0].symbol == expected_orders[0].symbol
+        assert orders[0].side is expected_orders[0].side
+        compare([order.__dict__ for order in orders], [order.__dict__ for order in expected_orders])
+
+        # Assigned fields replace the raw fields
+        orders[0].qty = 2
+        assert orders[0].qty == 2 and orders[0].__dict__ != expected_orders[0].__dict__
+        await lazy_api.close()
+
+    async def test_iter_orders_ok(self):
+        """Test that iter_orders pages through the orders with until."""
+        api_orders = dh.import_api_list_orders()
+
+        # Batch submitted orders share their timestamp
+        twin_order = Order(None)
+        twin_order.__dict__ = {"_raw": dict(api_orders[0]._raw, id="twin", client_order_id="twin")}
+        api_orders.insert(1, twin_order)
+
+        def list_orders(until=None, **kwargs):
+            remaining = [o for o in api_orders if until is None or o.submitted_at < pd.Timestamp(until)]
+            return remaining[:kwargs["limit"]]
+
+        self.alpaca_api.api.list_orders.side_effect = list_orders
+        orders = [order async for order in self.alpaca_api.iter_orders(page_size=2)]
+        assert [o.id for o in orders] == [o.id for o in api_orders]
+
+        # Pages of one order are widened to get past their own boundary
+        del api_orders[1]
+        orders = [order async for order in self.alpaca_api.iter_orders(page_size=1)]
+        expected_orders = dh.import_expected_list_orders()
+        compare(orders, expected_orders, prefix="Expected orders object is different.")
+
+    async def test_iter_orders_default_page_ok(self):
+        """Test that APIs without paging yield one list_orders page."""
+        ib_api = IbApi({}, ib=fake_ib(FakeGateway()))
+        try:
+            orders = [order async for order in ib_api.iter_orders(status="open")]
+        finally:
+            await ib_api.close()
+        assert [o.symbol for o in orders] == ["MSFT", "AAPL"]
+
+    async def test_seed_open_orders_ok(self):
+        """Test that the order store is seeded with all open orders, page by page."""
+        start = pd.Timestamp("2022-03-16T18:00:00Z")
+        api_orders = [
+            Order({"id": str(i), "submitted_at": (start + pd.Timedelta(seconds=i // 2)).isoformat()})
+            for i in range(1200, 0, -1)
+        ]
+
+        def list_orders(until=None, **kwargs):
+            remaining = [o for o in api_orders if until is None or o.submitted_at < pd.Timestamp(until)]
+            return remaining[:kwargs["limit"]]
+
+        self.alpaca_api.api.list_orders.side_effect = list_orders
+        orders = await self.alpaca_api._list_raw_open_orders()
+        assert sorted(o.id for o in orders) == sorted(o.id for o in api_orders)
+        assert self.alpaca_api.api.list_orders.call_count == 3
+
+    async def test_iter_orders_shared_timestamp_ok(self):
+        """Test that paging gets past more than a maximum page of one timestamp."""
+        raw = dh.import_api_list_orders()[0]._raw
+        start = pd.Timestamp("2022-03-16T18:00:00Z")
+        batch_at = (start + pd.Timedelta(hours=1)).isoformat()
+        api_orders = [Order(dict(raw, id=f"batch{i}", submitted_at=batch_at)) for i in range(600)] + [
+            Order(dict(raw, id=str(i), submitted_at=(start + pd.Timedelta(seconds=i)).isoformat()))
+            for i in range(100, 0, -1)
+        ]
+        limits = []
+
+        def list_orders(until=None, **kwargs):
+            limits.append(kwargs["limit"])
+            if kwargs["limit"] > 500:
+                raise TradingApiHttpError(422, "Unprocessable Entity", "invalid limit")
+            remaining = [o for o in api_orders if until is None or o.submitted_at < pd.Timestamp(until)]
+            return remaining[:kwargs["limit"]]
+
+        self.alpaca_api.api.list_orders.side_effect = list_orders
+        orders = [order async for order in self.alpaca_api.iter_orders(page_size=200)]
+        seeded = await self.alpaca_api._list_raw_open_orders()
+
+        # Alpaca can not page within a timestamp, the batch is cut at 500 orders
+        assert [o.id for o in orders] == [o.id for o in api_orders[:500] + api_orders[600:]]
+        assert sorted(o.id for o in seeded) == sorted(o.id for o in orders)
+        assert max(limits) == 500
+
     async def test_cancel_order_ok(self):
         """Test the cancel order method."""
         self.alpaca_api.api.cancel_order.return_value = None
@@ -108,6 +353,50 @@ class AlpacaTests(aiounittest.AsyncTestCase):
         expected_positions = dh.import_expected_list_positions()
         compare(positions, expected_positions, prefix="Expected positions object is different.")
 
+    async def test_list_frames_ok(self):
+        """Test that positions and orders are returned as typed columns."""
+        self.alpaca_api.api.list_positions.return_value = dh.import_api_list_positions()
+        self.alpaca_api.api.list_orders.return_value = dh.import_api_list_orders()
+        expected_positions = dh.import_expected_list_positions()
+        expected_orders = dh.import_expected_list_orders()
+
+        positions = await self.alpaca_api.list_positions_frame()
+        assert list(positions["symbol"]) == [p.symbol for p in expected_positions]
+        assert list(positions["side"]) == [p.side for p in expected_positions]
+        assert positions["symbol"].dtype == "category"
+        assert positions["market_value"].dtype == np.float64
+        np.testing.assert_allclose(
+            positions["unrealized_pl"], [float(p.unrealized_pl) for p in expected_positions]
+        )
+
+        orders = await self.alpaca_api.list_orders_frame(status="all")
+        self.alpaca_api.api.list_orders.assert_called_with(
+            status="all", limit=50, after=None, until=None, direction=None
+        )
+        assert list(orders["id"]) == [o.id for o in expected_orders]
+        assert orders["status"].dtype == "category"
+        assert str(orders["submitted_at"].dtype) == "datetime64[ns, UTC]"
+
+        # The base implementation maps the domain objects
+        domain_positions = await BaseApi.list_positions_frame(self.alpaca_api)
+        compare(list(domain_positions["side"]), list(positions["side"]))
+        np.testing.assert_allclose(domain_positions["qty"], positions["qty"])
+
+    async def test_slotted_models_ok(self):
+        """Test that the domain models are slotted and still export their fields."""
+        self.alpaca_api.api.list_positions.return_value = dh.import_api_list_positions()
+        positions = await self.alpaca_api.list_positions()
+        assert not hasattr(positions[0], "__weakref__")
+        assert len({positions[0], positions[1]}) == 2  # Hashed by identity
+        with self.assertRaises(AttributeError):
+            positions[0].unknown_field = 1
+
+        # __dict__ exports the fields and assigning it sets them
+        copied = DomainPosition()
+        copied.__dict__ = positions[0].__dict__
+        compare(copied, positions[0], prefix="Expected position object is different.")
+        assert json.loads(json.dumps(copied.__dict__))["symbol"] == positions[0].symbol
+
     async def test_close_position_ok(self):
         """Test the close position method."""
         self.alpaca_api.api.close_position.return_value = dh.import_api_close_position()
@@ -131,6 +420,495 @@ class AlpacaTests(aiounittest.AsyncTestCase):
         expected_trading_days = dh.import_expected_get_trading_days()
         compare(trading_days, expected_trading_days, prefix="Expected trading days object is different.")
 
+    async def test_calendar_store_ok(self):
+        """Test that only the dates missing from the calendar store are fetched."""
+        self.alpaca_api.api.get_calendar.return_value = dh.import_api_get_trading_days()
+        expected_trading_days = dh.import_expected_get_trading_days()
+
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            path = os.path.join(tmp_dir, "calendar.json")
+            self.alpaca_api.calendar_store = CalendarStore(path)
+
+            await self.alpaca_api.get_trading_days(datetime(2022, 3, 1), datetime(2022, 3, 10))
+            trading_days = await self.alpaca_api.get_trading_days(
+                datetime(2022, 3, 1), datetime(2022, 3, 15)
+            )
+            self.alpaca_api.api.get_calendar.assert_called_with("2022-03-11", "2022-03-15")
+            assert self.alpaca_api.api.get_calendar.call_count == 2
+            compare(trading_days, expected_trading_days, prefix="Expected trading days object is different.")
+
+            # A new store is loaded from disk and knows the whole range
+            reloaded_trading_days = CalendarStore(path).get(date(2022, 3, 1), date(2022, 3, 15))
+            compare(reloaded_trading_days, expected_trading_days, prefix="Expected trading days object is different.")
+            assert CalendarStore(path).missing_ranges(date(2022, 3, 1), date(2022, 3, 15)) == []
+
+    async def test_calendar_index_ok(self):
+        """Test the vectorized calendar queries."""
+        index = CalendarIndex(dh.import_expected_get_trading_days())
+        timestamps = np.array([
+            "2022-03-01T09:29", "2022-03-01T09:30", "2022-03-01T16:00", "2022-03-05T12:00",
+        ], "datetime64[ns]")
+
+        assert index.is_open(timestamps).tolist() == [False, True, False, False]
+        assert index.session_of(timestamps).tolist() == [
+            Session.PRE_MARKET, Session.OPEN, Session.AFTER_HOURS, Session.CLOSED
+        ]
+        assert index.day_index(timestamps).tolist() == [0, 0, 0, -1]
+        assert index.next_open(timestamps)[3] == np.datetime64("2022-03-07T09:30")
+
+    async def test_portfolio_ok(self):
+        """Test the vectorized portfolio analytics."""
+        portfolio = Portfolio(
+            symbols=["AAPL", "TSLA", "MSFT"],
+            side=["long", "short", "long"],
+            market_value=[600.0, -300.0, 100.0],
+            cost_basis=[500.0, -350.0, 150.0],
+            unrealized_pl=[100.0, 50.0, -50.0],
+            unrealized_intraday_pl=[10.0, -5.0, 0.0],
+        )
+
+        assert portfolio.gross_exposure == 1000.0
+        assert portfolio.net_exposure == 400.0
+        assert portfolio.long_market_value == 700.0
+        assert portfolio.short_market_value == -300.0
+        np.testing.assert_allclose(portfolio.weights, [0.6, -0.3, 0.1])
+        assert portfolio.total_unrealized_pl == 100.0
+        assert portfolio.unrealized_plpc == 0.1
+        assert portfolio.top_symbols(2) == ["AAPL", "TSLA"]
+        assert abs(portfolio.concentration(2) - 0.9) < 1e-12
+
+        # From a list_positions_frame snapshot
+        self.alpaca_api.api.list_positions.return_value = dh.import_api_list_positions()
+        positions = await self.alpaca_api.list_positions_frame()
+        portfolio = Portfolio.from_frame(positions)
+        assert abs(portfolio.gross_exposure - positions["market_value"].sum()) < 1e-9
+        assert abs(portfolio.concentration(len(positions)) - 1.0) < 1e-12
+
+    async def test_timestamps_ok(self):
+        """Test the fast timestamp conversion and its fallbacks."""
+        utc = timezone.utc
+        assert to_datetime("2022-03-16T18:41:54.63257Z") == datetime(2022, 3, 16, 18, 41, 54, 632570, utc)
+        assert to_datetime("2022-02-02T14:04:00.627228047-05:00") == datetime(
+            2022, 2, 2, 14, 4, 0, 627228, timezone(-timedelta(hours=5))
+        )
+        assert to_datetime("2022-03-01 09:30:00") == datetime(2022, 3, 1, 9, 30)
+        assert to_datetime(pd.Timestamp("2022-03-01T09:30:00.000000001Z")) == datetime(2022, 3, 1, 9, 30, tzinfo=utc)
+        assert to_datetime("March 1 2022 9:30") == datetime(2022, 3, 1, 9, 30)
+        assert to_datetime(None) is None
+        assert to_date("2022-03-01") == date(2022, 3, 1)
+        assert to_time("0930") == to_time("09:30") == dt_time(9, 30)
+
+        # Repeated values are served from the cache
+        assert to_time("16:00") is to_time("16:00")
+
+    async def test_executor_stats_ok(self):
+        """Test that sdk calls run on the dedicated executor and are counted."""
+        thread_names = []
+
+        def get_clock():
+            thread_names.append(threading.current_thread().name)
+            return dh.import_api_get_clock()
+
+        self.alpaca_api.api.get_clock.side_effect = get_clock
+        await self.alpaca_api.get_clock()
+        stats = self.alpaca_api.executor.stats()
+
+        assert thread_names[0].startswith("AlpacaApi")
+        assert stats.completed == 1
+        assert stats.queue_depth == 0
+        assert stats.in_flight == 0
+        assert stats.wait_time_max >= 0
+
+    async def test_record_replay_ok(self):
+        """Test that recorded responses are replayed by the replay transport."""
+        order_id = "4d14a279-275b-4e28-8303-1a8f26b1ff51"
+        self.alpaca_api.api.get_order.return_value = dh.import_api_get_order()
+        self.alpaca_api.api.list_orders.return_value = dh.import_api_list_orders()
+        self.alpaca_api.api.submit_order.return_value = dh.import_api_submit_order()
+        self.alpaca_api.api.cancel_order.return_value = None
+
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            path = os.path.join(tmp_dir, "responses.jsonl")
+            self.alpaca_api.recorder = Recorder(path, max_bytes=1, backup_count=10)
+            await self.alpaca_api.get_order(order_id)
+            await self.alpaca_api.list_orders()
+            await self.alpaca_api.submit_order("TSLA", 1, OrderSide.BUY)
+            await self.alpaca_api.cancel_order(order_id)
+            await self.alpaca_api.close()
+
+            # Every batch exceeds max_bytes, the rotated files are read oldest first.
+            # Queued records are written in one batch, so the number of files varies
+            methods = [r["method"] for r in read_recording(path)]
+            assert len(os.listdir(tmp_dir)) >= 2
+            assert methods == ["get_order", "list_orders", "submit_order", "cancel_order"]
+
+            replay_api = AlpacaApi(self.api_settings, transport=Transport.REPLAY, replay=path)
+            order = await replay_api.get_order(order_id)
+            orders = await replay_api.list_orders()
+            submitted = await replay_api.submit_order("TSLA", 1, OrderSide.BUY)
+            await replay_api.cancel_order(order_id)
+            await replay_api.close()
+
+        compare(order, dh.import_expected_get_order(), prefix="Expected order object is different.")
+        compare(orders, dh.import_expected_list_orders(), prefix="Expected orders object is different.")
+        compare(submitted, dh.import_expected_submit_order(), prefix="Expected order object is different.")
+        with self.assertRaises(TradingApiError):
+            await replay_api.get_position("AAPL")
+
+
+class AlpacaAiohttpTests(aiounittest.AsyncTestCase):
+    port = 8766
+    api_settings = {
+        "APCA_API_KEY_ID": "key",
+        "APCA_API_SECRET_KEY": "secret",
+        "APCA_API_BASE_URL": f"http://127.0.0.1:{port}",
+        "APCA_RETRY_MAX": "0"
+    }
+
+    async def test_get_order_ok(self):
+        """Test the get order method over the aiohttp transport."""
+        with open("tests/data/get_order/api_get_order.json", "r") as d:
+            raw_order = json.loads(d.read())["_raw"]
+
+        async def get_order(request):
+            assert request.headers["APCA-API-KEY-ID"] == "key"
+            return web.json_response(raw_order)
+
+        app = web.Application()
+        app.router.add_get("/v2/orders/{order_id}", get_order)
+        runner = web.AppRunner(app)
+        await runner.setup()
+        await web.TCPSite(runner, "127.0.0.1", self.port).start()
+
+        try:
+            alpaca_api = AlpacaApi(self.api_settings, transport=Transport.AIOHTTP)
+            order = await alpaca_api.get_order(raw_order["id"])
+            await alpaca_api.close()
+        finally:
+            await runner.cleanup()
+
+        expected_order = dh.import_expected_get_order()
+        compare(order, expected_order, prefix="Expected order object is different.")
+
+
+class AlpacaOrderStreamTests(aiounittest.AsyncTestCase):
+    port = 8767
+    api_settings = {
+        "APCA_API_KEY_ID": "key",
+        "APCA_API_SECRET_KEY": "secret",
+        "APCA_API_BASE_URL": f"http://127.0.0.1:{port}",
+        "APCA_RETRY_MAX": "0"
+    }
+
+    async def test_order_stream_ok(self):
+        """Test that orders are served from the store fed by a local stream."""
+        api_orders = dh.import_api_list_orders()
+        filled_order = dict(api_orders[0]._raw, status="filled", updated_at="2022-03-16T18:42:00Z")
+
+        async def stream(request):
+            ws = web.WebSocketResponse()
+            await ws.prepare(request)
+            assert (await ws.receive_json())["action"] == "authenticate"
+            await ws.send_json({"stream": "authorization", "data": {"status": "authorized"}})
+            assert (await ws.receive_json())["action"] == "listen"
+            await ws.send_json({"stream": "listening", "data": {"streams": ["trade_updates"]}})
+            await ws.send_json({"stream": "trade_updates", "data": {"event": "fill", "order": filled_order}})
+            await ws.receive()
+            return ws
+
+        app = web.Application()
+        app.router.add_get("/stream", stream)
+        runner = web.AppRunner(app)
+        await runner.setup()
+        await web.TCPSite(runner, "127.0.0.1", self.port).start()
+
+        alpaca_api = AlpacaApi(self.api_settings)
+        alpaca_api.api = Mock()
+        alpaca_api.api.list_orders.return_value = api_orders
+        filled = asyncio.Event()
+        try:
+            await alpaca_api.start_order_stream()
+            alpaca_api.order_store.listeners.append(
+                lambda status, order: status == "filled" and filled.set()
+            )
+            await asyncio.wait_for(filled.wait(), 5)
+
+            open_orders = await alpaca_api.list_orders()
+            order = await alpaca_api.get_order(filled_order["id"])
+        finally:
+            await alpaca_api.close()
+            await runner.cleanup()
+
+        assert alpaca_api.api.list_orders.call_count == 1  # Only the seed
+        alpaca_api.api.get_order.assert_not_called()
+        assert [o.id for o in open_orders] == [o.id for o in api_orders[1:]]
+        assert order.id == filled_order["id"]
+
+    async def test_order_store_eviction_ok(self):
+        """Test that closed orders are evicted and then requested from the api."""
+        api_orders = dh.import_api_list_orders()
+        alpaca_api = AlpacaApi(self.api_settings)
+        alpaca_api.api = Mock()
+        alpaca_api.api.get_order.return_value = api_orders[0]
+        alpaca_api.order_store = store = OrderStore(max_closed=2)
+        store.synced = True
+        try:
+            for i, status in enumerate(["filled", "new", "canceled", "expired"]):
+                store.update(Order(dict(api_orders[0]._raw, id=str(i), status=status)))
+            evicted = await alpaca_api.get_order("0")
+        finally:
+            await alpaca_api.close()
+
+        assert [store.get_status(str(i)) for i in range(4)] == [None, "new", "canceled", "expired"]
+        assert len(store._updated_at) == len(store._submitted_at) == 3
+        alpaca_api.api.get_order.assert_called_once_with(order_id="0")
+        assert evicted.id == api_orders[0].id
+
+
+class IbTests(aiounittest.AsyncTestCase):
+    api_settings = {"IB_PORT": "4002", "IB_CLIENT_ID": "13", "IB_ACCOUNT": ACCOUNT}
+
+    def setUp(self) -> None:
+        self.gateway = FakeGateway()
+        self.ib = fake_ib(self.gateway)
+        self.ib_api = IbApi(self.api_settings, ib=self.ib, submit_timeout=1)
+
+    async def test_ib_api_ok(self):
+        """Test the interactive brokers api against a fake gateway."""
+        try:
+            account, clock, trading_days, positions, orders = await asyncio.gather(
+                self.ib_api.get_account(),
+                self.ib_api.get_clock(),
+                self.ib_api.get_trading_days(datetime(2022, 3, 17), datetime(2022, 3, 20)),
+                self.ib_api.list_positions(),
+                self.ib_api.list_orders(),
+            )
+            assert self.ib.client.requests["connect"] == 1  # Connected once
+
+            assert account.account_number == ACCOUNT
+            assert account.equity == 101234.56 and account.sma == 52000
+            assert account.status == Status.ACTIVE
+
+            assert clock.is_open
+            assert clock.timestamp == datetime(2022, 3, 16, 15, 40, tzinfo=timezone.utc)
+            assert clock.next_close.isoformat() == "2022-03-16T16:00:00-04:00"
+            assert clock.next_open.isoformat() == "2022-03-17T09:30:00-04:00"
+            assert [d.date for d in trading_days] == [date(2022, 3, 17), date(2022, 3, 18)]
+
+            aapl = await self.ib_api.get_position("AAPL")
+            assert [p.symbol for p in positions] == ["AAPL", "TSLA"]
+            assert aapl.qty == 10 and aapl.side == PositionSide.LONG
+            assert aapl.exchange == Exchange.NASDAQ
+            assert aapl.market_value == 1605.0 and aapl.cost_basis == 1502.5
+            assert positions[1].side == PositionSide.SHORT
+
+            assert [(o.symbol, o.type) for o in orders] == [
+                ("MSFT", OrderType.LIMIT), ("AAPL", OrderType.STOP)
+            ]
+            order = await self.ib_api.get_order(orders[0].id)
+            assert order.limit_price == 280.0 and order.qty == 5
+
+            submitted = await self.ib_api.submit_order(
+                "TSLA", 1, OrderSide.BUY, type=OrderType.LIMIT, limit_price=700.0
+            )
+            assert submitted.id and submitted.limit_price == 700.0
+
+            await self.ib_api.cancel_order(orders[0].id)
+            await asyncio.sleep(0.01)
+            closed = await self.ib_api.list_orders(status="closed")
+            assert [o.id for o in closed] == [orders[0].id]
+
+            self.gateway.filled.update(["AAPL", "TSLA"])
+            closed_positions = await self.ib_api.close_all_positions()
+            assert [c.order.side for c in closed_positions] == [OrderSide.SELL, OrderSide.BUY]
+            assert self.gateway.positions == {}
+
+            self.gateway.rejected.add("MSFT")
+            with self.assertRaises(TradingApiError):
+                await self.ib_api.submit_order("MSFT", 1, OrderSide.BUY)
+            with self.assertRaises(TradingApiError):
+                await self.ib_api.get_position("NVDA")
+        finally:
+            await self.ib_api.close()
+
+    async def test_ib_order_types_ok(self):
+        """Test orders executing at the close and order types without equivalent."""
+        mit = self.gateway.add_order(stock(265598, "AAPL"), "SELL", 1, "MIT", 150.0)
+        self.gateway.add_order(stock(272093, "MSFT"), "BUY", 2, "MOC", 0.0)
+        try:
+            with self.assertLogs("tradingapi.ib.ib_api", "WARNING") as logs:
+                orders = await self.ib_api.list_orders()
+            with self.assertRaisesRegex(TradingApiError, "Unsupported order type MIT"):
+                await self.ib_api.get_order(str(mit.permId))
+            await self.ib_api.cancel_all_orders()
+            on_close = await self.ib_api.submit_order(
+                "TSLA", 1, OrderSide.BUY, type=OrderType.LIMIT,
+                time_in_force=TimeInForce.MARKET_ON_CLOSE, limit_price=700.0,
+            )
+            on_close_type = self.ib.trades()[-1].order.orderType
+            with self.assertRaises(TradingApiError):
+                await self.ib_api.submit_order(
+                    "TSLA", 1, OrderSide.BUY, type=OrderType.STOP,
+                    time_in_force=TimeInForce.MARKET_ON_CLOSE, stop_price=900.0,
+                )
+        finally:
+            await self.ib_api.close()
+
+        # Orders without equivalent are skipped, but still cancelled
+        assert [(o.type, o.time_in_force) for o in orders[2:]] == [
+            (OrderType.MARKET, TimeInForce.MARKET_ON_CLOSE)
+        ]
+        assert f"Skipped order {mit.permId}" in logs.output[0]
+        assert self.ib.client.requests["cancelOrder"] == 4
+        assert on_close_type == "LOC"
+        assert on_close.time_in_force == TimeInForce.MARKET_ON_CLOSE
+
+    async def test_ib_close_all_positions_errors_ok(self):
+        """Test that positions that can not be closed are reported per position."""
+        try:
+            await self.ib_api.connect()
+            self.ib.wrapper.position(ACCOUNT, stock(999, "DELISTED"), 4.0, 1.0)
+            self.gateway.filled.add("AAPL")
+            self.gateway.rejected.add("TSLA")
+            closed_positions = await self.ib_api.close_all_positions()
+        finally:
+            await self.ib_api.close()
+
+        compare(
+            [(c.symbol, c.http_status_code) for c in closed_positions],
+            [("AAPL", 200), ("TSLA", 422), ("DELISTED", 404)],
+        )
+        assert closed_positions[0].order.side == OrderSide.SELL
+        assert closed_positions[1].order is None
+        assert "Insufficient margin" in closed_positions[1].error.message
+        assert closed_positions[2].error.existing_qty == 4
+        assert 265598 not in self.gateway.positions  # Closed despite the errors
+
+    async def test_ib_position_index_ok(self):
+        """Test that positions are served from the index fed by gateway updates."""
+        try:
+            positions = await self.ib_api.list_positions()
+            aapl = self.gateway.contracts[265598]
+            self.ib.wrapper.updatePortfolio(aapl, 10.0, 170.0, 1700.0, 150.25, 197.5, 0.0, ACCOUNT)
+            self.ib.wrapper.position(ACCOUNT, self.gateway.contracts[76792991], 0.0, 0.0)
+            self.ib.wrapper.position("DU7654321", self.gateway.contracts[272093], 1.0, 280.0)
+
+            aapl_position = await self.ib_api.get_position("AAPL")
+            updated_positions = await self.ib_api.list_positions()
+            with self.assertRaises(TradingApiError):
+                await self.ib_api.get_position("TSLA")
+        finally:
+            await self.ib_api.close()
+
+        assert self.ib.client.requests["reqPositions"] == 1  # Only the synchronization
+        assert [p.symbol for p in positions] == ["AAPL", "TSLA"]
+        assert [p.symbol for p in updated_positions] == ["AAPL"]  # Other accounts ignored
+        assert aapl_position.current_price == 170.0 and aapl_position.market_value == 1700.0
+
+        assert len(self.ib_api.position_index) == 0  # Cleared on disconnect
+
+        # A quantity change outdates the portfolio item until it is updated too
+        index = self.ib_api.position_index
+        index.update_portfolio(ibin.PortfolioItem(aapl, 10.0, 170.0, 1700.0, 150.25, 197.5, 0.0, ACCOUNT))
+        index.update_position(ibin.Position(ACCOUNT, aapl, 12.0, 150.0))
+        assert type(index.get_by_symbol("AAPL")) is ibin.Position
+
+        # A reconnect seeds the index with the positions of the gateway again
+        try:
+            await self.ib_api.connect()
+            reseeded = [p.contract.symbol for p in index.list()]
+        finally:
+            await self.ib_api.close()
+        assert reseeded == ["AAPL", "TSLA"]
+
+    async def test_ib_open_order_index_ok(self):
+        """Test that open orders are served from the index fed by order events."""
+        try:
+            orders = await self.ib_api.list_orders()
+            order = await self.ib_api.get_order(orders[1].id)
+            submitted = await self.ib_api.submit_order(
+                "TSLA", 1, OrderSide.BUY, type=OrderType.LIMIT, limit_price=700.0
+            )
+            await self.ib_api.cancel_order(orders[0].id)
+            await asyncio.sleep(0.01)
+            open_orders = await self.ib_api.list_orders()
+            submitted_trade = self.ib_api.open_order_index.get_by_order_id(
+                self.ib_api.client_id, self.ib.trades()[-1].order.orderId
+            )
+            with self.assertRaises(TradingApiError):
+                await self.ib_api.get_order(orders[0].id)
+        finally:
+            await self.ib_api.close()
+
+        assert self.ib.client.requests["reqAllOpenOrders"] == 1  # Only the seed
+        assert order.symbol == "AAPL" and order.stop_price == 140.0
+        assert [o.id for o in open_orders] == [orders[1].id, submitted.id]
+        assert str(submitted_trade.order.permId) == submitted.id
+        assert not self.ib_api.open_order_index.synced  # Cleared on disconnect
+
+    async def test_ib_contract_cache_ok(self):
+        """Test that qualified contracts are cached and persisted."""
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            path = os.path.join(tmp_dir, "contracts.json")
+            self.ib_api.contract_cache = ContractCache(path)
+            try:
+                self.gateway.filled.update(["AAPL", "TSLA", "MSFT"])
+                await self.ib_api.submit_order("MSFT", 1, OrderSide.BUY)
+                await self.ib_api.submit_order("MSFT", 2, OrderSide.BUY)
+                await self.ib_api.close_position("MSFT")
+                await self.ib_api.close_all_positions()
+                with self.assertRaises(TradingApiError):
+                    await self.ib_api.submit_order("NVDA", 1, OrderSide.BUY)
+            finally:
+                await self.ib_api.close()
+            requests = self.ib.client.requests["reqContractDetails"]
+
+            # A new session starts with the contracts of the file
+            ib = fake_ib(self.gateway)
+            ib_api = IbApi(self.api_settings, ib=ib, contract_cache=ContractCache(path))
+            try:
+                await ib_api.submit_order("MSFT", 1, OrderSide.SELL)
+                await ib_api.submit_order("AAPL", 1, OrderSide.BUY)
+            finally:
+                await ib_api.close()
+
+            # Contracts qualified longer than max_age ago are only found by conId
+            expired = ContractCache(path, max_age=0)
+            msft_by_symbol = expired.get(ibin.Stock("MSFT", "SMART", "USD"))
+            msft_by_con_id = expired.get(stock(272093, "MSFT"))
+
+        assert requests == 4  # MSFT and NVDA by symbol, AAPL and TSLA by conId
+        assert len(ib_api.contract_cache) == 3
+        assert ib.client.requests["reqContractDetails"] == 0
+        assert ib_api.contract_cache.hits == 2
+        assert msft_by_symbol is None
+        assert msft_by_con_id.symbol == "MSFT"
+
+    async def test_ib_order_acknowledgement_ok(self):
+        """Test that orders return on the acknowledgement of the gateway."""
+        try:
+            await self.ib_api.connect()
+            started_at = time.perf_counter()
+            order = await self.ib_api.submit_order("TSLA", 1, OrderSide.BUY)
+            assert time.perf_counter() - started_at < 0.5  # Not a fixed sleep
+            assert self.ib.trades()[-1].orderStatus.status == "Submitted"
+            assert order.id == str(self.ib.trades()[-1].order.permId)
+
+            self.gateway.rejected.add("TSLA")
+            with self.assertRaisesRegex(TradingApiError, "Insufficient margin"):
+                await self.ib_api.submit_order("TSLA", 1, OrderSide.BUY)
+
+            self.gateway.rejected.clear()
+            self.ib.client.latency = 1
+            self.ib_api.submit_timeout = 0.05
+            with self.assertRaisesRegex(TradingApiError, "not acknowledged"):
+                await self.ib_api.submit_order("TSLA", 1, OrderSide.BUY)
+            # The unacknowledged order is cancelled rather than left working
+            compare(self.ib.client.requests["cancelOrder"], 1)
+            compare(self.gateway.completed[-1][2], "Cancelled")
+        finally:
+            await self.ib_api.close()
+
 
 if __name__ == '__main__':
     unittest.main()
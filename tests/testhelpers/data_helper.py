@@ -1,9 +1,7 @@
 import json
-from datetime import datetime
 from typing import List
 
 from alpaca_trade_api.entity import Account, Clock, Order, Calendar, Position
-from dateutil import parser
 
 from domainmodels.account import DomainAccount, Status
 from domainmodels.clock import DomainClock
@@ -11,6 +9,7 @@ from domainmodels.closed_position import ClosedPosition
 from domainmodels.order import DomainOrder, OrderSide, Type
 from domainmodels.position import DomainPosition
 from domainmodels.trading_day import TradingDay
+from helpers.timestamps import to_datetime
 
 
 # json.dumps(domain_account.__dict__, default=str)
@@ -29,6 +28,9 @@ def import_expected_get_clock() -> DomainClock:
     with open("tests/data/get_clock/expected_get_clock.json", "r") as d:
         domain_clock = DomainClock()
         domain_clock.__dict__ = json.loads(d.read())
+        domain_clock.next_close = to_datetime(domain_clock.next_close)
+        domain_clock.next_open = to_datetime(domain_clock.next_open)
+        domain_clock.timestamp = to_datetime(domain_clock.timestamp)
         return domain_clock
 
 
@@ -46,7 +48,7 @@ def import_expected_get_account() -> DomainAccount:
         domain_account = DomainAccount()
         domain_account.__dict__ = json.loads(d.read())
 
-        domain_account.created_at = parser.parse(domain_account.created_at)
+        domain_account.created_at = to_datetime(domain_account.created_at)
         domain_account.status = Status[domain_account.status]
 
         return domain_account
@@ -131,13 +133,12 @@ def import_api_get_trading_days() -> List[Calendar]:
 def import_expected_get_trading_days() -> List[TradingDay]:
     """Import the expected output from the alpaca api wrapper."""
     with open("tests/data/get_trading_days/expected_get_trading_days.json", "r") as d:
-        format = '%Y-%m-%d %H:%M:%S'
         trading_days = json.loads(d.read())
         domain_trading_day_list = []
         for day in trading_days:
             domain_trading_day = TradingDay()
-            day["open"] = datetime.strptime(day["open"], format)
-            day["close"] = datetime.strptime(day["close"], format)
+            day["open"] = to_datetime(day["open"])
+            day["close"] = to_datetime(day["close"])
             domain_trading_day.__dict__ = day
             domain_trading_day_list.append(domain_trading_day)
 
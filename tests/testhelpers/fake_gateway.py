@@ -0,0 +1,370 @@
+"""A stand-in for the TWS / IB gateway, answering ib_insync on the event loop."""
+import asyncio
+import inspect
+import time
+from collections import Counter
+from typing import Callable, Dict, List, Tuple
+
+from ib_insync import IB, Contract, ContractDetails, Order, OrderState, Stock
+from ib_insync.client import Client
+from ib_insync.objects import ConnectionStats
+from ib_insync.wrapper import Wrapper
+
+ACCOUNT = "DU1234567"
+
+# Wrapper.error takes an advancedOrderRejectJson argument since ib_insync 0.9.71
+ERROR_ARGS = (
+    ("",)
+    if "advancedOrderRejectJson" in inspect.signature(Wrapper.error).parameters
+    else ()
+)
+
+# Sessions of the calendar contract, in the format of TWS 970 and later
+LIQUID_HOURS = (
+    "20220316:0930-20220316:1600;20220317:0930-20220317:1600;"
+    "20220318:0930-20220318:1600;20220319:CLOSED;20220320:CLOSED;"
+    "20220321:0930-20220321:1600"
+)
+
+# Tag, value and currency of the account summary
+ACCOUNT_SUMMARY = (
+    ("AccountType", "INDIVIDUAL", ""),
+    ("NetLiquidation", "101234.56", "USD"),
+    ("TotalCashValue", "85000.00", "USD"),
+    ("AccruedCash", "1.25", "USD"),
+    ("BuyingPower", "340000.00", "USD"),
+    ("PreviousDayEquityWithLoanValue", "100987.65", "USD"),
+    ("GrossPositionValue", "16234.56", "USD"),
+    ("InitMarginReq", "4058.64", "USD"),
+    ("MaintMarginReq", "3689.67", "USD"),
+    ("SMA", "52000.00", "USD"),
+)
+
+
+def stock(con_id: int, symbol: str, primary_exchange: str = "NASDAQ") -> Contract:
+    """Create a qualified US stock contract."""
+    return Stock(
+        conId=con_id,
+        symbol=symbol,
+        exchange="SMART",
+        primaryExchange=primary_exchange,
+        currency="USD",
+        localSymbol=symbol,
+        tradingClass="NMS",
+    )
+
+
+class FakeGateway:
+    """The state of the account behind the fake gateway.
+
+    Placed orders are acknowledged as Submitted, symbols in rejected are
+    rejected with error 201 and orders of symbols in filled are filled at once.
+    """
+
+    def __init__(self) -> None:
+        """Class initialization function."""
+        self.contracts: Dict[int, Contract] = {
+            756733: stock(756733, "SPY", "ARCA"),
+            265598: stock(265598, "AAPL"),
+            76792991: stock(76792991, "TSLA"),
+            272093: stock(272093, "MSFT"),
+        }
+        # conId -> (position, average cost, market price)
+        self.positions: Dict[int, Tuple[float, float, float]] = {
+            265598: (10.0, 150.25, 160.5),
+            76792991: (-3.0, 820.0, 800.0),
+        }
+        # orderId -> (contract, order, status)
+        self.orders: Dict[int, Tuple[Contract, Order, str]] = {}
+        self.completed: List[Tuple[Contract, Order, str]] = []
+        self.rejected: set = set()
+        self.filled: set = set()
+        self.now = 1647445200  # 2022-03-16 15:40 UTC, 11:40 in New York
+        self.next_perm_id = 1700000000
+
+        self.add_order(stock(272093, "MSFT"), "BUY", 5, "LMT", 280.0)
+        self.add_order(stock(265598, "AAPL"), "SELL", 2, "STP", 140.0)
+
+    def add_order(
+        self, contract: Contract, action: str, qty: float, type: str, price: float
+    ) -> Order:
+        """Add an open order placed by another client."""
+        order_id = 900 + len(self.orders)
+        order = Order(
+            orderId=order_id,
+            clientId=1,
+            permId=self.perm_id(),
+            action=action,
+            totalQuantity=qty,
+            orderType=type,
+            tif="DAY",
+            account=ACCOUNT,
+        )
+        if type == "LMT":
+            order.lmtPrice = price
+        else:
+            order.auxPrice = price
+        self.orders[order_id] = (contract, order, "Submitted")
+        return order
+
+    def perm_id(self) -> int:
+        """Get the next permId."""
+        self.next_perm_id += 1
+        return self.next_perm_id
+
+    def details(self, contract: Contract) -> List[ContractDetails]:
+        """Get the details of the contracts matching a contract."""
+        return [
+            ContractDetails(
+                contract=known,
+                liquidHours=LIQUID_HOURS,
+                tradingHours=LIQUID_HOURS,
+                timeZoneId="US/Eastern",
+            )
+            for known in self.contracts.values()
+            if known.conId == contract.conId
+            or (not contract.conId and known.symbol == contract.symbol)
+        ]
+
+
+class FakeClient(Client):
+    """An ib_insync client talking to a FakeGateway instead of a socket.
+
+    The requests are answered through the callbacks of the real wrapper after
+    latency seconds, so the request bookkeeping and events of ib_insync are
+    used as with a gateway. The requests are counted by method.
+    """
+
+    def __init__(self, wrapper, gateway: FakeGateway, latency: float = 0.001):
+        super().__init__(wrapper)
+        self.gateway = gateway
+        self.latency = latency
+        self.requests: Counter = Counter()
+
+    def _answer(self, *callbacks: Callable[[], None]) -> None:
+        """Run the callbacks as one message from the gateway, after the latency."""
+
+        def answer() -> None:
+            if not self.isConnected():
+                return
+            self.wrapper.tcpDataArrived()
+            for callback in callbacks:
+                callback()
+            self.wrapper.tcpDataProcessed()
+
+        asyncio.get_event_loop().call_later(self.latency, answer)
+
+    async def connectAsync(self, host, port, clientId, timeout=2.0):
+        self.requests["connect"] += 1
+        self.host, self.port, self.clientId = host, int(port), int(clientId)
+        await asyncio.sleep(self.latency)
+        self.connState = Client.CONNECTED
+        self._serverVersion = 163
+        self._accounts = [ACCOUNT]
+        self._reqIdSeq = 1
+        self._startTime = time.time()
+        # The ready flag of ib_insync 0.9.71 and later, and the event before
+        self._apiReady = True
+        self._readyEvent = asyncio.Event()
+        self._readyEvent.set()
+        self.wrapper.managedAccounts(ACCOUNT)
+        self.apiStart.emit()
+
+    def connectionStats(self):
+        if not self.isReady():
+            raise ConnectionError("Not connected")
+        return ConnectionStats(
+            self._startTime, time.time() - self._startTime, 0, 0, 0, 0
+        )
+
+    def disconnect(self):
+        self.connState = Client.DISCONNECTED
+        self.reset()
+        self.wrapper.connectionClosed()
+
+    def reqPositions(self):
+        self.requests["reqPositions"] += 1
+        gateway = self.gateway
+        self._answer(
+            *[
+                lambda c=c, p=p: self.wrapper.position(
+                    ACCOUNT, gateway.contracts[c], p[0], p[1]
+                )
+                for c, p in gateway.positions.items()
+            ],
+            self.wrapper.positionEnd,
+        )
+
+    def reqAccountUpdates(self, subscribe, acctCode):
+        self.requests["reqAccountUpdates"] += 1
+        gateway = self.gateway
+
+        def portfolio(con_id: int) -> Callable[[], None]:
+            qty, cost, price = gateway.positions[con_id]
+            return lambda: self.wrapper.updatePortfolio(
+                gateway.contracts[con_id],
+                qty,
+                price,
+                qty * price,
+                cost,
+                qty * (price - cost),
+                0.0,
+                ACCOUNT,
+            )
+
+        self._answer(
+            *[
+                lambda t=t, v=v, c=c: self.wrapper.updateAccountValue(t, v, c, ACCOUNT)
+                for t, v, c in ACCOUNT_SUMMARY
+            ],
+            *[portfolio(con_id) for con_id in gateway.positions],
+            lambda: self.wrapper.accountDownloadEnd(ACCOUNT),
+        )
+
+    def reqAccountUpdatesMulti(self, reqId, account, modelCode, ledgerAndNLV):
+        self.requests["reqAccountUpdatesMulti"] += 1
+        self._answer(lambda: self.wrapper.accountUpdateMultiEnd(reqId))
+
+    def reqAccountSummary(self, reqId, groupName, tags):
+        self.requests["reqAccountSummary"] += 1
+        self._answer(
+            *[
+                lambda t=t, v=v, c=c: self.wrapper.accountSummary(
+                    reqId, ACCOUNT, t, v, c
+                )
+                for t, v, c in ACCOUNT_SUMMARY
+            ],
+            lambda: self.wrapper.accountSummaryEnd(reqId),
+        )
+
+    def reqExecutions(self, reqId, execFilter):
+        self.requests["reqExecutions"] += 1
+        self._answer(lambda: self.wrapper.execDetailsEnd(reqId))
+
+    def reqCurrentTime(self):
+        self.requests["reqCurrentTime"] += 1
+        self._answer(lambda: self.wrapper.currentTime(self.gateway.now))
+
+    def reqContractDetails(self, reqId, contract):
+        self.requests["reqContractDetails"] += 1
+        self._answer(
+            *[
+                lambda d=d: self.wrapper.contractDetails(reqId, d)
+                for d in self.gateway.details(contract)
+            ],
+            lambda: self.wrapper.contractDetailsEnd(reqId),
+        )
+
+    def _open_order(
+        self, contract: Contract, order: Order, status: str
+    ) -> Callable[[], None]:
+        """Get the callback sending an open order and its status."""
+
+        def open_order() -> None:
+            self.wrapper.openOrder(
+                order.orderId, contract, order, OrderState(status=status)
+            )
+            self._order_status(order, status)
+
+        return open_order
+
+    def _order_status(self, order: Order, status: str) -> None:
+        """Send the status of an order."""
+        filled = order.totalQuantity if status == "Filled" else 0.0
+        self.wrapper.orderStatus(
+            order.orderId,
+            status,
+            filled,
+            order.totalQuantity - filled,
+            0.0,
+            order.permId,
+            0,
+            0.0,
+            order.clientId,
+            "",
+        )
+
+    def reqOpenOrders(self):
+        self.requests["reqOpenOrders"] += 1
+        self._answer(
+            *[
+                self._open_order(*open_order)
+                for open_order in self.gateway.orders.values()
+                if open_order[1].clientId == self.clientId
+            ],
+            self.wrapper.openOrderEnd,
+        )
+
+    def reqAllOpenOrders(self):
+        self.requests["reqAllOpenOrders"] += 1
+        self._answer(
+            *[
+                self._open_order(*open_order)
+                for open_order in self.gateway.orders.values()
+            ],
+            self.wrapper.openOrderEnd,
+        )
+
+    def reqCompletedOrders(self, apiOnly):
+        self.requests["reqCompletedOrders"] += 1
+        self._answer(
+            *[
+                lambda c=c, o=o, s=s: self.wrapper.completedOrder(
+                    c, o, OrderState(status=s)
+                )
+                for c, o, s in self.gateway.completed
+            ],
+            self.wrapper.completedOrdersEnd,
+        )
+
+    def placeOrder(self, orderId, contract, order):
+        self.requests["placeOrder"] += 1
+        gateway = self.gateway
+        placed = Order(**{**order.__dict__, "orderId": orderId})
+        placed.clientId = self.clientId
+        placed.permId = gateway.perm_id()
+        placed.account = ACCOUNT
+        contract = gateway.details(contract)[0].contract
+        order.permId = placed.permId
+
+        if contract.symbol in gateway.rejected:
+            self._answer(
+                lambda: self.wrapper.error(
+                    orderId,
+                    201,
+                    "Order rejected - reason:Insufficient margin",
+                    *ERROR_ARGS,
+                )
+            )
+            return
+
+        if contract.symbol not in gateway.filled:
+            gateway.orders[orderId] = (contract, placed, "Submitted")
+            self._answer(self._open_order(contract, placed, "Submitted"))
+            return
+
+        gateway.completed.append((contract, placed, "Filled"))
+        qty, cost, price = gateway.positions.get(contract.conId, (0.0, 0.0, 0.0))
+        qty += placed.totalQuantity if placed.action == "BUY" else -placed.totalQuantity
+        if qty:
+            gateway.positions[contract.conId] = (qty, cost or price, price)
+        else:
+            gateway.positions.pop(contract.conId, None)
+        self._answer(
+            self._open_order(contract, placed, "Filled"),
+            lambda: self.wrapper.position(ACCOUNT, contract, qty, cost or price),
+        )
+
+    def cancelOrder(self, orderId, manualCancelOrderTime=""):
+        self.requests["cancelOrder"] += 1
+        contract, order, _ = self.gateway.orders.pop(orderId)
+        self.gateway.completed.append((contract, order, "Cancelled"))
+        self._answer(lambda: self._order_status(order, "Cancelled"))
+
+
+def fake_ib(gateway: FakeGateway, latency: float = 0.001) -> IB:
+    """Create an ib_insync client connected to a fake gateway."""
+    ib = IB()
+    ib.client = FakeClient(ib.wrapper, gateway, latency)
+    ib.client.apiEnd += ib.disconnectedEvent
+    return ib